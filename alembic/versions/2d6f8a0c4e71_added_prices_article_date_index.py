@@ -0,0 +1,32 @@
+"""added prices article date index
+
+Revision ID: 2d6f8a0c4e71
+Revises: 9e3a5c7b1d20
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6f8a0c4e71'
+down_revision: Union[str, Sequence[str], None] = '9e3a5c7b1d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_prices_article_date', 'prices',
+        ['article_id', sa.text('date DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_prices_article_date', table_name='prices')
@@ -0,0 +1,32 @@
+"""added delta versions
+
+Revision ID: 4b8d0e6f2a19
+Revises: 7c2e91d4a5b3
+Create Date: 2026-10-18 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d0e6f2a19'
+down_revision: Union[str, Sequence[str], None] = '7c2e91d4a5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cable_calculations', sa.Column('lineage_id', sa.Integer(), nullable=True))
+    op.add_column('cable_calculations', sa.Column('tombstone', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('project_versions', sa.Column('base_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('project_versions', 'base_version')
+    op.drop_column('cable_calculations', 'tombstone')
+    op.drop_column('cable_calculations', 'lineage_id')
@@ -0,0 +1,32 @@
+"""added article numbers
+
+Revision ID: 6a1c3e5f7b92
+Revises: 2d6f8a0c4e71
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1c3e5f7b92'
+down_revision: Union[str, Sequence[str], None] = '2d6f8a0c4e71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('articles', sa.Column('article_number', sa.String(), nullable=True))
+    op.add_column('articles', sa.Column('price_unit', sa.Integer(), nullable=True))
+    op.create_index('ix_articles_category_number', 'articles', ['category_id', 'article_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_category_number', table_name='articles')
+    op.drop_column('articles', 'price_unit')
+    op.drop_column('articles', 'article_number')
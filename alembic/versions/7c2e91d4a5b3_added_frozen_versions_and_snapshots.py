@@ -0,0 +1,41 @@
+"""added frozen versions and snapshots
+
+Revision ID: 7c2e91d4a5b3
+Revises: bcc757e40922
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e91d4a5b3'
+down_revision: Union[str, Sequence[str], None] = 'bcc757e40922'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('project_versions', sa.Column('frozen', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    op.create_table('version_snapshots',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('etag', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.LargeBinary(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('cable_count', sa.Integer(), nullable=False),
+    sa.Column('frozen_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('version_snapshots')
+    op.drop_column('project_versions', 'frozen')
@@ -0,0 +1,42 @@
+"""added energy summaries
+
+Revision ID: 9e3a5c7b1d20
+Revises: 4b8d0e6f2a19
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a5c7b1d20'
+down_revision: Union[str, Sequence[str], None] = '4b8d0e6f2a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('energy_summaries',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('input_hash', sa.String(length=32), nullable=False),
+    sa.Column('cable_count', sa.Integer(), nullable=False),
+    sa.Column('loss_kw', sa.Float(), nullable=False),
+    sa.Column('annual_loss_kwh', sa.Float(), nullable=False),
+    sa.Column('annual_loss_cost', sa.Float(), nullable=False),
+    sa.Column('lifetime_loss_cost', sa.Float(), nullable=False),
+    sa.Column('upsize_count', sa.Integer(), nullable=False),
+    sa.Column('lifetime_savings', sa.Float(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('energy_summaries')
@@ -0,0 +1,44 @@
+"""added lineage indexes
+
+Revision ID: b7e4d2a9c613
+Revises: 6a1c3e5f7b92
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a9c613'
+down_revision: Union[str, Sequence[str], None] = '6a1c3e5f7b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_cable_calculations_project_version', table_name='cable_calculations')
+    op.create_index(
+        'ix_cable_calculations_project_version', 'cable_calculations',
+        ['project_id', 'version', 'created_at', sa.text('coalesce(lineage_id, id)')],
+        unique=False
+    )
+    op.create_index(
+        'ix_cable_calculations_lineage', 'cable_calculations',
+        ['project_id', sa.text('coalesce(lineage_id, id)'), sa.text('version DESC')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cable_calculations_lineage', table_name='cable_calculations')
+    op.drop_index('ix_cable_calculations_project_version', table_name='cable_calculations')
+    op.create_index(
+        'ix_cable_calculations_project_version', 'cable_calculations',
+        ['project_id', 'version', 'created_at', 'id'],
+        unique=False
+    )
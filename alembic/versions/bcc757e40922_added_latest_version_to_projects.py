@@ -0,0 +1,42 @@
+"""added latest_version to projects
+
+Revision ID: bcc757e40922
+Revises: f8268959187c
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcc757e40922'
+down_revision: Union[str, Sequence[str], None] = 'f8268959187c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('latest_version', sa.Integer(), server_default='0', nullable=False))
+
+    # Zähler aus den vorhandenen Versionen übernehmen
+    op.execute(
+        """
+        UPDATE projects p
+        SET latest_version = v.version
+        FROM (
+            SELECT project_id, max(version) AS version
+            FROM cable_calculations
+            GROUP BY project_id
+        ) v
+        WHERE v.project_id = p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'latest_version')
@@ -0,0 +1,32 @@
+"""added article match key index
+
+Revision ID: c3f9a6d1e8b4
+Revises: b7e4d2a9c613
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a6d1e8b4'
+down_revision: Union[str, Sequence[str], None] = 'b7e4d2a9c613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_articles_match_key', 'articles',
+        [sa.text("replace(replace(lower(name), ' ', ''), ',', '.')")],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_match_key', table_name='articles')
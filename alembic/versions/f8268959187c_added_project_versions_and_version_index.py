@@ -0,0 +1,54 @@
+"""added project_versions and version index
+
+Revision ID: f8268959187c
+Revises: 005460fe7e6c
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8268959187c'
+down_revision: Union[str, Sequence[str], None] = '005460fe7e6c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Abfragen je Version: WHERE project_id, version ORDER BY created_at, id
+    op.create_index(
+        'ix_cable_calculations_project_version',
+        'cable_calculations',
+        ['project_id', 'version', 'created_at', 'id'],
+        unique=False
+    )
+
+    op.create_table('project_versions',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('cable_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'version')
+    )
+
+    # Bestehende Versionen übernehmen
+    op.execute(
+        """
+        INSERT INTO project_versions (project_id, version, cable_count, updated_at)
+        SELECT project_id, version, count(*), max(created_at)
+        FROM cable_calculations
+        GROUP BY project_id, version
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('project_versions')
+    op.drop_index('ix_cable_calculations_project_version', table_name='cable_calculations')
@@ -0,0 +1,117 @@
+"""
+Stückliste (BOM) und Kostenschätzung einer Version.
+
+Cables are grouped by (cable_type, total_cores, cross_section_l) and each
+group is matched to the article named "<cable_type> <cores>x<section>"
+(e.g. "NYY-J 5x2.5"; spaces, case and decimal comma are ignored). Grouping,
+matching and the latest price per article (DISTINCT ON) run as one SQL
+statement. Prices are taken as price per metre.
+
+Results are cached per version and reused while neither the version
+(project_versions.cable_count / updated_at) nor any article or price
+(prices.functions.price_revision) changed.
+"""
+from sqlalchemy import Numeric, String, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models import Article, Price, ProjectVersion
+from app.prices import functions as prices
+from app.cable_calculation import storage
+from app.cable_calculation.cache import bom_cache
+
+
+def _match_key(text):
+    """
+    Normalized article name for matching: lower case, no spaces, decimal point.
+
+    Must stay identical to the expression of the index ix_articles_match_key.
+    """
+    return func.replace(func.replace(func.lower(text), " ", ""), ",", ".")
+
+
+def _bom_statement(calcs, in_version):
+    # float -> numeric gibt die kürzeste Darstellung: 16.0 -> "16", 2.5 -> "2.5"
+    section_text = cast(cast(calcs.cross_section_l, Numeric), String)
+    name = func.concat(
+        calcs.cable_type, " ", calcs.total_cores, "x", section_text
+    )
+    groups = select(
+        calcs.cable_type,
+        calcs.total_cores,
+        calcs.cross_section_l.label("cross_section"),
+        func.count().label("cable_count"),
+        func.sum(calcs.cable_length_m * calcs.number_of_cables).label("length_m"),
+        _match_key(name).label("match_key"),
+    ).where(
+        *in_version
+    ).group_by(
+        calcs.cable_type,
+        calcs.total_cores,
+        calcs.cross_section_l,
+    ).cte("groups")
+
+    # Neuester Preis je Artikelschlüssel, nur für Schlüssel der Version
+    article_key = _match_key(Article.name)
+    latest = select(
+        article_key.label("match_key"),
+        Article.id.label("article_id"),
+        Article.name.label("article_name"),
+        Price.price.label("unit_price"),
+        Price.date.label("price_date"),
+    ).join(
+        Price, Price.article_id == Article.id
+    ).where(
+        article_key.in_(select(groups.c.match_key))
+    ).distinct(
+        article_key
+    ).order_by(
+        article_key, Price.date.desc(), Price.id.desc()
+    ).subquery("latest")
+
+    return select(
+        groups.c.cable_type,
+        groups.c.total_cores,
+        groups.c.cross_section,
+        groups.c.cable_count,
+        groups.c.length_m,
+        latest.c.article_id,
+        latest.c.article_name,
+        latest.c.unit_price,
+        latest.c.price_date,
+        (groups.c.length_m * latest.c.unit_price).label("cost"),
+    ).select_from(
+        groups.outerjoin(latest, latest.c.match_key == groups.c.match_key)
+    ).order_by(groups.c.cable_type, groups.c.total_cores, groups.c.cross_section)
+
+
+def version_bom(db: Session, project_id: int, version: int):
+    """
+    Bill of materials of a version with the latest price per article.
+
+    Returns:
+        Dict with grouped items, total_cost and the number of unpriced groups
+    """
+    tracked = db.execute(
+        select(ProjectVersion.cable_count, ProjectVersion.updated_at).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        )
+    ).first()
+    stamp = (tuple(tracked), prices.price_revision) if tracked else None
+    if stamp:
+        cached = bom_cache.get(project_id, version, stamp)
+        if cached is not None:
+            return cached
+
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    items = [row._asdict() for row in db.execute(_bom_statement(calcs, in_version))]
+    bom = {
+        "project_id": project_id,
+        "version": version,
+        "items": items,
+        "total_cost": sum(item["cost"] for item in items if item["cost"] is not None),
+        "unpriced_count": sum(1 for item in items if item["cost"] is None),
+    }
+    if stamp:
+        bom_cache.put(project_id, version, stamp, bom)
+    return bom
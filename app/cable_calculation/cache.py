@@ -0,0 +1,152 @@
+"""
+Ergebnis-Cache für ausgewertete Versionen.
+
+Computed results are kept per row, keyed by a hash of the row's input
+fields (computed in the database, see functions.evaluate_version). On a
+read only rows whose hash changed (or that are new) are recomputed, and
+the version aggregates are updated incrementally instead of rescanning all
+rows. Versions are evicted least-recently-used.
+
+VersionCache holds data derived from a whole version (e.g. the bill of
+materials), stored together with a stamp of its inputs; an entry is only
+returned while the stamp still matches.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+
+# Anzahl gecachter Versionen (LRU)
+MAX_CACHED_VERSIONS = 32
+
+
+class VersionResults:
+    """Results and running aggregates of one evaluated version."""
+
+    def __init__(self, params: tuple):
+        self.params = params
+        self.lock = threading.Lock()
+        self.hashes = {}    # id -> input hash
+        self.results = {}   # id -> result dict
+        self.lengths = {}   # id -> cable_length_m * number_of_cables
+        self.order = []     # ids in read order
+        self.total_length_m = 0.0
+        self.failed_count = 0
+        # Max-Heap (negiert) mit verzögertem Löschen: (-drop, id, hash)
+        self._drops = []
+
+    def dirty(self, current: dict) -> tuple[list, list]:
+        """
+        Compare with the current (id -> hash) state of the version.
+
+        Returns:
+            (ids to recompute, ids that no longer exist)
+        """
+        changed = [i for i, h in current.items() if self.hashes.get(i) != h]
+        removed = [i for i in self.hashes if i not in current]
+        return changed, removed
+
+    def remove(self, calc_id: int):
+        result = self.results.pop(calc_id)
+        self.hashes.pop(calc_id)
+        self.total_length_m -= self.lengths.pop(calc_id)
+        if not result["ok"]:
+            self.failed_count -= 1
+
+    def put(self, calc_id: int, input_hash: str, length: float, result: dict):
+        if calc_id in self.results:
+            self.remove(calc_id)
+        self.hashes[calc_id] = input_hash
+        self.results[calc_id] = result
+        self.lengths[calc_id] = length
+        self.total_length_m += length
+        if not result["ok"]:
+            self.failed_count += 1
+        if result["voltage_drop_pct"] is not None:
+            heapq.heappush(self._drops, (-result["voltage_drop_pct"], calc_id, input_hash))
+        if len(self._drops) > 2 * len(self.results) + 64:
+            self._compact()
+
+    def _compact(self):
+        self._drops = [
+            (-r["voltage_drop_pct"], calc_id, self.hashes[calc_id])
+            for calc_id, r in self.results.items()
+            if r["voltage_drop_pct"] is not None
+        ]
+        heapq.heapify(self._drops)
+
+    def max_voltage_drop_pct(self):
+        # Veraltete Heap-Einträge erst beim Lesen verwerfen
+        while self._drops:
+            drop, calc_id, input_hash = self._drops[0]
+            if self.hashes.get(calc_id) == input_hash:
+                return -drop
+            heapq.heappop(self._drops)
+        return None
+
+    def summary(self):
+        return {
+            "cable_count": len(self.order),
+            "total_length_m": self.total_length_m,
+            "max_voltage_drop_pct": self.max_voltage_drop_pct(),
+            "failed_count": self.failed_count,
+        }
+
+    def set_order(self, ids):
+        # Zwischen Hash- und Datenabfrage gelöschte Zeilen auslassen
+        self.order = [calc_id for calc_id in ids if calc_id in self.results]
+
+    def rows(self):
+        return [self.results[calc_id] for calc_id in self.order]
+
+
+class ResultCache:
+    """LRU map (project_id, version) -> VersionResults."""
+
+    def __init__(self, max_versions: int = MAX_CACHED_VERSIONS):
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: int, version: int, params: tuple) -> VersionResults:
+        """Cached entry for the version; a fresh one if the parameters changed."""
+        key = (project_id, version)
+        with self._lock:
+            entry = self._versions.get(key)
+            if entry is None or entry.params != params:
+                entry = self._versions[key] = VersionResults(params)
+            self._versions.move_to_end(key)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+            return entry
+
+
+class VersionCache:
+    """LRU map (project_id, version) -> (stamp, value) for derived data."""
+
+    def __init__(self, max_versions: int = MAX_CACHED_VERSIONS):
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: int, version: int, stamp):
+        """Cached value, or None if missing or computed from other inputs."""
+        key = (project_id, version)
+        with self._lock:
+            cached = self._versions.get(key)
+            if cached is None or cached[0] != stamp:
+                return None
+            self._versions.move_to_end(key)
+            return cached[1]
+
+    def put(self, project_id: int, version: int, stamp, value):
+        key = (project_id, version)
+        with self._lock:
+            self._versions[key] = (stamp, value)
+            self._versions.move_to_end(key)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+
+
+result_cache = ResultCache()
+bom_cache = VersionCache()
+load_cache = VersionCache()
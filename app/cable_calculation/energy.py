@@ -0,0 +1,315 @@
+"""
+Verlustenergie und wirtschaftlicher Querschnitt.
+
+Annual I²R losses per cable: loaded_cores * Ib² * R_L, with R_L at
+operating temperature from engine.impedances, times the full-load
+equivalent operating hours and the energy price. The lifetime cost is the
+present value of the annual cost (annuity factor over lifetime_years at
+interest_rate).
+
+Economic cross-section (IEC 60287-3-2, linear cost model): conductor cost
+a * S plus the present value of the losses b / S (with the resistivity of
+the conductor material) is smallest at S* = sqrt(b / a); the two standard sizes around S* are compared and the
+cheaper one is recommended. Only sizes from the installed one upwards are
+considered, the installed size is taken as technically required. The
+fixed part of the installation cost is the same for every size and drops
+out.
+
+refresh_portfolio materializes one row per project (latest version) in
+energy_summaries. Projects are streamed in chunks of PROJECT_CHUNK; all
+cables of a chunk are evaluated in one vectorized pass and summed per
+project with bincount. A project is recomputed only when its input hash
+(version stamp + parameters) changed.
+"""
+import hashlib
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import Integer, and_, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import CableCalculation, EnergySummary, Project, ProjectVersion
+from app.cable_calculation import engine, storage
+from app.cable_calculation.engine import INPUT_COLUMNS
+from app.cable_calculation.functions import get_version_rows
+from app.cable_calculation.tables import get_catalog
+
+# Defaults: Volllaststunden (h/a), Energiepreis (€/kWh), Nutzungsdauer, Kalkulationszins
+DEFAULT_OPERATING_HOURS = 2000.0
+DEFAULT_ENERGY_PRICE = 0.25
+DEFAULT_LIFETIME_YEARS = 30
+DEFAULT_INTEREST_RATE = 0.04
+# Querschnittsabhängige Kosten je belastetem Leiter (€ / (mm² * m))
+DEFAULT_CONDUCTOR_COST = 0.15
+
+# Projekte je Batch im Portfolio-Lauf
+PROJECT_CHUNK = 200
+
+RESULT_COLUMNS = (
+    "id",
+    "loss_w",
+    "annual_loss_kwh",
+    "annual_loss_cost",
+    "lifetime_loss_cost",
+    "economic_section_mm2",
+    "lifetime_savings",
+    "upsize",
+)
+
+
+def annuity_factor(lifetime_years: int, interest_rate: float) -> float:
+    """Present value of 1 per year over lifetime_years."""
+    if not interest_rate:
+        return float(lifetime_years)
+    return (1 - (1 + interest_rate) ** -lifetime_years) / interest_rate
+
+
+def evaluate_columns(
+    columns,
+    operating_hours: float = DEFAULT_OPERATING_HOURS,
+    energy_price: float = DEFAULT_ENERGY_PRICE,
+    lifetime_years: int = DEFAULT_LIFETIME_YEARS,
+    interest_rate: float = DEFAULT_INTEREST_RATE,
+    conductor_cost: float = DEFAULT_CONDUCTOR_COST,
+):
+    """
+    Losses, loss cost and economic cross-section for all cables at once.
+
+    Args:
+        columns: Dict of NumPy arrays keyed by engine.INPUT_COLUMNS
+
+    Returns:
+        Dict of NumPy arrays keyed by RESULT_COLUMNS
+    """
+    sections = get_catalog().sections
+    installed = columns["cross_section_l"]
+    cores = columns["loaded_cores"]
+    current = columns["nominal_current_a"]
+    parallel = np.maximum(columns["number_of_cables"], 1)
+    length = columns["cable_length_m"]
+    # €/W über die Nutzungsdauer
+    loss_price = operating_hours / 1000 * energy_price * annuity_factor(lifetime_years, interest_rate)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        loss_w = cores * current ** 2 * engine.impedances(columns)["resistance_l"]
+        annual_kwh = loss_w * operating_hours / 1000
+
+        # Kosten(S) = a * S + b / S
+        a = conductor_cost * cores * parallel * length
+        rho = engine.resistivities(columns["cable_type"])
+        b = cores * current ** 2 * rho * length / parallel * loss_price
+        optimum = np.sqrt(b / a)
+
+        upper = np.searchsorted(sections, np.nan_to_num(optimum, nan=0.0), side="left")
+        lower = sections[np.clip(upper - 1, 0, len(sections) - 1)]
+        upper = sections[np.clip(upper, 0, len(sections) - 1)]
+        lower = np.maximum(lower, installed)
+        upper = np.maximum(upper, installed)
+        cost_installed = a * installed + b / installed
+        cost_lower = a * lower + b / lower
+        cost_upper = a * upper + b / upper
+
+    candidate = np.where(cost_upper < cost_lower, upper, lower)
+    cost_candidate = np.minimum(cost_lower, cost_upper)
+    better = cost_candidate < cost_installed
+    economic = np.where(better, candidate, installed)
+
+    return {
+        "id": columns["id"],
+        "loss_w": loss_w,
+        "annual_loss_kwh": annual_kwh,
+        "annual_loss_cost": annual_kwh * energy_price,
+        "lifetime_loss_cost": loss_w * loss_price,
+        "economic_section_mm2": economic,
+        "lifetime_savings": np.where(better, cost_installed - cost_candidate, 0.0),
+        "upsize": economic > installed,
+    }
+
+
+def results_to_rows(results):
+    """Column dict of evaluate_columns -> list of row dicts."""
+    return [
+        dict(zip(RESULT_COLUMNS, values))
+        for values in zip(*(engine.to_list(np.asarray(results[name])) for name in RESULT_COLUMNS))
+    ]
+
+
+def _totals(results, codes=None, count: int = 1):
+    """Sums per group (codes: group index per cable); non-finite values count as 0."""
+    if codes is None:
+        codes = np.zeros(len(results["id"]), dtype=np.int64)
+
+    def total(name):
+        values = np.asarray(results[name], dtype=np.float64)
+        return np.bincount(codes, weights=np.where(np.isfinite(values), values, 0.0), minlength=count)
+
+    return {
+        "cable_count": np.bincount(codes, minlength=count),
+        "loss_kw": total("loss_w") / 1000,
+        "annual_loss_kwh": total("annual_loss_kwh"),
+        "annual_loss_cost": total("annual_loss_cost"),
+        "lifetime_loss_cost": total("lifetime_loss_cost"),
+        "upsize_count": np.bincount(
+            codes, weights=results["upsize"].astype(np.float64), minlength=count
+        ).astype(np.int64),
+        "lifetime_savings": total("lifetime_savings"),
+    }
+
+
+def summarize(results):
+    return {name: values.item() for name, values in _totals(results).items()}
+
+
+def version_energy(db: Session, project_id: int, version: int, **params):
+    """
+    Energy losses and economic cross-sections for all cables of a version.
+
+    Args:
+        params: operating_hours, energy_price, lifetime_years, interest_rate, conductor_cost
+
+    Returns:
+        Dict with summary and per-cable results
+    """
+    columns = engine.to_columns(get_version_rows(db, project_id, version))
+    results = evaluate_columns(columns, **params)
+    return {
+        "project_id": project_id,
+        "version": version,
+        "summary": summarize(results),
+        "results": results_to_rows(results),
+    }
+
+
+def _input_hash(version: int, cable_count: int, updated_at, params: dict) -> str:
+    key = f"{version}|{cable_count}|{updated_at}|{sorted(params.items())}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _chunk_rows(db: Session, stale: dict):
+    """Engine input rows, prefixed with the project id, of the stale projects of a chunk."""
+    columns = [getattr(CableCalculation, name) for name in INPUT_COLUMNS]
+    full = [(project_id, version) for project_id, (version, base) in stale.items() if base is None]
+    rows = []
+    if full:
+        # Vollständig gespeicherte Versionen: eine Abfrage für den ganzen Batch
+        rows += db.execute(
+            select(CableCalculation.project_id, *columns).where(
+                tuple_(CableCalculation.project_id, CableCalculation.version).in_(full)
+            )
+        ).all()
+    for project_id, (version, base) in stale.items():
+        if base is not None:
+            calcs, in_version = storage.version_calcs(db, project_id, version)
+            rows += db.execute(
+                select(literal(project_id, Integer), *(getattr(calcs, name) for name in INPUT_COLUMNS))
+                .where(*in_version)
+            ).all()
+    return rows
+
+
+def refresh_portfolio(
+    db: Session,
+    chunk_size: int = PROJECT_CHUNK,
+    force: bool = False,
+    **params
+):
+    """
+    Recompute energy_summaries for all projects whose latest version or
+    parameters changed since the last refresh (commits per chunk).
+
+    Args:
+        force: Recompute every project
+        params: As for evaluate_columns; part of the input hash
+
+    Returns:
+        Dict with project, refreshed, skipped and cable counts and the duration
+    """
+    params = {
+        "operating_hours": DEFAULT_OPERATING_HOURS,
+        "energy_price": DEFAULT_ENERGY_PRICE,
+        "lifetime_years": DEFAULT_LIFETIME_YEARS,
+        "interest_rate": DEFAULT_INTEREST_RATE,
+        "conductor_cost": DEFAULT_CONDUCTOR_COST,
+        **params,
+    }
+    started = time.perf_counter()
+    stats = {"project_count": 0, "refreshed_count": 0, "skipped_count": 0, "cable_count": 0}
+
+    last_id = 0
+    while True:
+        chunk = db.execute(
+            select(
+                Project.id,
+                Project.latest_version,
+                ProjectVersion.cable_count,
+                ProjectVersion.updated_at,
+                ProjectVersion.base_version,
+                EnergySummary.input_hash,
+            ).join(
+                ProjectVersion, and_(
+                    ProjectVersion.project_id == Project.id,
+                    ProjectVersion.version == Project.latest_version
+                )
+            ).outerjoin(
+                EnergySummary, EnergySummary.project_id == Project.id
+            ).where(
+                Project.id > last_id
+            ).order_by(Project.id).limit(chunk_size)
+        ).all()
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        stats["project_count"] += len(chunk)
+
+        stale, hashes = {}, {}
+        for project_id, version, cable_count, updated_at, base, stored_hash in chunk:
+            input_hash = _input_hash(version, cable_count, updated_at, params)
+            if force or input_hash != stored_hash:
+                stale[project_id] = (version, base)
+                hashes[project_id] = input_hash
+        stats["skipped_count"] += len(chunk) - len(stale)
+        if not stale:
+            continue
+
+        rows = _chunk_rows(db, stale)
+        index = {project_id: i for i, project_id in enumerate(stale)}
+        codes = np.fromiter((index[row[0]] for row in rows), np.int64, len(rows))
+        results = evaluate_columns(engine.to_columns([row[1:] for row in rows]), **params)
+        totals = _totals(results, codes, len(index))
+
+        now = datetime.utcnow()
+        values = [
+            {
+                "project_id": project_id,
+                "version": stale[project_id][0],
+                "input_hash": hashes[project_id],
+                **{name: column[i].item() for name, column in totals.items()},
+                "refreshed_at": now,
+            }
+            for project_id, i in index.items()
+        ]
+        stmt = pg_insert(EnergySummary).values(values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[EnergySummary.project_id],
+            set_={name: stmt.excluded[name] for name in values[0] if name != "project_id"}
+        ))
+        db.commit()
+        stats["refreshed_count"] += len(stale)
+        stats["cable_count"] += len(rows)
+
+    stats["duration_s"] = time.perf_counter() - started
+    return stats
+
+
+def portfolio_summaries(db: Session, owner_id: int | None = None, limit: int = 100):
+    """Materialized summaries, largest lifetime savings first; owner_id limits to own projects."""
+    stmt = select(EnergySummary, Project.name).join(Project, Project.id == EnergySummary.project_id)
+    if owner_id is not None:
+        stmt = stmt.where(Project.owner_id == owner_id)
+    stmt = stmt.order_by(EnergySummary.lifetime_savings.desc(), EnergySummary.project_id).limit(limit)
+    return [
+        {**{c.name: getattr(summary, c.name) for c in EnergySummary.__table__.c}, "project_name": name}
+        for summary, name in db.execute(stmt)
+    ]
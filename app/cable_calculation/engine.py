@@ -0,0 +1,343 @@
+"""
+Berechnungs-Engine für Kabelberechnungen.
+
+Evaluates voltage drop, loop impedance and the Ib <= In <= Iz protection
+check for all cables of a version at once. The inputs are handled as NumPy
+columns (one array per field), so a version with thousands of cables is
+evaluated in a single vectorized pass. `evaluate_rows` is a plain Python
+implementation of the same math, used as a fallback and as a reference.
+
+Conductor resistances use the resistivity of the conductor material
+(copper or aluminium, from the cable designation via
+tables.parse_cable_type), the same material the ampacity lookup uses.
+"""
+import itertools
+import math
+
+import numpy as np
+
+from app.cable_calculation.tables import get_catalog, parse_cable_type
+
+# Spalten, die für die Berechnung aus cable_calculations geladen werden
+INPUT_COLUMNS = (
+    "id",
+    "cable_type",
+    "cable_length_m",
+    "number_of_cables",
+    "loaded_cores",
+    "cross_section_l",
+    "cross_section_pe",
+    "laying_type",
+    "fuse_rating_a",
+    "nominal_current_a",
+)
+
+# Eingaben für voltage_drops (und impedances)
+VOLTAGE_DROP_COLUMNS = (
+    "id",
+    "cable_type",
+    "cable_length_m",
+    "number_of_cables",
+    "loaded_cores",
+    "cross_section_l",
+    "cross_section_pe",
+    "nominal_current_a",
+)
+
+RESULT_COLUMNS = (
+    "id",
+    "voltage_drop_v",
+    "voltage_drop_pct",
+    "loop_impedance_ohm",
+    "iz_a",
+    "ib_le_in",
+    "in_le_iz",
+    "voltage_drop_ok",
+    "ok",
+)
+
+_DTYPES = {
+    "id": np.int64,
+    "cable_type": object,
+    "cable_length_m": np.float64,
+    "number_of_cables": np.int64,
+    "loaded_cores": np.int64,
+    "cross_section_l": np.float64,
+    "cross_section_pe": np.float64,
+    "laying_type": object,
+    "fuse_rating_a": np.float64,
+    "nominal_current_a": np.float64,
+    "origin": object,
+    "destination": object,
+}
+
+# Defaults (Niederspannungsnetz 400/230 V)
+DEFAULT_VOLTAGE_V = 400.0
+DEFAULT_COS_PHI = 0.9
+DEFAULT_MAX_VOLTAGE_DROP_PCT = 3.0
+DEFAULT_SOURCE_IMPEDANCE_OHM = 0.0
+
+# Spezifischer Widerstand bei 20 °C (Ohm * mm² / m) und Temperaturbeiwert je Leitermaterial
+RESISTIVITY_20 = {"CU": 0.017241, "AL": 0.028264}
+TEMPERATURE_COEFFICIENTS = {"CU": 0.00393, "AL": 0.00403}
+# ... bei 70 °C Betriebstemperatur
+RESISTIVITY = {
+    material: rho * (1 + TEMPERATURE_COEFFICIENTS[material] * 50)
+    for material, rho in RESISTIVITY_20.items()
+}
+# Induktiver Belag eines Niederspannungskabels (Ohm / m)
+REACTANCE_PER_M = 0.08e-3
+
+
+def to_columns(rows, names=INPUT_COLUMNS):
+    """
+    Convert rows (tuples in INPUT_COLUMNS order, or in the order of names)
+    into a dict of NumPy arrays.
+    """
+    values = list(zip(*rows)) or [()] * len(names)
+    return {
+        name: np.asarray(column, dtype=_DTYPES[name])
+        for name, column in zip(names, values)
+    }
+
+
+def resistivity(cable_type: str, table=RESISTIVITY) -> float:
+    """Resistivity of the conductor material of a cable type (RESISTIVITY or RESISTIVITY_20)."""
+    return table[parse_cable_type(cable_type)[0]]
+
+
+def resistivities(cable_types, table=RESISTIVITY):
+    """Resistivity per cable; each distinct cable type is parsed only once."""
+    lookup = {ct: resistivity(ct, table) for ct in dict.fromkeys(cable_types)}
+    return np.fromiter(map(lookup.__getitem__, cable_types), np.float64, len(cable_types))
+
+
+def impedances(columns):
+    """
+    Per-cable conductor data at operating temperature (Ohm).
+
+    Parallel cables (number_of_cables) are combined. Cross-section 0 gives inf.
+
+    Returns:
+        Dict of arrays: resistance_l, resistance_pe (one conductor each) and
+        reactance (one conductor)
+    """
+    length = columns["cable_length_m"]
+    parallel = np.maximum(columns["number_of_cables"], 1)
+    rho = resistivities(columns["cable_type"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "resistance_l": rho * length / (columns["cross_section_l"] * parallel),
+            "resistance_pe": rho * length / (columns["cross_section_pe"] * parallel),
+            "reactance": REACTANCE_PER_M * length / parallel,
+        }
+
+
+def voltage_drops(columns, voltage_v: float = DEFAULT_VOLTAGE_V, cos_phi: float = DEFAULT_COS_PHI):
+    """
+    Voltage drop per cable in V and in % of the nominal voltage.
+
+    Needs only the columns of VOLTAGE_DROP_COLUMNS.
+    """
+    three_phase = columns["loaded_cores"] >= 3
+    sin_phi = math.sqrt(1 - cos_phi ** 2)
+    z = impedances(columns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(three_phase, math.sqrt(3), 2.0)
+        nominal_voltage = np.where(three_phase, voltage_v, voltage_v / math.sqrt(3))
+        drop = factor * columns["nominal_current_a"] * (z["resistance_l"] * cos_phi + z["reactance"] * sin_phi)
+        return drop, 100.0 * drop / nominal_voltage
+
+
+def route_circuits(origin, laying_type, number_of_cables):
+    """
+    Number of circuits sharing each cable's route (same origin and laying type).
+
+    Hash group-by: route keys are encoded to integers through a dict and the
+    cables per key summed with bincount. Every parallel cable counts as a
+    circuit of its own.
+
+    Returns:
+        Float array, one entry per cable
+    """
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(key, len(index)) for key in zip(origin, laying_type)),
+        np.int64, len(origin)
+    )
+    counts = np.maximum(np.asarray(number_of_cables, dtype=np.float64), 1)
+    return np.bincount(codes, weights=counts, minlength=len(index))[codes]
+
+
+def evaluate_columns(
+    columns,
+    voltage_v: float = DEFAULT_VOLTAGE_V,
+    cos_phi: float = DEFAULT_COS_PHI,
+    max_voltage_drop_pct: float = DEFAULT_MAX_VOLTAGE_DROP_PCT,
+    source_impedance_ohm: float = DEFAULT_SOURCE_IMPEDANCE_OHM,
+    ambient_c: float | None = None,
+    circuits=None,
+):
+    """
+    Evaluate all cables in one vectorized pass.
+
+    Three-phase circuits (>= 3 loaded cores) use voltage_v as line voltage,
+    single-phase circuits the phase voltage voltage_v / sqrt(3). Parallel
+    cables (number_of_cables) share the current. Iz comes from the in-memory
+    ampacity catalog (see tables.py), derated for grouping if circuits
+    (e.g. from route_circuits) is given.
+
+    Returns:
+        Dict of NumPy arrays keyed by RESULT_COLUMNS
+    """
+    parallel = np.maximum(columns["number_of_cables"], 1)
+    cores = columns["loaded_cores"]
+    current = columns["nominal_current_a"]
+    fuse = columns["fuse_rating_a"]
+
+    z = impedances(columns)
+    voltage_drop, voltage_drop_pct = voltage_drops(columns, voltage_v, cos_phi)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Schleife L-PE: Hin- und Rückleiter
+        loop_r = z["resistance_l"] + z["resistance_pe"]
+        loop_impedance = source_impedance_ohm + np.hypot(loop_r, 2 * z["reactance"])
+
+    iz = get_catalog().iz(
+        columns["cable_type"], columns["laying_type"], cores, columns["cross_section_l"],
+        ambient_c=ambient_c, circuits=circuits,
+    ) * parallel
+
+    ib_le_in = current <= fuse
+    in_le_iz = fuse <= iz
+    voltage_drop_ok = voltage_drop_pct <= max_voltage_drop_pct
+
+    return {
+        "id": columns["id"],
+        "voltage_drop_v": voltage_drop,
+        "voltage_drop_pct": voltage_drop_pct,
+        "loop_impedance_ohm": loop_impedance,
+        "iz_a": iz,
+        "ib_le_in": ib_le_in,
+        "in_le_iz": in_le_iz,
+        "voltage_drop_ok": voltage_drop_ok,
+        "ok": ib_le_in & in_le_iz & voltage_drop_ok,
+    }
+
+
+def evaluate_rows(
+    rows,
+    voltage_v: float = DEFAULT_VOLTAGE_V,
+    cos_phi: float = DEFAULT_COS_PHI,
+    max_voltage_drop_pct: float = DEFAULT_MAX_VOLTAGE_DROP_PCT,
+    source_impedance_ohm: float = DEFAULT_SOURCE_IMPEDANCE_OHM,
+    ambient_c: float | None = None,
+    circuits=None,
+):
+    """
+    Pure Python fallback of evaluate_columns, one cable at a time.
+
+    Args:
+        rows: Iterable of tuples in INPUT_COLUMNS order
+        circuits: Grouped circuits per row (same order), None for no grouping
+
+    Returns:
+        List of result dicts keyed by RESULT_COLUMNS
+    """
+    sin_phi = math.sqrt(1 - cos_phi ** 2)
+    catalog = get_catalog()
+    rhos = {}
+    results = []
+    if circuits is None:
+        circuits = itertools.repeat(None)
+    for (calc_id, cable_type, length, number_of_cables, cores, section_l,
+         section_pe, laying_type, fuse, current), grouped in zip(rows, circuits):
+        parallel = max(number_of_cables, 1)
+        three_phase = cores >= 3
+        rho = rhos.get(cable_type)
+        if rho is None:
+            rho = rhos[cable_type] = resistivity(cable_type)
+
+        resistance = rho * length / (section_l * parallel) if section_l else math.inf
+        reactance = REACTANCE_PER_M * length / parallel
+
+        factor = math.sqrt(3) if three_phase else 2.0
+        nominal_voltage = voltage_v if three_phase else voltage_v / math.sqrt(3)
+        voltage_drop = factor * current * (resistance * cos_phi + reactance * sin_phi)
+        voltage_drop_pct = 100.0 * voltage_drop / nominal_voltage
+
+        if section_l and section_pe:
+            loop_r = resistance + rho * length / (section_pe * parallel)
+        else:
+            loop_r = math.inf
+        loop_impedance = source_impedance_ohm + math.hypot(loop_r, 2 * reactance)
+
+        iz = catalog.iz_one(
+            cable_type, laying_type, cores, section_l, ambient_c=ambient_c, circuits=grouped
+        ) * parallel
+
+        ib_le_in = current <= fuse
+        in_le_iz = fuse <= iz
+        voltage_drop_ok = voltage_drop_pct <= max_voltage_drop_pct
+
+        results.append({
+            "id": calc_id,
+            "voltage_drop_v": finite_or_none(voltage_drop),
+            "voltage_drop_pct": finite_or_none(voltage_drop_pct),
+            "loop_impedance_ohm": finite_or_none(loop_impedance),
+            "iz_a": finite_or_none(iz),
+            "ib_le_in": ib_le_in,
+            "in_le_iz": in_le_iz,
+            "voltage_drop_ok": voltage_drop_ok,
+            "ok": ib_le_in and in_le_iz and voltage_drop_ok,
+        })
+    return results
+
+
+def finite_or_none(value):
+    """Float or None if it is not finite (row-wise counterpart of to_list)."""
+    return value if math.isfinite(value) else None
+
+
+def to_list(values):
+    """Array to list; non-finite floats (e.g. cross-section 0) become None."""
+    if values.dtype.kind == "f":
+        finite = np.isfinite(values)
+        if not finite.all():
+            values = values.astype(object)
+            values[~finite] = None
+    return values.tolist()
+
+
+def results_to_rows(results):
+    """Convert the column dict of evaluate_columns into a list of row dicts."""
+    names = RESULT_COLUMNS
+    return [
+        dict(zip(names, values))
+        for values in zip(*(to_list(results[name]) for name in names))
+    ]
+
+
+def summarize(columns, results):
+    """Aggregate figures for a whole version."""
+    count = len(columns["id"])
+    total_length = float(np.sum(columns["cable_length_m"] * columns["number_of_cables"]))
+    drops = results["voltage_drop_pct"]
+    drops = drops[np.isfinite(drops)]
+    return {
+        "cable_count": count,
+        "total_length_m": total_length,
+        "max_voltage_drop_pct": float(drops.max()) if len(drops) else None,
+        "failed_count": int(count - np.count_nonzero(results["ok"])),
+    }
+
+
+def summarize_rows(rows, results):
+    """Pure Python counterpart of summarize for evaluate_rows output."""
+    drops = [r["voltage_drop_pct"] for r in results if r["voltage_drop_pct"] is not None]
+    return {
+        "cable_count": len(results),
+        "total_length_m": float(sum(row[2] * row[3] for row in rows)),
+        "max_voltage_drop_pct": max(drops) if drops else None,
+        "failed_count": sum(1 for r in results if not r["ok"]),
+    }
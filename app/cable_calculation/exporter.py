@@ -0,0 +1,73 @@
+"""
+Streaming-Export einer Version (CSV / NDJSON).
+
+Rows are fetched from a server-side cursor (yield_per / stream_results) as
+plain tuples and encoded partition by partition, so memory use does not
+depend on the version size. The CSV output can be re-imported through
+POST /cable_calculation/import.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.cable_calculation import storage
+from app.cable_calculation.functions import READ_COLUMNS, read_columns
+
+# Zeilen pro Cursor-Partition und Ausgabe-Chunk
+PARTITION_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+FIELDS = tuple(column.key for column in READ_COLUMNS)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _version_rows(db: Session, project_id: int, version: int):
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    stmt = select(*read_columns(calcs)).where(
+        *in_version
+    ).order_by(calcs.created_at, storage.lineage_key(calcs))
+    result = db.execute(stmt.execution_options(yield_per=PARTITION_SIZE))
+    return result.partitions()
+
+
+def iter_csv(db: Session, project_id: int, version: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for partition in _version_rows(db, project_id, version):
+        writer.writerows(partition)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Nur Kopfzeile (leere Version)
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(db: Session, project_id: int, version: int) -> Iterator[bytes]:
+    for partition in _version_rows(db, project_id, version):
+        yield "".join(
+            json.dumps(dict(zip(FIELDS, row)), default=_json_default) + "\n"
+            for row in partition
+        ).encode()
+
+
+def iter_export(db: Session, project_id: int, version: int, fmt: str) -> Iterator[bytes]:
+    """Encoded chunks of a version in the given format ("csv" or "ndjson")."""
+    if fmt == "csv":
+        return iter_csv(db, project_id, version)
+    return iter_ndjson(db, project_id, version)
@@ -1,9 +1,85 @@
-from sqlalchemy import func
+from sqlalchemy import and_, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from pydantic import ValidationError
 
-from app.models import CableCalculation, User
-from app.schemas.cable_calculation import CableCalculationCreate
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from app.models import CableCalculation, Project, ProjectVersion, User
+from app.schemas.cable_calculation import CableCalculationCreate, CableCalculationRead
+from app.cable_calculation import engine, optimizer, short_circuit, storage, topology
+from app.cable_calculation.cache import result_cache
+from app.cable_calculation.engine import INPUT_COLUMNS
+
+def read_columns(calcs=CableCalculation):
+    """Columns of CableCalculationRead, on the table or a version source (storage.version_calcs)."""
+    return tuple(getattr(calcs, name) for name in CableCalculationRead.model_fields)
+
+# Spalten von CableCalculationRead, für Abfragen ohne ORM-Objekte
+READ_COLUMNS = read_columns()
+
+def resolve_version(db: Session, project_id: int, new_version: bool) -> int:
+    """
+    Version number for new rows.
+
+    Versions are allocated from the projects.latest_version counter with a
+    single UPDATE ... RETURNING, so concurrent new_version=True calls get
+    distinct numbers. The row lock is held until the caller commits or
+    rolls back; a rollback also undoes the increment, so the number is
+    released and handed out again by the next allocation (no gaps).
+
+    new_version=True increments the latest version, otherwise the latest
+    version is used (1 if the project has none yet).
+    """
+    if not new_version:
+        latest_version = db.execute(
+            select(Project.latest_version).where(Project.id == project_id)
+        ).scalar()
+        if latest_version:
+            # Zur neuesten Version hinzufügen, ohne Zeilensperre
+            return latest_version
+
+    if new_version:
+        counter = Project.latest_version + 1
+    else:
+        counter = func.greatest(Project.latest_version, 1)
+    version = db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(latest_version=counter)
+        .returning(Project.latest_version)
+    ).scalar()
+    if version is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Project not found")
+    return version
+
+def track_version(db: Session, project_id: int, version: int, delta: int = 0):
+    """
+    Maintain the project_versions row of a version (no commit).
+
+    One upsert per write: adjusts cable_count by delta and touches updated_at.
+    Writes to a frozen version are rolled back with 409; the upsert waits
+    for the row lock of a concurrent freeze, so no write slips past it.
+    """
+    now = datetime.utcnow()
+    stmt = pg_insert(ProjectVersion).values(
+        project_id=project_id, version=version, cable_count=delta, updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProjectVersion.project_id, ProjectVersion.version],
+        set_={
+            "cable_count": ProjectVersion.cable_count + stmt.excluded.cable_count,
+            "updated_at": now,
+        }
+    ).returning(ProjectVersion.frozen)
+    if db.execute(stmt).scalar():
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Version is frozen")
 
 def create_cable_calculation(
     db: Session,
@@ -18,24 +94,7 @@ def create_cable_calculation(
     Args:
         new_version: If True, creates a new version. If False, adds to latest version.
     """
-    if new_version:
-        # Create a new version by incrementing
-        latest_version = db.query(func.max(CableCalculation.version)).filter_by(
-            project_id=project_id
-        ).scalar() or 0
-        version = latest_version + 1
-    else:
-        # Add to existing (latest) version
-        latest_version = db.query(func.max(CableCalculation.version)).filter_by(
-            project_id=project_id
-        ).scalar()
-        
-        if latest_version is None:
-            # No versions exist yet, create version 1
-            version = 1
-        else:
-            # Add to the latest existing version
-            version = latest_version
+    version = resolve_version(db, project_id, new_version)
 
     db_calc = CableCalculation(
         project_id=project_id,
@@ -44,19 +103,180 @@ def create_cable_calculation(
         **calc.dict()
     )
     db.add(db_calc)
+    track_version(db, project_id, version, 1)
     db.commit()
     db.refresh(db_calc)
     return db_calc
 
+def row_params(project_id: int, version: int, owner_id: int, calcs: List[dict]):
+    """INSERT parameters for validated CableCalculationCreate dicts."""
+    created_at = datetime.utcnow()
+    return [
+        {**calc, "project_id": project_id, "version": version,
+         "owner_id": owner_id, "created_at": created_at}
+        for calc in calcs
+    ]
+
+def _insert_rows(db: Session, project_id: int, version: int, owner_id: int, calcs: List[dict]):
+    """
+    Insert many rows with one multi-row INSERT ... RETURNING (no commit).
+
+    Returns:
+        List of CableCalculationRead-compatible dicts in input order
+    """
+    if not calcs:
+        return []
+    stmt = insert(CableCalculation).returning(
+        *READ_COLUMNS, sort_by_parameter_order=True
+    )
+    params = row_params(project_id, version, owner_id, calcs)
+    return [row._asdict() for row in db.execute(stmt, params)]
+
+def create_cable_calculations_bulk(
+    db: Session,
+    project_id: int,
+    rows: List[dict],
+    owner_id: int,
+    new_version: bool = False,
+    atomic: bool = False
+):
+    """
+    Create many cable calculations in one transaction.
+
+    Every row is validated against CableCalculationCreate. Invalid rows are
+    reported by index and skipped; with atomic=True any invalid row aborts
+    the whole batch. The version is resolved once for all rows.
+
+    Returns:
+        Dict with version, created rows and row errors
+    """
+    calcs, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            calcs.append(CableCalculationCreate.model_validate(row).dict())
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": error_details(exc)})
+
+    if errors and atomic:
+        raise HTTPException(status_code=422, detail=errors)
+    if not calcs:
+        return {"version": None, "created": [], "errors": errors}
+
+    version = resolve_version(db, project_id, new_version)
+    created = _insert_rows(db, project_id, version, owner_id, calcs)
+    track_version(db, project_id, version, len(created))
+    db.commit()
+    return {"version": version, "created": created, "errors": errors}
+
+def error_details(exc: ValidationError):
+    """JSON-safe subset of pydantic's error list."""
+    return [
+        {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+        for error in exc.errors()
+    ]
+
+def clone_version(
+    db: Session,
+    project_id: int,
+    owner_id: int,
+    source_version: int | None = None,
+    overrides: dict | None = None,
+    delta: bool = False
+):
+    """
+    Create version N+1 as a copy of an existing version.
+
+    All rows are copied with a single INSERT ... SELECT; overrides are
+    applied as literals in the same statement. With delta=True nothing is
+    copied: the new version inherits the cables of the (frozen) source
+    version and only stores what is changed later (see storage.py).
+    Overrides change every cable, so they always produce a full copy; so
+    does a source whose delta chain is already storage.MAX_DELTA_DEPTH deep.
+
+    Args:
+        source_version: Version to copy, defaults to the latest version
+        overrides: Field values to set on every copied row
+        delta: Store the new version as a delta against the source
+
+    Returns:
+        Dict with source version, new version, number of cables and stored rows
+    """
+    overrides = overrides or {}
+    delta = delta and not overrides
+    version = resolve_version(db, project_id, new_version=True)
+    source_version = source_version or version - 1
+
+    if delta:
+        source = db.execute(
+            select(ProjectVersion.cable_count, ProjectVersion.frozen).where(
+                ProjectVersion.project_id == project_id,
+                ProjectVersion.version == source_version
+            )
+        ).first()
+        if source is None or not source.cable_count:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Version not found")
+        if not source.frozen:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Delta versions need a frozen source version")
+        # Eingefrorene Deltas werden nie kompaktiert: Kettenlänge hier begrenzen
+        delta = len(storage.version_chain(db, project_id, source_version)) <= storage.MAX_DELTA_DEPTH
+
+    if delta:
+        track_version(db, project_id, version, source.cable_count)
+        db.execute(
+            update(ProjectVersion).where(
+                ProjectVersion.project_id == project_id,
+                ProjectVersion.version == version
+            ).values(base_version=source_version)
+        )
+        db.commit()
+        return {
+            "project_id": project_id,
+            "source_version": source_version,
+            "version": version,
+            "cable_count": source.cable_count,
+            "stored_count": 0,
+        }
+
+    calcs, in_version = storage.version_calcs(db, project_id, source_version)
+    fields = list(CableCalculationCreate.model_fields)
+    values = [
+        literal(overrides[name], type_=getattr(CableCalculation, name).type).label(name)
+        if name in overrides else getattr(calcs, name)
+        for name in fields
+    ]
+    source = select(
+        literal(project_id), literal(version), literal(owner_id),
+        literal(datetime.utcnow(), type_=CableCalculation.created_at.type),
+        *values
+    ).where(*in_version).order_by(calcs.created_at, storage.lineage_key(calcs))
+
+    stmt = insert(CableCalculation).from_select(
+        ["project_id", "version", "owner_id", "created_at", *fields], source
+    )
+    copied = db.execute(stmt).rowcount
+    if not copied:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Version not found")
+    track_version(db, project_id, version, copied)
+    db.commit()
+
+    return {
+        "project_id": project_id,
+        "source_version": source_version,
+        "version": version,
+        "cable_count": copied,
+        "stored_count": copied,
+    }
+
 def get_cable_calculation(db: Session, project_id: int, version: int):
     """
     DEPRECATED: Use get_cable_calculations_by_version instead.
     Returns a single calculation for backwards compatibility.
     """
-    calc = db.query(CableCalculation).filter(
-        CableCalculation.project_id == project_id,
-        CableCalculation.version == version
-    ).first()
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    calc = db.query(calcs).filter(*in_version).first()
     return calc
 
 def get_cable_calculations_by_version(db: Session, project_id: int, version: int):
@@ -64,39 +284,441 @@ def get_cable_calculations_by_version(db: Session, project_id: int, version: int
     Get ALL cable calculations for a specific project and version.
     
     Returns:
-        List of CableCalculation objects
+        List of CableCalculationRead-compatible dicts
     """
-    calcs = db.query(CableCalculation).filter(
-        CableCalculation.project_id == project_id,
-        CableCalculation.version == version
-    ).order_by(CableCalculation.created_at).all()
-    
-    return calcs
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    rows = db.execute(
+        select(*read_columns(calcs)).where(*in_version)
+        .order_by(calcs.created_at, storage.lineage_key(calcs))
+    ).all()
+    return [row._asdict() for row in rows]
+
+def get_version_rows(db: Session, project_id: int, version: int):
+    """
+    Load the engine input columns of a version as plain tuples.
+
+    Skips the ORM entities; the rows are in INPUT_COLUMNS order and can be
+    passed to the engine directly.
+    """
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    columns = [getattr(calcs, name) for name in INPUT_COLUMNS]
+    stmt = select(*columns).where(*in_version).order_by(calcs.created_at, storage.lineage_key(calcs))
+    return db.execute(stmt).all()
+
+def _route_columns(calcs=CableCalculation):
+    # Trassenschlüssel (origin, laying_type) und Anzahl Stromkreise für die Häufung
+    return (calcs.origin, calcs.laying_type, calcs.number_of_cables)
+
+def _grouped_hash(input_hash: str, circuits: float | None):
+    return input_hash if circuits is None else f"{input_hash}/{circuits:g}"
+
+def _input_hash(calcs=CableCalculation):
+    """md5 over all engine input fields of a row, computed in the database."""
+    fields = [getattr(calcs, name) for name in INPUT_COLUMNS[1:]]
+    return func.md5(func.concat_ws("|", *fields)).label("input_hash")
+
+def evaluate_version(
+    db: Session,
+    project_id: int,
+    version: int,
+    mode: str = "numpy",
+    grouping: bool = False,
+    **params
+):
+    """
+    Evaluate all cables of a version.
+
+    The vectorized engine goes through the result cache: only rows whose
+    input hash changed since the last read are recomputed.
+
+    Args:
+        mode: "numpy" for the vectorized engine, "python" for the row-by-row fallback
+        grouping: Derate Iz for the circuits sharing each cable's route
+        params: Engine parameters (voltage_v, cos_phi, ...)
+
+    Returns:
+        Dict with summary and per-cable results
+    """
+    if mode == "python":
+        rows = get_version_rows(db, project_id, version)
+        circuits = None
+        if grouping:
+            calcs, in_version = storage.version_calcs(db, project_id, version)
+            routes = db.execute(
+                select(*_route_columns(calcs)).where(*in_version)
+                .order_by(calcs.created_at, storage.lineage_key(calcs))
+            ).all()
+            circuits = engine.route_circuits(*zip(*routes)).tolist() if routes else []
+        results = engine.evaluate_rows(rows, circuits=circuits, **params)
+        summary = engine.summarize_rows(rows, results)
+    else:
+        summary, results = _evaluate_cached(db, project_id, version, grouping, params)
+
+    return {
+        "project_id": project_id,
+        "version": version,
+        "summary": summary,
+        "results": results,
+    }
+
+def _evaluate_cached(db: Session, project_id: int, version: int, grouping: bool, params: dict):
+    entry = result_cache.get(
+        project_id, version, (*sorted(params.items()), ("grouping", grouping))
+    )
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    current = db.execute(
+        select(calcs.id, _input_hash(calcs), *(_route_columns(calcs) if grouping else ()))
+        .where(*in_version)
+        .order_by(calcs.created_at, storage.lineage_key(calcs))
+    ).all()
+
+    # Gehäufte Verlegung: Stromkreise je Trasse gehören zum Zeilen-Hash
+    circuits = {}
+    if grouping and current:
+        ids, _hashes, *routes = zip(*current)
+        circuits = dict(zip(ids, engine.route_circuits(*routes).tolist()))
+    state = {calc_id: _grouped_hash(input_hash, circuits.get(calc_id))
+             for calc_id, input_hash, *_route in current}
+
+    with entry.lock:
+        changed, removed = entry.dirty(state)
+        for calc_id in removed:
+            entry.remove(calc_id)
+
+        if changed:
+            columns = [getattr(calcs, name) for name in INPUT_COLUMNS]
+            stmt = select(_input_hash(calcs), *columns)
+            # Viele geänderte Zeilen: ganze Version laden statt langer IN-Liste
+            if len(changed) * 2 > len(current):
+                stmt = stmt.where(*in_version)
+            else:
+                stmt = stmt.where(*in_version, calcs.id.in_(changed))
+            rows = db.execute(stmt).all()
+
+            inputs = engine.to_columns([row[1:] for row in rows])
+            grouped = None
+            if grouping:
+                # Erst nach der Hash-Abfrage eingefügte Zeilen: Trasse für sich allein
+                grouped = np.fromiter(
+                    (circuits.get(row[1], max(row[4], 1)) for row in rows), np.float64, len(rows)
+                )
+            hashes = [
+                _grouped_hash(row[0], circuits.get(row[1]) if grouping else None)
+                for row in rows
+            ]
+            results = engine.results_to_rows(
+                engine.evaluate_columns(inputs, circuits=grouped, **params)
+            )
+            lengths = (inputs["cable_length_m"] * inputs["number_of_cables"]).tolist()
+            for input_hash, length, result in zip(hashes, lengths, results):
+                entry.put(result["id"], input_hash, length, result)
+
+        entry.set_order(row[0] for row in current)
+        return entry.summary(), entry.rows()
+
+def optimize_cable_calculation(calc: CableCalculationCreate, **params):
+    """Cross-section suggestion for a single (unsaved) cable."""
+    row = calc.dict()
+    columns = engine.to_columns([(0, *(row[name] for name in INPUT_COLUMNS[1:]))])
+    suggestions, _edits = optimizer.suggestions_to_rows(
+        columns, optimizer.optimize_columns(columns, **params)
+    )
+    return {**suggestions[0], "id": None}
+
+def optimize_version(db: Session, project_id: int, version: int, **params):
+    """
+    Cross-section suggestions for all cables of a version.
+
+    Returns:
+        Dict with per-cable suggestions and the edits for the changed cables
+    """
+    columns = engine.to_columns(get_version_rows(db, project_id, version))
+    suggestions, edits = optimizer.suggestions_to_rows(
+        columns, optimizer.optimize(columns, **params)
+    )
+    return {
+        "project_id": project_id,
+        "version": version,
+        "changed_count": len(edits),
+        "infeasible_count": sum(1 for s in suggestions if s["suggested_cross_section_l"] is None),
+        "suggestions": suggestions,
+        "edits": edits,
+    }
+
+def short_circuit_version(
+    db: Session,
+    project_id: int,
+    version: int,
+    mode: str = "numpy",
+    **params
+):
+    """
+    Fault currents, disconnection and PE checks for all cables of a version.
+
+    Args:
+        mode: "numpy" for the vectorized check, "python" for the row-by-row fallback
+        params: voltage_v, source_impedance_ohm
+
+    Returns:
+        Dict with summary and per-cable results
+    """
+    rows = get_version_rows(db, project_id, version)
+    if mode == "python":
+        results = short_circuit.evaluate_rows(rows, **params)
+        summary = short_circuit.summarize_rows(results)
+    else:
+        checked = short_circuit.evaluate_columns(engine.to_columns(rows), **params)
+        results = short_circuit.results_to_rows(checked)
+        summary = short_circuit.summarize(checked)
+
+    return {
+        "project_id": project_id,
+        "version": version,
+        "summary": summary,
+        "results": results,
+    }
+
+def analyze_topology(
+    db: Session,
+    project_id: int,
+    version: int,
+    root: str | None = None,
+    max_total_drop_pct: float = topology.DEFAULT_MAX_TOTAL_DROP_PCT,
+    problems_only: bool = False,
+    voltage_v: float = engine.DEFAULT_VOLTAGE_V,
+    cos_phi: float = engine.DEFAULT_COS_PHI,
+):
+    """
+    Distribution tree of a version with the cumulative voltage drop per node.
+
+    Args:
+        root: Supply node name; default: the root feeding the most nodes
+        max_total_drop_pct: Permitted drop from the supply to a node
+        problems_only: List only failed, cycle and orphan nodes
+        voltage_v, cos_phi: For the per-cable voltage drop
+
+    Returns:
+        Dict with per-node results plus roots, cycles and orphans
+    """
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    names = ("origin", "destination", *engine.VOLTAGE_DROP_COLUMNS)
+    # Core-Ausführung ohne ORM-Zeilenverarbeitung, nur die Spalten für den Spannungsfall
+    rows = db.connection().execute(
+        select(*(getattr(calcs, name) for name in names)).where(*in_version)
+        .order_by(calcs.created_at, storage.lineage_key(calcs))
+    ).all()
+    inputs = engine.to_columns(rows, names)
+    _drop_v, drops = engine.voltage_drops(inputs, voltage_v, cos_phi)
+
+    graph = topology.analyze(
+        inputs["origin"].tolist(), inputs["destination"].tolist(), inputs["id"].tolist(),
+        drops.tolist(), root=root
+    )
+    if root is not None and graph["supply"] is None:
+        raise HTTPException(status_code=404, detail="Root node not found")
+
+    cumulative = graph["cumulative_drop_pct"]
+    ok = [c <= max_total_drop_pct if c is not None else None for c in cumulative]
+    fields = ("name", "cumulative_drop_pct", "feeder_id", "depth", "root",
+              "consumer", "cycle", "orphan", "ok")
+    values = zip(graph["names"], cumulative, graph["feeder_id"], graph["depth"],
+                 graph["root"], graph["consumer"], graph["cycle"], graph["orphan"], ok)
+    if problems_only:
+        values = (v for v in values if v[8] is False or v[6] or v[7])
+    nodes = [dict(zip(fields, v)) for v in values]
+
+    finite = [c for c in cumulative if c is not None]
+    return {
+        "project_id": project_id,
+        "version": version,
+        "supply": graph["supply"],
+        "node_count": len(cumulative),
+        "cable_count": len(rows),
+        "max_cumulative_drop_pct": max(finite) if finite else None,
+        "failed_count": ok.count(False),
+        "roots": graph["roots"],
+        "cycles": [n for n, c in zip(graph["names"], graph["cycle"]) if c],
+        "orphans": [n for n, o in zip(graph["names"], graph["orphan"]) if o],
+        "nodes": nodes,
+    }
+
+# Stabiler Schlüssel eines Kabels über Versionen hinweg
+DIFF_KEY = ("origin", "destination", "cable_type")
+
+def _numbered_version(db: Session, project_id: int, version: int, name: str):
+    """
+    Rows of a version plus their ordinal within the stable key, so that
+    cables sharing a key (e.g. parallel runs) are matched 1:1.
+    """
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    key = [getattr(calcs, field) for field in DIFF_KEY]
+    ordinal = func.row_number().over(
+        partition_by=key,
+        order_by=(calcs.created_at, calcs.id)
+    ).label("ordinal")
+    return select(*read_columns(calcs), ordinal).where(*in_version).subquery(name)
+
+def diff_versions(db: Session, project_id: int, from_version: int, to_version: int):
+    """
+    Compare two versions of a project.
+
+    Both versions are hash-joined on (origin, destination, cable_type) in the
+    database (FULL OUTER JOIN); unchanged pairs are filtered there as well.
+    The remaining rows are streamed once, no ORM objects are built.
+
+    Returns:
+        Dict with added, removed and changed cables (per-field deltas)
+    """
+    old = _numbered_version(db, project_id, from_version, "old")
+    new = _numbered_version(db, project_id, to_version, "new")
+    compared = [f for f in CableCalculationCreate.model_fields if f not in DIFF_KEY]
+
+    join_on = [old.c[f] == new.c[f] for f in (*DIFF_KEY, "ordinal")]
+    stmt = select(
+        *[old.c[name].label(f"old_{name}") for name in CableCalculationRead.model_fields],
+        *[new.c[name].label(f"new_{name}") for name in CableCalculationRead.model_fields],
+    ).select_from(
+        old.join(new, and_(*join_on), full=True)
+    ).where(or_(
+        old.c.id.is_(None),
+        new.c.id.is_(None),
+        *[old.c[f].is_distinct_from(new.c[f]) for f in compared]
+    ))
+
+    added, removed, changed = [], [], []
+    fields = list(CableCalculationRead.model_fields)
+    for row in db.execute(stmt.execution_options(yield_per=1000)):
+        values = row._mapping
+        if values["old_id"] is None:
+            added.append({f: values[f"new_{f}"] for f in fields})
+        elif values["new_id"] is None:
+            removed.append({f: values[f"old_{f}"] for f in fields})
+        else:
+            changes = {}
+            for f in compared:
+                old_value, new_value = values[f"old_{f}"], values[f"new_{f}"]
+                if old_value != new_value:
+                    delta = new_value - old_value if isinstance(old_value, (int, float)) else None
+                    changes[f] = {"old": old_value, "new": new_value, "delta": delta}
+            changed.append({
+                **{f: values[f"new_{f}"] for f in DIFF_KEY},
+                "from_id": values["old_id"],
+                "to_id": values["new_id"],
+                "changes": changes,
+            })
+
+    from_count = db.execute(
+        select(func.count()).select_from(old)
+    ).scalar()
+
+    return {
+        "project_id": project_id,
+        "from_version": from_version,
+        "to_version": to_version,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged_count": from_count - len(removed) - len(changed),
+    }
 
 def get_all_versions(db: Session, project_id: int):
-    """Get all unique version numbers for a project."""
-    versions = db.query(CableCalculation.version).filter(
-        CableCalculation.project_id == project_id
-    ).distinct().order_by(CableCalculation.version.desc()).all()
+    """Get all version numbers (with cables) for a project."""
+    versions = db.query(ProjectVersion.version).filter(
+        ProjectVersion.project_id == project_id,
+        ProjectVersion.cable_count > 0
+    ).order_by(ProjectVersion.version.desc()).all()
     
     return versions
 
-def update_cable_calculation(db: Session, calc_id: int, calc: CableCalculationCreate):
-    """Update a specific cable calculation."""
+def _writable_calc(db: Session, calc_id: int, version: int | None):
+    """
+    Row to modify for a cable; with version, a cable inherited by a delta
+    version is copied into it first. None if the cable does not exist.
+    """
     db_calc = db.query(CableCalculation).filter(CableCalculation.id == calc_id).first()
+    if not db_calc or db_calc.tombstone:
+        return None
+    if version is not None and version != db_calc.version:
+        mapping = storage.inherit(db, db_calc.project_id, version, [calc_id])
+        db_calc = db.get(CableCalculation, mapping[calc_id])
+    return db_calc
+
+def update_cable_calculation(
+    db: Session,
+    calc_id: int,
+    calc: CableCalculationCreate,
+    version: int | None = None
+):
+    """
+    Update a specific cable calculation.
+
+    Args:
+        version: Version the cable is edited in (for cables inherited by a delta version)
+    """
+    db_calc = _writable_calc(db, calc_id, version)
     if not db_calc:
         return None
     
     for key, value in calc.dict().items():
         setattr(db_calc, key, value)
     
+    track_version(db, db_calc.project_id, db_calc.version)
     db.commit()
     db.refresh(db_calc)
     return db_calc
 
-def delete_cable_calculation(db: Session, calc_id: int, current_user):
-    """Delete a specific cable calculation."""
-    db_calc = db.query(CableCalculation).filter(CableCalculation.id == calc_id).first()
+def update_cable_calculations_bulk(
+    db: Session,
+    project_id: int,
+    edits: List[dict],
+    version: int | None = None
+):
+    """
+    Apply partial edits (id + changed fields) in one transaction.
+
+    Uses the ORM bulk UPDATE by primary key, i.e. one executemany per set
+    of changed fields. All ids must belong to the project.
+
+    Args:
+        version: Version the cables are edited in; cables inherited by a
+            delta version are copied into it first (one INSERT ... SELECT)
+
+    Returns:
+        Dict with the number of updated rows
+    """
+    if version is not None:
+        mapping = storage.inherit(db, project_id, version, {edit["id"] for edit in edits})
+        edits = [{**edit, "id": mapping[edit["id"]]} for edit in edits]
+
+    ids = {edit["id"] for edit in edits}
+    found = db.execute(
+        select(CableCalculation.id, CableCalculation.version).where(
+            CableCalculation.project_id == project_id,
+            CableCalculation.id.in_(ids)
+        )
+    ).all()
+    missing = ids - {calc_id for calc_id, _ in found}
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail={"msg": "Calculation not found", "ids": sorted(missing)}
+        )
+
+    if edits:
+        db.execute(update(CableCalculation), edits)
+    for touched_version in {calc_version for _, calc_version in found}:
+        track_version(db, project_id, touched_version)
+    db.commit()
+    return {"updated": len(edits)}
+
+def delete_cable_calculation(db: Session, calc_id: int, current_user, version: int | None = None):
+    """
+    Delete a specific cable calculation.
+
+    In a delta version, a row that overrides an inherited cable becomes a
+    tombstone; deleting it would bring the inherited cable back.
+    """
+    db_calc = _writable_calc(db, calc_id, version)
     if not db_calc:
         return False
     
@@ -104,6 +726,10 @@ def delete_cable_calculation(db: Session, calc_id: int, current_user):
     # if db_calc.owner_id != current_user.id and current_user.role != "admin":
     #     return False
     
-    db.delete(db_calc)
+    if db_calc.lineage_id is not None and storage.is_delta(db, db_calc.project_id, db_calc.version):
+        db_calc.tombstone = True
+    else:
+        db.delete(db_calc)
+    track_version(db, db_calc.project_id, db_calc.version, -1)
     db.commit()
     return True
@@ -0,0 +1,199 @@
+"""
+Streaming-Import von Kabellisten (CSV / NDJSON).
+
+The upload is read line by line, every record is validated against
+CableCalculationCreate and valid rows are written in fixed-size batches
+(executemany) inside one transaction. Only one batch is held in memory,
+regardless of the file size.
+
+The route takes a multipart UploadFile, which Starlette has already
+received completely into a SpooledTemporaryFile (in memory up to 1 MB,
+on disk above). So parsing starts only after the upload has finished;
+the streaming here bounds memory, not time to first row.
+"""
+import csv
+import io
+import json
+from itertools import chain
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models import CableCalculation
+from app.schemas.cable_calculation import CableCalculationCreate
+from app.cable_calculation.functions import (
+    error_details,
+    resolve_version,
+    row_params,
+    track_version,
+)
+
+DEFAULT_BATCH_SIZE = 1000
+# Fehlerbericht begrenzen, weitere Fehler werden nur gezählt
+MAX_REPORTED_ERRORS = 1000
+
+# Dateikodierung -> Python-Codec (utf-8 mit optionalem BOM)
+ENCODINGS = {"utf-8": "utf-8-sig", "cp1252": "cp1252", "latin-1": "latin-1"}
+
+_NUMERIC_FIELDS = tuple(
+    name for name, field in CableCalculationCreate.model_fields.items()
+    if field.annotation in (int, float)
+)
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    """File format from extension or content type."""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def iter_csv(stream: BinaryIO, encoding: str = "utf-8") -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (line, record, error) from a CSV stream.
+
+    The delimiter (`,` `;` or tab) is sniffed from the header line. With `;`
+    decimal commas in numeric fields are accepted (German spreadsheets).
+    """
+    text = io.TextIOWrapper(stream, encoding=ENCODINGS[encoding], newline="")
+    header = text.readline()
+    if not header:
+        return
+    try:
+        delimiter = csv.Sniffer().sniff(header, delimiters=",;\t").delimiter
+    except csv.Error:
+        delimiter = ","
+
+    reader = csv.DictReader(chain([header], text), delimiter=delimiter)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, None, "Too many fields"
+            continue
+        if delimiter == ";":
+            for name in _NUMERIC_FIELDS:
+                value = record.get(name)
+                if value:
+                    record[name] = value.replace(",", ".")
+        yield reader.line_num, record, None
+
+
+def iter_ndjson(stream: BinaryIO, encoding: str = "utf-8") -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line, record, error) from a newline-delimited JSON stream."""
+    text = io.TextIOWrapper(stream, encoding=ENCODINGS[encoding])
+    for line_num, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line), None
+        except json.JSONDecodeError as exc:
+            yield line_num, None, f"Invalid JSON: {exc.msg}"
+
+
+def import_cable_calculations(
+    db: Session,
+    project_id: int,
+    stream: BinaryIO,
+    fmt: str,
+    owner_id: int,
+    new_version: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    atomic: bool = False,
+    encoding: str = "utf-8"
+):
+    """
+    Import a cable schedule in batches.
+
+    Args:
+        stream: Binary file object (e.g. the spooled UploadFile.file)
+        fmt: "csv" or "ndjson"
+        atomic: Roll back everything if any row is invalid
+        encoding: File encoding, a key of ENCODINGS
+
+    Returns:
+        Dict with version, counters, per-chunk progress and row errors
+    """
+    records = iter_csv(stream, encoding) if fmt == "csv" else iter_ndjson(stream, encoding)
+
+    version = None
+    rows_read = inserted = error_count = 0
+    chunks, errors, batch = [], [], []
+    chunk_rows = chunk_errors = 0
+
+    def flush():
+        nonlocal version, inserted, chunk_rows, chunk_errors
+        if batch:
+            if version is None:
+                version = resolve_version(db, project_id, new_version)
+            db.execute(
+                insert(CableCalculation),
+                row_params(project_id, version, owner_id, batch)
+            )
+            inserted += len(batch)
+        chunks.append({
+            "chunk": len(chunks) + 1,
+            "rows": chunk_rows,
+            "inserted": len(batch),
+            "errors": chunk_errors,
+        })
+        batch.clear()
+        chunk_rows = chunk_errors = 0
+
+    line = 0
+    try:
+        for index, (line, record, error) in enumerate(records):
+            rows_read += 1
+            chunk_rows += 1
+            details = None
+            if error:
+                details = [{"loc": [], "msg": error, "type": "parse_error"}]
+            else:
+                try:
+                    batch.append(CableCalculationCreate.model_validate(record).dict())
+                except ValidationError as exc:
+                    details = error_details(exc)
+
+            if details:
+                error_count += 1
+                chunk_errors += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"index": index, "line": line, "errors": details})
+
+            if chunk_rows == batch_size:
+                flush()
+    except UnicodeDecodeError as exc:
+        # Bereits geschriebene Batches verwerfen
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is not valid {encoding} after line {line}: {exc.reason}"
+        )
+
+    if chunk_rows:
+        flush()
+
+    report = {
+        "version": version,
+        "rows_read": rows_read,
+        "inserted": inserted,
+        "error_count": error_count,
+        "chunks": chunks,
+        "errors": errors,
+    }
+    if error_count and atomic:
+        db.rollback()
+        raise HTTPException(status_code=422, detail={**report, "version": None, "inserted": 0})
+
+    if inserted:
+        track_version(db, project_id, version, inserted)
+    db.commit()
+    return report
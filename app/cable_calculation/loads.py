@@ -0,0 +1,210 @@
+"""
+Lastaufstellung je Verteiler (origin) mit Gleichzeitigkeitsfaktoren.
+
+The cables of a version are aggregated per (origin, destination) in one
+SQL GROUP BY. The resulting edges are folded bottom-up in reverse Kahn
+order, so every board is computed once from its outgoing circuits:
+
+- connected_load_a: sum of nominal_current_a of all consumers below,
+- demand_a: diversity factor * (consumer currents + demand of the
+  sub-boards fed from it).
+
+A board is every node with outgoing cables; the cables feeding it are
+the feeder whose fuse must carry the demand. The diversity factor is
+taken per board from the overrides, else the fixed default, else from
+the number of outgoing circuits (IEC 61439-1, Table 101). Boards on or
+behind a cycle, and everything fed from them, have no demand (None).
+
+Results are cached per version in load_cache and reused until the
+version changes (project_versions.cable_count / updated_at).
+"""
+from collections import deque
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import ProjectVersion
+from app.cable_calculation import storage
+from app.cable_calculation.cache import load_cache
+
+# Bemessungsbelastungsfaktor nach Anzahl Hauptstromkreise: (ab Anzahl, Faktor)
+DIVERSITY_BY_CIRCUITS = ((10, 0.6), (6, 0.7), (4, 0.8), (2, 0.9), (1, 1.0))
+
+
+def diversity_factor(circuits: int) -> float:
+    for minimum, factor in DIVERSITY_BY_CIRCUITS:
+        if circuits >= minimum:
+            return factor
+    return 1.0
+
+
+def rollup(edges, factors=None, default_factor: float | None = None):
+    """
+    Fold the aggregated edges bottom-up.
+
+    Args:
+        edges: Tuples (origin, destination, current_a, cable_count, fuse_a),
+            one per (origin, destination)
+        factors: Diversity factor per board name (overrides)
+        default_factor: Factor for all other boards; None: by circuit count
+
+    Returns:
+        List of board dicts, top-down (feeding boards first)
+    """
+    factors = factors or {}
+    index = {}
+    src = [index.setdefault(edge[0], len(index)) for edge in edges]
+    dst = [index.setdefault(edge[1], len(index)) for edge in edges]
+    names = list(index)
+    node_count = len(names)
+
+    outgoing = [[] for _ in range(node_count)]
+    incoming = [[] for _ in range(node_count)]
+    for e, (s, d) in enumerate(zip(src, dst)):
+        outgoing[s].append(e)
+        incoming[d].append(e)
+
+    # Kahn: Reihenfolge von den Wurzeln abwärts
+    remaining = [len(edges_in) for edges_in in incoming]
+    queue = deque(n for n in range(node_count) if not remaining[n])
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for e in outgoing[node]:
+            target = dst[e]
+            remaining[target] -= 1
+            if not remaining[target]:
+                queue.append(target)
+
+    def factor_of(name, circuits):
+        factor = factors.get(name, default_factor)
+        return diversity_factor(circuits) if factor is None else factor
+
+    connected = [None] * node_count
+    demand = [None] * node_count
+    settled = [False] * node_count
+    for node in order:
+        settled[node] = True
+
+    boards = {}
+    for node in reversed(order):
+        if not outgoing[node]:
+            continue
+        circuits = 0
+        connected_sum = load = 0.0
+        for e in outgoing[node]:
+            target = dst[e]
+            circuits += edges[e][3]
+            if not outgoing[target]:
+                connected_sum += edges[e][2]
+                load += edges[e][2]
+            elif settled[target] and demand[target] is not None:
+                connected_sum += connected[target]
+                load += demand[target]
+            else:
+                # Unterverteiler in einem Zyklus: Last unbekannt
+                connected_sum = load = None
+                break
+
+        name = names[node]
+        factor = factor_of(name, circuits)
+        if load is not None:
+            connected[node] = connected_sum
+            demand[node] = factor * load
+
+        feeders = incoming[node]
+        feeder_current = sum(edges[e][2] for e in feeders) if feeders else None
+        feeder_fuse = sum(edges[e][4] for e in feeders) if feeders else None
+        boards[node] = {
+            "name": name,
+            "circuit_count": circuits,
+            "connected_load_a": connected[node],
+            "diversity_factor": factor,
+            "demand_a": demand[node],
+            "feeder_current_a": feeder_current,
+            "feeder_fuse_a": feeder_fuse,
+            "ok": (demand[node] <= feeder_fuse
+                   if demand[node] is not None and feeder_fuse is not None else None),
+            "root": not feeders,
+        }
+
+    # Zyklus-Knoten mit Abgängen ebenfalls ausweisen (ohne Last)
+    for node in range(node_count):
+        if outgoing[node] and not settled[node]:
+            circuits = sum(edges[e][3] for e in outgoing[node])
+            boards[node] = {
+                "name": names[node],
+                "circuit_count": circuits,
+                "connected_load_a": None,
+                "diversity_factor": factor_of(names[node], circuits),
+                "demand_a": None,
+                "feeder_current_a": sum(edges[e][2] for e in incoming[node]),
+                "feeder_fuse_a": sum(edges[e][4] for e in incoming[node]),
+                "ok": None,
+                "root": False,
+            }
+
+    top_down = [n for n in order if n in boards]
+    top_down += [n for n in range(node_count) if n in boards and not settled[n]]
+    return [boards[n] for n in top_down]
+
+
+def _edges_statement(calcs, in_version):
+    return select(
+        calcs.origin,
+        calcs.destination,
+        func.sum(calcs.nominal_current_a),
+        func.count(),
+        func.sum(calcs.fuse_rating_a),
+    ).where(
+        *in_version
+    ).group_by(
+        calcs.origin, calcs.destination
+    ).order_by(
+        func.min(calcs.id)
+    )
+
+
+def version_loads(
+    db: Session,
+    project_id: int,
+    version: int,
+    factors: dict | None = None,
+    default_factor: float | None = None,
+):
+    """
+    Load rollup of a version, per board.
+
+    Returns:
+        Dict with the boards (top-down) and the total demand at the roots
+    """
+    factors = factors or {}
+    tracked = db.execute(
+        select(ProjectVersion.cable_count, ProjectVersion.updated_at).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        )
+    ).first()
+    stamp = (tuple(tracked), tuple(sorted(factors.items())), default_factor) if tracked else None
+    if stamp:
+        cached = load_cache.get(project_id, version, stamp)
+        if cached is not None:
+            return cached
+
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    edges = [tuple(row) for row in db.execute(_edges_statement(calcs, in_version))]
+    boards = rollup(edges, factors, default_factor)
+    roots = [b for b in boards if b["root"]]
+    loads = {
+        "project_id": project_id,
+        "version": version,
+        "board_count": len(boards),
+        "total_demand_a": (sum(b["demand_a"] for b in roots)
+                           if all(b["demand_a"] is not None for b in roots) else None),
+        "failed_count": sum(1 for b in boards if b["ok"] is False),
+        "boards": boards,
+    }
+    if stamp:
+        load_cache.put(project_id, version, stamp, loads)
+    return loads
@@ -0,0 +1,254 @@
+"""
+Querschnittsoptimierung.
+
+Finds the smallest standard cross-section per cable that satisfies the
+voltage-drop limit, In <= Iz (with Ib <= In as a precondition that a
+larger conductor cannot fix) and the disconnection condition of the fuse.
+All searches run over the sorted standard sizes of the ampacity catalog:
+
+- voltage drop: the minimum conductor area is solved analytically and
+  located in the size list with searchsorted,
+- ampacity: a vectorized bisection over base[laying, cores, :], with the
+  derating factor of each cable resolved once,
+- disconnection: a vectorized bisection on the loop impedance L-PE (with
+  the PE size that goes with each line size) against C_MIN * U0 / Ia, as
+  in short_circuit.evaluate_columns.
+
+The suggested sizes are re-checked with engine.evaluate_columns and
+short_circuit.evaluate_columns, so a suggestion always passes the regular
+results and short-circuit endpoints. Large versions are
+split into chunks and spread over a process pool.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.cable_calculation import engine, short_circuit
+from app.cable_calculation.short_circuit import pe_cross_sections
+from app.cable_calculation.tables import get_catalog
+
+# Ab dieser Zeilenzahl wird auf den Prozess-Pool verteilt
+PARALLEL_MIN_ROWS = 200_000
+CHUNK_ROWS = 50_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _bisect_ampacity(laying, cores, factor, required):
+    """
+    Smallest section index with Iz >= required, per cable.
+
+    Returns len(sections) where even the largest size is too small.
+    """
+    base = get_catalog().base
+    lo = np.zeros(len(required), dtype=np.int64)
+    hi = np.full(len(required), base.shape[2], dtype=np.int64)
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        mid_clipped = np.minimum(mid, base.shape[2] - 1)
+        enough = base[laying, cores, mid_clipped] * factor >= required
+        hi = np.where(active & enough, mid, hi)
+        lo = np.where(active & ~enough, mid + 1, lo)
+
+
+def _bisect_loop(rho, length, parallel, max_loop):
+    """
+    Smallest section index whose loop impedance L-PE is <= max_loop, per cable.
+
+    Returns len(sections) where even the largest size is not enough.
+    """
+    sections = get_catalog().sections
+    reactance = 2 * engine.REACTANCE_PER_M * length / parallel
+    lo = np.zeros(len(max_loop), dtype=np.int64)
+    hi = np.full(len(max_loop), len(sections), dtype=np.int64)
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        section = sections[np.minimum(mid, len(sections) - 1)]
+        resistance = rho * length / parallel * (1 / section + 1 / pe_cross_sections(section))
+        enough = np.hypot(resistance, reactance) <= max_loop
+        hi = np.where(active & enough, mid, hi)
+        lo = np.where(active & ~enough, mid + 1, lo)
+
+
+def optimize_columns(
+    columns,
+    voltage_v: float = engine.DEFAULT_VOLTAGE_V,
+    cos_phi: float = engine.DEFAULT_COS_PHI,
+    max_voltage_drop_pct: float = engine.DEFAULT_MAX_VOLTAGE_DROP_PCT,
+    source_impedance_ohm: float = engine.DEFAULT_SOURCE_IMPEDANCE_OHM,
+    ambient_c: float | None = None,
+):
+    """
+    Smallest sufficient cross-section for every cable (vectorized).
+
+    Args:
+        columns: Dict of NumPy arrays keyed by engine.INPUT_COLUMNS
+
+    Returns:
+        Dict of arrays: id, cross_section_l, cross_section_pe (NaN where no
+        size fits), voltage_drop_pct, iz_a and reason (None or a string)
+    """
+    catalog = get_catalog()
+    sections = catalog.sections
+    count = len(sections)
+
+    length = columns["cable_length_m"]
+    parallel = np.maximum(columns["number_of_cables"], 1)
+    cores = columns["loaded_cores"]
+    current = columns["nominal_current_a"]
+    fuse = columns["fuse_rating_a"]
+
+    rho = engine.resistivities(columns["cable_type"])
+
+    three_phase = cores >= 3
+    sin_phi = math.sqrt(1 - cos_phi ** 2)
+    factor = np.where(three_phase, math.sqrt(3), 2.0)
+    nominal_voltage = np.where(three_phase, voltage_v, voltage_v / math.sqrt(3))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Zulässiger Wirkanteil der Impedanz, nach Abzug des induktiven Anteils
+        budget = (max_voltage_drop_pct / 100.0 * nominal_voltage / (factor * current)
+                  - engine.REACTANCE_PER_M * length / parallel * sin_phi)
+        min_area = rho * length * cos_phi / (parallel * budget)
+    min_area = np.where(current <= 0, 0.0, np.where(budget > 0, min_area, np.inf))
+    drop_index = np.searchsorted(sections, min_area, side="left")
+
+    laying, core_idx, derating = catalog.row_factors(
+        columns["cable_type"], columns["laying_type"], cores, ambient_c=ambient_c
+    )
+    known = ~np.isnan(derating)
+    required = np.maximum(fuse, current) / parallel
+    iz_index = _bisect_ampacity(laying, core_idx, np.where(known, derating, 0.0), required)
+
+    # Abschaltbedingung: Schleifenimpedanz <= C_MIN * U0 / Ia
+    ia = short_circuit.disconnect_current(fuse, short_circuit.required_disconnect_time(fuse))
+    max_loop = short_circuit.C_MIN * voltage_v / math.sqrt(3) / ia - source_impedance_ohm
+    loop_index = _bisect_loop(rho, length, parallel, max_loop)
+
+    index = np.maximum.reduce([drop_index, iz_index, loop_index])
+
+    # Kontrolle mit der Engine; Rundung an der Grenze -> eine Stufe größer
+    for attempt in range(3):
+        sized = known & (index < count)
+        suggested = sections[np.minimum(index, count - 1)]
+        suggested_pe = pe_cross_sections(suggested)
+        checked = engine.evaluate_columns(
+            {**columns, "cross_section_l": suggested, "cross_section_pe": suggested_pe},
+            voltage_v=voltage_v,
+            cos_phi=cos_phi,
+            max_voltage_drop_pct=max_voltage_drop_pct,
+            source_impedance_ohm=source_impedance_ohm,
+            ambient_c=ambient_c,
+        )
+        disconnection = short_circuit.evaluate_columns(
+            {**columns, "cross_section_l": suggested, "cross_section_pe": suggested_pe},
+            voltage_v=voltage_v,
+            source_impedance_ohm=source_impedance_ohm,
+        )["disconnection_ok"]
+        fits = sized & checked["voltage_drop_ok"] & checked["in_le_iz"] & disconnection
+        retry = sized & ~fits
+        if attempt == 2 or not retry.any():
+            break
+        index = np.where(retry, index + 1, index)
+
+    reason = np.full(len(index), None, dtype=object)
+    reason[fits & (current > fuse)] = "nominal_current_exceeds_fuse"
+    reason[~fits] = "no_standard_size"
+    reason[~known] = "unknown_laying_type"
+
+    return {
+        "id": columns["id"],
+        "cross_section_l": np.where(fits, suggested, np.nan),
+        "cross_section_pe": np.where(fits, suggested_pe, np.nan),
+        "voltage_drop_pct": np.where(fits, checked["voltage_drop_pct"], np.nan),
+        "iz_a": np.where(fits, checked["iz_a"], np.nan),
+        "reason": reason,
+    }
+
+
+def _optimize_chunk(args):
+    columns, params = args
+    return optimize_columns(columns, **params)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: kein fork() eines Prozesses mit laufenden Threads
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes (app shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def optimize(columns, **params):
+    """
+    optimize_columns, split into chunks on a process pool for large inputs.
+    """
+    rows = len(columns["id"])
+    if rows < PARALLEL_MIN_ROWS:
+        return optimize_columns(columns, **params)
+
+    chunks = [
+        ({name: values[start:start + CHUNK_ROWS] for name, values in columns.items()}, params)
+        for start in range(0, rows, CHUNK_ROWS)
+    ]
+    parts = list(_get_pool().map(_optimize_chunk, chunks))
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def suggestions_to_rows(columns, optimized):
+    """
+    Per-cable suggestions plus the edits for PATCH /cable_calculation/bulk.
+
+    Returns:
+        (suggestions, edits); edits only contain feasible, changed cables
+    """
+    suggested_l = optimized["cross_section_l"]
+    suggested_pe = optimized["cross_section_pe"]
+    changed = ~np.isnan(suggested_l) & (
+        (suggested_l != columns["cross_section_l"])
+        | (suggested_pe != columns["cross_section_pe"])
+    )
+    names = ("id", "cross_section_l", "cross_section_pe",
+             "suggested_cross_section_l", "suggested_cross_section_pe",
+             "voltage_drop_pct", "iz_a", "changed", "reason")
+    values = (
+        columns["id"], columns["cross_section_l"], columns["cross_section_pe"],
+        suggested_l, suggested_pe,
+        optimized["voltage_drop_pct"], optimized["iz_a"], changed, optimized["reason"],
+    )
+    suggestions = [
+        dict(zip(names, row))
+        for row in zip(*(engine.to_list(np.asarray(v)) for v in values))
+    ]
+    edits = [
+        {"id": s["id"],
+         "cross_section_l": s["suggested_cross_section_l"],
+         "cross_section_pe": s["suggested_cross_section_pe"]}
+        for s in suggestions
+        if s["changed"] and s["reason"] is None
+    ]
+    return suggestions, edits
@@ -1,20 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from typing import List
+from typing import Any, Dict, List, Literal
 
-from app.schemas.cable_calculation import CableCalculationCreate, CableCalculationRead
+from app.schemas.cable_calculation import (
+    CableCalculationCreate,
+    CableCalculationRead,
+    CableCalculationBom,
+    CableCalculationBulkResult,
+    CableCalculationBulkUpdateResult,
+    CableCalculationClone,
+    CableCalculationCloneResult,
+    CableCalculationDiff,
+    CableCalculationEnergy,
+    CableCalculationEnergyPortfolioItem,
+    CableCalculationEnergyRefresh,
+    CableCalculationImportResult,
+    CableCalculationLoads,
+    CableCalculationOptimization,
+    CableCalculationPatch,
+    CableCalculationResults,
+    CableCalculationScenario,
+    CableCalculationScenarioEdit,
+    CableCalculationScenarioInfo,
+    CableCalculationShortCircuit,
+    CableCalculationSnapshot,
+    CableCalculationSuggestion,
+    CableCalculationTopology,
+)
+from app.cable_calculation import bom, energy, engine, exporter, importer, loads, scenarios, snapshots, topology
 from app.cable_calculation.functions import (
     create_cable_calculation,
+    create_cable_calculations_bulk,
+    clone_version,
+    analyze_topology,
     get_cable_calculation,
+    optimize_cable_calculation,
+    optimize_version,
+    update_cable_calculations_bulk,
     get_cable_calculations_by_version,
+    evaluate_version,
+    short_circuit_version,
+    diff_versions,
     get_all_versions,
     update_cable_calculation,
     delete_cable_calculation,  
     )
 
 from app.models import User
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, require_role
 from app.utils.db import get_db
 
 router = APIRouter()
@@ -36,18 +71,257 @@ def create_calc(
     """
     return create_cable_calculation(db, project_id, calc, current_user.id, new_version)
 
+@router.post("/bulk", response_model=CableCalculationBulkResult)
+def create_calcs_bulk(
+    project_id: int = Query(..., description="Project ID"),
+    new_version: bool = Query(False, description="Create new version if True, add to latest if False"),
+    atomic: bool = Query(False, description="Reject the whole batch if any row is invalid"),
+    calcs: List[Dict[str, Any]] = Body(..., description="List of CableCalculationCreate objects"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create many cable calculations in one transaction.
+
+    The version is resolved once for the whole batch. Invalid rows are
+    returned in `errors` (by index) and skipped, unless **atomic=True**.
+    """
+    return create_cable_calculations_bulk(
+        db, project_id, calcs, current_user.id, new_version, atomic
+    )
+
+@router.post("/import", response_model=CableCalculationImportResult)
+def import_calcs(
+    project_id: int = Query(..., description="Project ID"),
+    new_version: bool = Query(False, description="Create new version if True, add to latest if False"),
+    format: Literal["csv", "ndjson"] | None = Query(None, description="File format, default: from file name"),
+    batch_size: int = Query(importer.DEFAULT_BATCH_SIZE, ge=1, le=10000, description="Rows per INSERT batch"),
+    atomic: bool = Query(False, description="Roll back the whole import if any row is invalid"),
+    encoding: Literal[tuple(importer.ENCODINGS)] = Query("utf-8", description="File encoding"),
+    file: UploadFile = File(..., description="CSV (header row) or NDJSON cable schedule"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a cable schedule from CSV or NDJSON.
+
+    The file is parsed line by line and inserted in batches of
+    `batch_size` rows within one transaction, after the upload has been
+    spooled to a temporary file. The response contains per-chunk progress
+    and a row-level error report.
+    """
+    fmt = format or importer.detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unknown file format, use format=csv or format=ndjson")
+    return importer.import_cable_calculations(
+        db, project_id, file.file, fmt, current_user.id,
+        new_version=new_version, batch_size=batch_size, atomic=atomic, encoding=encoding
+    )
+
+@router.post("/versions/clone", response_model=CableCalculationCloneResult)
+def clone_calc_version(
+    project_id: int = Query(..., description="Project ID"),
+    clone: CableCalculationClone | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create a new version as a copy of the latest (or the given) version.
+
+    Optional `overrides` are applied to every copied cable.
+    """
+    clone = clone or CableCalculationClone()
+    overrides = clone.overrides.dict(exclude_none=True) if clone.overrides else {}
+    return clone_version(
+        db, project_id, current_user.id, clone.source_version, overrides, clone.delta
+    )
+
+@router.patch("/bulk", response_model=CableCalculationBulkUpdateResult)
+def update_calcs_bulk(
+    project_id: int = Query(..., description="Project ID"),
+    edits: List[CableCalculationPatch] = Body(..., description="Cable ids with the fields to change"),
+    version: int | None = Query(None, description="Version the cables are edited in; copies cables inherited by a delta version"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Update many cables in one transaction, e.g. the `edits` returned by
+    GET /{version}/optimize. Only the given fields are changed.
+    """
+    return update_cable_calculations_bulk(
+        db, project_id, [edit.dict(exclude_none=True) for edit in edits], version
+    )
+
+@router.post("/optimize", response_model=CableCalculationSuggestion)
+def optimize_calc(
+    calc: CableCalculationCreate,
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    cos_phi: float = Query(engine.DEFAULT_COS_PHI, gt=0, le=1, description="Power factor"),
+    max_voltage_drop_pct: float = Query(engine.DEFAULT_MAX_VOLTAGE_DROP_PCT, gt=0, description="Permitted voltage drop (%)"),
+    ambient_c: float | None = Query(None, description="Ambient temperature (°C), default: reference temperature"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Smallest standard cross-section (L and PE) for a single cable that
+    meets the voltage-drop limit and In <= Iz.
+    """
+    return optimize_cable_calculation(
+        calc,
+        voltage_v=voltage_v,
+        cos_phi=cos_phi,
+        max_voltage_drop_pct=max_voltage_drop_pct,
+        ambient_c=ambient_c,
+    )
+
+@router.get("/energy/portfolio", response_model=List[CableCalculationEnergyPortfolioItem])
+def read_energy_portfolio(
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of projects"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Materialized energy-loss summaries per project (latest version), largest
+    lifetime savings first. Non-admins see their own projects.
+    """
+    owner_id = None if current_user.role == "admin" else current_user.id
+    return energy.portfolio_summaries(db, owner_id, limit)
+
+@router.post("/energy/refresh", response_model=CableCalculationEnergyRefresh)
+def refresh_energy_portfolio(
+    force: bool = Query(False, description="Recompute all projects, not only changed ones"),
+    operating_hours: float = Query(energy.DEFAULT_OPERATING_HOURS, ge=0, le=8760, description="Full-load equivalent operating hours per year"),
+    energy_price: float = Query(energy.DEFAULT_ENERGY_PRICE, ge=0, description="Energy price (per kWh)"),
+    lifetime_years: int = Query(energy.DEFAULT_LIFETIME_YEARS, ge=1, le=100, description="Lifetime for the present value (years)"),
+    interest_rate: float = Query(energy.DEFAULT_INTEREST_RATE, ge=0, le=1, description="Interest rate for the present value"),
+    conductor_cost: float = Query(energy.DEFAULT_CONDUCTOR_COST, gt=0, description="Cost per mm² and metre of a loaded conductor"),
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_role("admin"))
+):
+    """
+    Recompute the energy-loss summaries of all projects whose latest version
+    or parameters changed since the last refresh.
+    """
+    return energy.refresh_portfolio(
+        db,
+        force=force,
+        operating_hours=operating_hours,
+        energy_price=energy_price,
+        lifetime_years=lifetime_years,
+        interest_rate=interest_rate,
+        conductor_cost=conductor_cost,
+    )
+
+@router.get("/diff", response_model=CableCalculationDiff)
+def diff_calc_versions(
+    project_id: int = Query(..., description="Project ID"),
+    from_version: int = Query(..., alias="from", description="Base version"),
+    to_version: int = Query(..., alias="to", description="Compared version"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Added, removed and changed cables between two versions.
+
+    Cables are matched on (origin, destination, cable_type).
+    """
+    return diff_versions(db, project_id, from_version, to_version)
+
+@router.post("/scenarios", response_model=CableCalculationScenarioInfo)
+def create_calc_scenario(
+    project_id: int = Query(..., description="Project ID"),
+    version: int = Query(..., description="Version to load"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Load a version into an in-memory what-if scenario. Nothing is written
+    until the scenario is committed.
+    """
+    scenario = scenarios.create_scenario(db, project_id, version, current_user.id)
+    return {
+        "scenario_id": scenario.id,
+        "project_id": project_id,
+        "version": version,
+        "cable_count": len(scenario.columns["id"]),
+    }
+
+@router.post("/scenarios/{scenario_id}/edits", response_model=CableCalculationScenario)
+def edit_calc_scenario(
+    scenario_id: str,
+    edits: List[CableCalculationScenarioEdit],
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply edits (set / scale / add on a column, optionally filtered) to
+    the scenario and return the recomputed results.
+    """
+    scenario = scenarios.scenario_store.get(scenario_id, current_user.id)
+    matched = scenarios.apply_edits(scenario, [edit.dict() for edit in edits])
+    return {**scenarios.scenario_results(scenario), "matched": matched}
+
+@router.get("/scenarios/{scenario_id}", response_model=CableCalculationScenario)
+def read_calc_scenario(
+    scenario_id: str,
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    cos_phi: float = Query(engine.DEFAULT_COS_PHI, gt=0, le=1, description="Power factor"),
+    max_voltage_drop_pct: float = Query(engine.DEFAULT_MAX_VOLTAGE_DROP_PCT, gt=0, description="Permitted voltage drop (%)"),
+    source_impedance_ohm: float = Query(engine.DEFAULT_SOURCE_IMPEDANCE_OHM, ge=0, description="Upstream loop impedance (Ohm)"),
+    ambient_c: float | None = Query(None, description="Ambient temperature (°C), default: reference temperature"),
+    current_user: User = Depends(get_current_user)
+):
+    """Results of the scenario with its current edits."""
+    scenario = scenarios.scenario_store.get(scenario_id, current_user.id)
+    return scenarios.scenario_results(
+        scenario,
+        voltage_v=voltage_v,
+        cos_phi=cos_phi,
+        max_voltage_drop_pct=max_voltage_drop_pct,
+        source_impedance_ohm=source_impedance_ohm,
+        ambient_c=ambient_c,
+    )
+
+@router.post("/scenarios/{scenario_id}/commit", response_model=CableCalculationBulkUpdateResult)
+def commit_calc_scenario(
+    scenario_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Write the scenario's changes to its version in one bulk update.
+    Fails with 409 if the version was modified in the meantime.
+    """
+    scenario = scenarios.scenario_store.get(scenario_id, current_user.id)
+    return scenarios.commit_scenario(db, scenario)
+
+@router.delete("/scenarios/{scenario_id}")
+def delete_calc_scenario(
+    scenario_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Discard a scenario."""
+    scenarios.scenario_store.get(scenario_id, current_user.id)
+    scenarios.scenario_store.remove(scenario_id)
+    return {"detail": "Scenario deleted"}
+
 @router.get("/{version}", response_model=List[CableCalculationRead])
 def read_calcs_by_version(
     version: int,
     project_id: int = Query(..., description="Project ID"),
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get ALL cable calculations for a specific version.
     
-    Returns a list of all cables in this version.
+    Returns a list of all cables in this version. Frozen versions are
+    served from their stored snapshot with an ETag.
     """
+    frozen = snapshots.snapshot_response(db, project_id, version, if_none_match, accept_encoding)
+    if frozen is not None:
+        return frozen
+
     calcs = get_cable_calculations_by_version(db, project_id, version)
     
     if not calcs:
@@ -56,6 +330,201 @@ def read_calcs_by_version(
     
     return calcs
 
+@router.post("/{version}/freeze", response_model=CableCalculationSnapshot)
+def freeze_calc_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Freeze (release) a version: store a compressed snapshot of its cables
+    and reject all further writes to it with 409.
+    """
+    return snapshots.freeze_version(db, project_id, version)
+
+@router.get("/{version}/results", response_model=CableCalculationResults)
+def read_results_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    mode: Literal["numpy", "python"] = Query("numpy", description="Vectorized engine or row-by-row fallback"),
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    cos_phi: float = Query(engine.DEFAULT_COS_PHI, gt=0, le=1, description="Power factor"),
+    max_voltage_drop_pct: float = Query(engine.DEFAULT_MAX_VOLTAGE_DROP_PCT, gt=0, description="Permitted voltage drop (%)"),
+    source_impedance_ohm: float = Query(engine.DEFAULT_SOURCE_IMPEDANCE_OHM, ge=0, description="Upstream loop impedance (Ohm)"),
+    ambient_c: float | None = Query(None, description="Ambient temperature (°C), default: reference temperature"),
+    grouping: bool = Query(False, description="Derate Iz for cables sharing origin and laying type"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Evaluate ALL cables of a version: voltage drop, loop impedance and
+    the Ib <= In <= Iz protection check.
+    """
+    return evaluate_version(
+        db, project_id, version, mode, grouping,
+        voltage_v=voltage_v,
+        cos_phi=cos_phi,
+        max_voltage_drop_pct=max_voltage_drop_pct,
+        source_impedance_ohm=source_impedance_ohm,
+        ambient_c=ambient_c,
+    )
+
+@router.get("/{version}/short_circuit", response_model=CableCalculationShortCircuit)
+def read_short_circuit_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    mode: Literal["numpy", "python"] = Query("numpy", description="Vectorized check or row-by-row fallback"),
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    source_impedance_ohm: float = Query(engine.DEFAULT_SOURCE_IMPEDANCE_OHM, ge=0, description="Upstream loop impedance (Ohm)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Minimum and maximum fault current per cable, the disconnection check
+    against the fuse (0.4 s / 5 s) and the PE cross-section check.
+    """
+    return short_circuit_version(
+        db, project_id, version, mode,
+        voltage_v=voltage_v,
+        source_impedance_ohm=source_impedance_ohm,
+    )
+
+@router.get("/{version}/energy", response_model=CableCalculationEnergy)
+def read_energy_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    operating_hours: float = Query(energy.DEFAULT_OPERATING_HOURS, ge=0, le=8760, description="Full-load equivalent operating hours per year"),
+    energy_price: float = Query(energy.DEFAULT_ENERGY_PRICE, ge=0, description="Energy price (per kWh)"),
+    lifetime_years: int = Query(energy.DEFAULT_LIFETIME_YEARS, ge=1, le=100, description="Lifetime for the present value (years)"),
+    interest_rate: float = Query(energy.DEFAULT_INTEREST_RATE, ge=0, le=1, description="Interest rate for the present value"),
+    conductor_cost: float = Query(energy.DEFAULT_CONDUCTOR_COST, gt=0, description="Cost per mm² and metre of a loaded conductor"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Annual I²R losses and their cost per cable, and the economic
+    cross-section where a larger conductor pays off over the lifetime.
+    """
+    return energy.version_energy(
+        db, project_id, version,
+        operating_hours=operating_hours,
+        energy_price=energy_price,
+        lifetime_years=lifetime_years,
+        interest_rate=interest_rate,
+        conductor_cost=conductor_cost,
+    )
+
+@router.get("/{version}/topology", response_model=CableCalculationTopology)
+def read_topology_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    root: str | None = Query(None, description="Supply node, default: root feeding the most nodes"),
+    max_total_drop_pct: float = Query(topology.DEFAULT_MAX_TOTAL_DROP_PCT, gt=0, description="Permitted cumulative voltage drop (%)"),
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    cos_phi: float = Query(engine.DEFAULT_COS_PHI, gt=0, le=1, description="Power factor"),
+    problems_only: bool = Query(False, description="List only failed, cycle and orphan nodes"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Distribution tree built from origin -> destination with the cumulative
+    voltage drop at every node. Cycles and nodes not fed from the supply
+    (orphans) are reported.
+    """
+    topo = analyze_topology(
+        db, project_id, version,
+        root=root,
+        max_total_drop_pct=max_total_drop_pct,
+        problems_only=problems_only,
+        voltage_v=voltage_v,
+        cos_phi=cos_phi,
+    )
+    # Große Netze: ohne Validierung durch response_model direkt serialisieren
+    return ORJSONResponse(topo)
+
+@router.get("/{version}/loads", response_model=CableCalculationLoads)
+def read_loads_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    default_factor: float | None = Query(None, gt=0, le=1, description="Diversity factor for all boards, default: by number of circuits"),
+    factor: List[str] = Query([], description="Per-board diversity factor as board=factor, repeatable"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Summed nominal currents per distribution board, propagated upstream
+    with diversity factors, and checked against the feeder fuse.
+    """
+    factors = {}
+    for item in factor:
+        board, _, value = item.rpartition("=")
+        try:
+            parsed = float(value)
+        except ValueError:
+            parsed = None
+        if not board or parsed is None or not 0 < parsed <= 1:
+            raise HTTPException(status_code=422, detail=f"Invalid diversity factor: {item}")
+        factors[board] = parsed
+    return loads.version_loads(db, project_id, version, factors, default_factor)
+
+@router.get("/{version}/optimize", response_model=CableCalculationOptimization)
+def optimize_calcs_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    voltage_v: float = Query(engine.DEFAULT_VOLTAGE_V, gt=0, description="Line voltage (V)"),
+    cos_phi: float = Query(engine.DEFAULT_COS_PHI, gt=0, le=1, description="Power factor"),
+    max_voltage_drop_pct: float = Query(engine.DEFAULT_MAX_VOLTAGE_DROP_PCT, gt=0, description="Permitted voltage drop (%)"),
+    ambient_c: float | None = Query(None, description="Ambient temperature (°C), default: reference temperature"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Suggest the smallest sufficient cross-section for ALL cables of a
+    version. `edits` can be sent unchanged to PATCH /bulk.
+    """
+    return optimize_version(
+        db, project_id, version,
+        voltage_v=voltage_v,
+        cos_phi=cos_phi,
+        max_voltage_drop_pct=max_voltage_drop_pct,
+        ambient_c=ambient_c,
+    )
+
+@router.get("/{version}/bom", response_model=CableCalculationBom)
+def read_bom_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bill of materials of a version: total length per cable type, cores and
+    cross-section, priced with the latest price of the matching article
+    (named e.g. "NYY-J 5x2.5").
+    """
+    return bom.version_bom(db, project_id, version)
+
+@router.get("/{version}/export")
+def export_calcs_by_version(
+    version: int,
+    project_id: int = Query(..., description="Project ID"),
+    format: Literal["csv", "ndjson"] = Query("csv", description="Export format"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream ALL cable calculations of a version as CSV or NDJSON.
+
+    Rows come from a server-side cursor, memory use is constant.
+    """
+    filename = f"cable_calculation_{project_id}_v{version}.{format}"
+    return StreamingResponse(
+        exporter.iter_export(db, project_id, version, format),
+        media_type=exporter.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/versions/list", response_model=List[int])
 def list_versions(
     project_id: int = Query(..., description="Project ID"),
@@ -71,11 +540,12 @@ def update_calc(
     calc_id: int,
     calc: CableCalculationCreate,
     project_id: int = Query(..., description="Project ID"),
+    version: int | None = Query(None, description="Version the cable is edited in; copies cables inherited by a delta version"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a specific cable calculation."""
-    updated = update_cable_calculation(db, calc_id, calc)
+    updated = update_cable_calculation(db, calc_id, calc, version)
     if not updated:
         raise HTTPException(status_code=404, detail="Calculation not found")
     return updated
@@ -84,11 +554,12 @@ def update_calc(
 def delete_calc(
     calc_id: int,
     project_id: int = Query(..., description="Project ID"),
+    version: int | None = Query(None, description="Version the cable is edited in; copies cables inherited by a delta version"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a specific cable calculation."""
-    deleted = delete_cable_calculation(db, calc_id, current_user)
+    deleted = delete_cable_calculation(db, calc_id, current_user, version)
     if not deleted:
         raise HTTPException(status_code=404, detail="Calculation not found")
     return {"detail": "Calculation deleted"}
\ No newline at end of file
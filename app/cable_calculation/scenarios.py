@@ -0,0 +1,233 @@
+"""
+Was-wäre-wenn-Szenarien auf einer Version.
+
+A scenario loads the engine input columns of a version once and keeps
+them in memory. Edits such as "nominal_current_a * 1.2" or "laying_type
+C -> E" are applied as vectorized transforms on the columns; results
+are recomputed with engine.evaluate_columns. Nothing is written until
+the scenario is committed: then the changed cells go into the database
+as one bulk UPDATE, provided the version did not change in the meantime
+(project_versions stamp).
+
+Edited columns are copied on write, unchanged columns are shared with the
+loaded base. Scenarios are kept in an LRU store that evicts the least
+recently used ones when the estimated memory exceeds MAX_SCENARIO_BYTES.
+"""
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import ProjectVersion
+from app.cable_calculation import engine
+from app.cable_calculation.functions import get_version_rows, update_cable_calculations_bulk
+
+# Speicherobergrenze aller Szenarien zusammen (geschätzt)
+MAX_SCENARIO_BYTES = 256 * 1024 * 1024
+
+# Änderbare Spalten (Engine-Eingaben ohne id)
+EDITABLE_COLUMNS = engine.INPUT_COLUMNS[1:]
+TEXT_COLUMNS = ("cable_type", "laying_type")
+
+
+class Scenario:
+    """In-memory overlay of one version."""
+
+    def __init__(self, project_id: int, version: int, user_id: int, stamp, columns):
+        self.id = uuid.uuid4().hex
+        self.project_id = project_id
+        self.version = version
+        self.user_id = user_id
+        self.stamp = stamp
+        self.base = columns
+        self.columns = dict(columns)
+        self.edit_count = 0
+        self.lock = threading.Lock()
+
+    def apply(self, edit: dict):
+        """
+        Apply one edit to all matching cables.
+
+        Args:
+            edit: field, op ("set", "scale" or "add"), value and optional
+                filters where ({column: value}) and ids
+        """
+        field, op, value = edit["field"], edit["op"], edit["value"]
+        if field not in EDITABLE_COLUMNS:
+            raise HTTPException(status_code=422, detail=f"Field not editable: {field}")
+        text = field in TEXT_COLUMNS
+        if text != isinstance(value, str) or (text and op != "set"):
+            raise HTTPException(status_code=422, detail=f"Invalid edit for {field}: {op} {value!r}")
+
+        mask = np.ones(len(self.columns["id"]), dtype=bool)
+        for name, expected in (edit.get("where") or {}).items():
+            if name not in EDITABLE_COLUMNS or (name in TEXT_COLUMNS) != isinstance(expected, str):
+                raise HTTPException(status_code=422, detail=f"Invalid filter: {name}={expected!r}")
+            mask &= self.columns[name] == expected
+        if edit.get("ids") is not None:
+            mask &= np.isin(self.columns["id"], edit["ids"])
+
+        current = self.columns[field]
+        if op == "scale":
+            updated = current * value
+        elif op == "add":
+            updated = current + value
+        else:
+            updated = np.full(len(current), value, dtype=current.dtype)
+        if current.dtype.kind == "i":
+            updated = np.rint(updated)
+
+        # Copy-on-write: neues Array, die Basis bleibt unverändert
+        self.columns[field] = np.where(mask, updated, current).astype(current.dtype)
+        self.edit_count += 1
+        return int(np.count_nonzero(mask))
+
+    def changed(self):
+        """Changed columns and the mask of cables with any change."""
+        fields = [
+            name for name in EDITABLE_COLUMNS
+            if self.columns[name] is not self.base[name]
+            and (self.columns[name] != self.base[name]).any()
+        ]
+        mask = np.zeros(len(self.columns["id"]), dtype=bool)
+        for name in fields:
+            mask |= self.columns[name] != self.base[name]
+        return fields, mask
+
+    def nbytes(self) -> int:
+        arrays = {id(a): a for a in (*self.base.values(), *self.columns.values())}
+        total = 0
+        for values in arrays.values():
+            total += values.nbytes
+            if values.dtype == object:
+                total += sum(map(sys.getsizeof, values))
+        return total
+
+
+class ScenarioStore:
+    """LRU map scenario id -> Scenario with a memory cap."""
+
+    def __init__(self, max_bytes: int = MAX_SCENARIO_BYTES):
+        self.max_bytes = max_bytes
+        self._scenarios = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def add(self, scenario: Scenario):
+        with self._lock:
+            self._scenarios[scenario.id] = scenario
+        self.resize(scenario)
+
+    def get(self, scenario_id: str, user_id: int) -> Scenario:
+        with self._lock:
+            scenario = self._scenarios.get(scenario_id)
+            if scenario is None or scenario.user_id != user_id:
+                raise HTTPException(status_code=404, detail="Scenario not found")
+            self._scenarios.move_to_end(scenario_id)
+            return scenario
+
+    def resize(self, scenario: Scenario):
+        """(Re-)account a scenario's memory and evict the oldest ones above the cap."""
+        size = scenario.nbytes()
+        with self._lock:
+            if scenario.id not in self._scenarios:
+                return
+            self._scenarios.move_to_end(scenario.id)
+            self._sizes[scenario.id] = size
+            while sum(self._sizes.values()) > self.max_bytes and len(self._scenarios) > 1:
+                evicted, _ = self._scenarios.popitem(last=False)
+                del self._sizes[evicted]
+
+    def remove(self, scenario_id: str):
+        with self._lock:
+            self._scenarios.pop(scenario_id, None)
+            self._sizes.pop(scenario_id, None)
+
+
+scenario_store = ScenarioStore()
+
+
+def _version_stamp(db: Session, project_id: int, version: int, for_update: bool = False):
+    stmt = select(ProjectVersion.cable_count, ProjectVersion.updated_at).where(
+        ProjectVersion.project_id == project_id,
+        ProjectVersion.version == version
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    tracked = db.execute(stmt).first()
+    return tuple(tracked) if tracked else None
+
+
+def create_scenario(db: Session, project_id: int, version: int, user_id: int) -> Scenario:
+    """Load a version into a new scenario."""
+    stamp = _version_stamp(db, project_id, version)
+    if not stamp or not stamp[0]:
+        raise HTTPException(status_code=404, detail="Version not found")
+    columns = engine.to_columns(get_version_rows(db, project_id, version))
+    scenario = Scenario(project_id, version, user_id, stamp, columns)
+    scenario_store.add(scenario)
+    return scenario
+
+
+def apply_edits(scenario: Scenario, edits):
+    """
+    Apply edits in order, all or nothing.
+
+    Returns:
+        Number of matched cables per edit
+    """
+    with scenario.lock:
+        previous = dict(scenario.columns), scenario.edit_count
+        try:
+            matched = [scenario.apply(edit) for edit in edits]
+        except HTTPException:
+            scenario.columns, scenario.edit_count = previous
+            raise
+    scenario_store.resize(scenario)
+    return matched
+
+
+def scenario_results(scenario: Scenario, **params):
+    """Recomputed results of the scenario (engine parameters as for /results)."""
+    with scenario.lock:
+        columns = dict(scenario.columns)
+        _fields, changed = scenario.changed()
+    results = engine.evaluate_columns(columns, **params)
+    return {
+        "scenario_id": scenario.id,
+        "project_id": scenario.project_id,
+        "version": scenario.version,
+        "edit_count": scenario.edit_count,
+        "changed_count": int(np.count_nonzero(changed)),
+        "summary": engine.summarize(columns, results),
+        "results": engine.results_to_rows(results),
+    }
+
+
+def commit_scenario(db: Session, scenario: Scenario):
+    """
+    Write the changed cells of a scenario as one bulk UPDATE and drop it.
+
+    Raises 409 if the version was modified since the scenario was loaded.
+    """
+    with scenario.lock:
+        # Sperrt die Version bis zum Commit des Bulk-UPDATE gegen gleichzeitige Schreibzugriffe
+        if _version_stamp(db, scenario.project_id, scenario.version, for_update=True) != scenario.stamp:
+            db.rollback()
+            raise HTTPException(
+                status_code=409, detail="Version changed since the scenario was created"
+            )
+        fields, changed = scenario.changed()
+        # Eine Feldmenge für alle Zeilen -> ein executemany
+        values = [engine.to_list(scenario.columns[name][changed]) for name in ("id", *fields)]
+        edits = [dict(zip(("id", *fields), row)) for row in zip(*values)]
+        result = update_cable_calculations_bulk(
+            db, scenario.project_id, edits, scenario.version
+        )
+    scenario_store.remove(scenario.id)
+    return result
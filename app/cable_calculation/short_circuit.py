@@ -0,0 +1,264 @@
+"""
+Kurzschluss- und Abschaltbedingungen (DIN VDE 0100-410 / -540, IEC 60909 vereinfacht).
+
+For every cable of a version, evaluated as whole NumPy columns:
+
+- ik_max_a: maximum fault current at the cable end (cold conductors,
+  c_max = 1.1); three-phase fault for >= 3 loaded cores, L-N otherwise,
+- ik_min_a: minimum fault current L-PE at the cable end (conductors at
+  operating temperature, c_min = 0.95), from the loop impedance,
+- disconnection: ik_min_a must reach the current Ia that blows the gG fuse
+  within the permitted time (0.4 s for final circuits up to 32 A, else 5 s),
+- PE: the adiabatic minimum S = Ik * sqrt(t) / k, or alternatively the
+  table rule (L up to 16 mm², 16 mm² up to 35 mm², L/2 above).
+
+The conductor resistances and reactances come from engine.impedances, the
+same data the voltage-drop check uses (resistivity per conductor
+material, so aluminium cables get the lower fault currents). `evaluate_rows` is the row-by-row
+reference implementation (see scripts/bench_short_circuit.py).
+"""
+import math
+
+import numpy as np
+
+from app.cable_calculation import engine
+from app.cable_calculation.tables import get_catalog, parse_cable_type
+
+# Spannungsfaktoren (Niederspannung)
+C_MAX = 1.1
+C_MIN = 0.95
+
+# Warmer -> kalter Leiter (70 °C -> 20 °C) je Leitermaterial
+COLD_FACTORS = {material: engine.RESISTIVITY_20[material] / engine.RESISTIVITY[material]
+                for material in engine.RESISTIVITY}
+
+# Abschaltzeiten (s): Endstromkreise bis 32 A, sonst Verteilerstromkreise
+FINAL_CIRCUIT_MAX_A = 32.0
+DISCONNECT_FINAL_S = 0.4
+DISCONNECT_DISTRIBUTION_S = 5.0
+
+# gG-Sicherungen: Bemessungsstrom -> Abschaltstrom Ia (A), Richtwerte nach Zeit-Strom-Kennlinie
+FUSE_RATINGS = (6, 10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630)
+IA_5S = (28, 47, 65, 85, 110, 150, 190, 250, 320, 425, 580, 715, 950, 1250, 1650, 2200, 2840, 3800, 5100)
+IA_04S = (47, 82, 107, 145, 180, 265, 310, 460, 550, 735, 1015, 1230, 1720, 2300, 2860, 4000, 5000, 6650, 9000)
+
+# PE-Querschnitt (DIN VDE 0100-540): bis 16 mm² wie L, bis 35 mm² 16 mm², darüber L/2
+PE_FULL_UP_TO = 16.0
+PE_REDUCED_UP_TO = 35.0
+
+# k-Werte für PE-Leiter als Ader eines Kabels (Material, Isolierung)
+K_FACTORS = {
+    ("CU", "PVC"): 115.0,
+    ("CU", "XLPE"): 143.0,
+    ("AL", "PVC"): 76.0,
+    ("AL", "XLPE"): 94.0,
+}
+
+RESULT_COLUMNS = (
+    "id",
+    "ik_max_a",
+    "ik_min_a",
+    "disconnect_time_s",
+    "ia_a",
+    "disconnection_ok",
+    "pe_min_mm2",
+    "pe_adiabatic_ok",
+    "pe_table_ok",
+    "pe_ok",
+    "ok",
+)
+
+
+def pe_cross_sections(sections):
+    """Minimum PE size for the given line sizes, snapped up to standard sizes."""
+    catalog = get_catalog()
+    half = catalog.sections[np.searchsorted(catalog.sections, sections / 2, side="left")
+                            .clip(0, len(catalog.sections) - 1)]
+    return np.where(
+        sections <= PE_FULL_UP_TO, sections,
+        np.where(sections <= PE_REDUCED_UP_TO, PE_FULL_UP_TO, half)
+    )
+
+
+def required_disconnect_time(fuse):
+    return np.where(fuse <= FINAL_CIRCUIT_MAX_A, DISCONNECT_FINAL_S, DISCONNECT_DISTRIBUTION_S)
+
+
+def disconnect_current(fuse, disconnect_time_s):
+    """Ia of a gG fuse for the given rating and time (interpolated between ratings)."""
+    return np.where(
+        disconnect_time_s <= DISCONNECT_FINAL_S,
+        np.interp(fuse, FUSE_RATINGS, IA_04S),
+        np.interp(fuse, FUSE_RATINGS, IA_5S),
+    )
+
+
+def k_factors(cable_types):
+    """k per cable; each distinct cable type is parsed only once."""
+    lookup = {ct: K_FACTORS[parse_cable_type(ct)] for ct in dict.fromkeys(cable_types)}
+    return np.fromiter(map(lookup.__getitem__, cable_types), np.float64, len(cable_types))
+
+
+def evaluate_columns(
+    columns,
+    voltage_v: float = engine.DEFAULT_VOLTAGE_V,
+    source_impedance_ohm: float = engine.DEFAULT_SOURCE_IMPEDANCE_OHM,
+):
+    """
+    Fault currents, disconnection and PE checks for all cables at once.
+
+    Args:
+        columns: Dict of NumPy arrays keyed by engine.INPUT_COLUMNS
+        source_impedance_ohm: Upstream loop impedance L-PE (Ohm)
+
+    Returns:
+        Dict of NumPy arrays keyed by RESULT_COLUMNS
+    """
+    z = engine.impedances(columns)
+    three_phase = columns["loaded_cores"] >= 3
+    fuse = columns["fuse_rating_a"]
+    section_l = columns["cross_section_l"]
+    section_pe = columns["cross_section_pe"]
+    phase_voltage = voltage_v / math.sqrt(3)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Kalte Leiter; Vorimpedanz je Leiter als halbe Schleifenimpedanz
+        cable_types = columns["cable_type"]
+        r_cold = z["resistance_l"] * (
+            engine.resistivities(cable_types, engine.RESISTIVITY_20) / engine.resistivities(cable_types)
+        )
+        z_phase = np.hypot(r_cold, z["reactance"])
+        ik_max = np.where(
+            three_phase,
+            C_MAX * phase_voltage / (source_impedance_ohm / 2 + z_phase),
+            C_MAX * phase_voltage / (source_impedance_ohm + 2 * z_phase),
+        )
+
+        loop = source_impedance_ohm + np.hypot(
+            z["resistance_l"] + z["resistance_pe"], 2 * z["reactance"]
+        )
+        ik_min = C_MIN * phase_voltage / loop
+
+        disconnect_time = required_disconnect_time(fuse)
+        ia = disconnect_current(fuse, disconnect_time)
+        pe_min = ik_min * np.sqrt(disconnect_time) / k_factors(columns["cable_type"])
+
+    disconnection_ok = ik_min >= ia
+    pe_adiabatic_ok = section_pe >= pe_min
+    pe_table_ok = section_pe >= pe_cross_sections(section_l)
+    pe_ok = pe_adiabatic_ok | pe_table_ok
+
+    return {
+        "id": columns["id"],
+        "ik_max_a": ik_max,
+        "ik_min_a": ik_min,
+        "disconnect_time_s": disconnect_time,
+        "ia_a": ia,
+        "disconnection_ok": disconnection_ok,
+        "pe_min_mm2": pe_min,
+        "pe_adiabatic_ok": pe_adiabatic_ok,
+        "pe_table_ok": pe_table_ok,
+        "pe_ok": pe_ok,
+        "ok": disconnection_ok & pe_ok,
+    }
+
+
+def _pe_table(section_l: float) -> float:
+    if section_l <= PE_FULL_UP_TO:
+        return section_l
+    if section_l <= PE_REDUCED_UP_TO:
+        return PE_FULL_UP_TO
+    return float(pe_cross_sections(np.asarray([section_l]))[0])
+
+
+def evaluate_rows(
+    rows,
+    voltage_v: float = engine.DEFAULT_VOLTAGE_V,
+    source_impedance_ohm: float = engine.DEFAULT_SOURCE_IMPEDANCE_OHM,
+):
+    """
+    Naive row-by-row counterpart of evaluate_columns (reference/benchmark).
+
+    Args:
+        rows: Iterable of tuples in engine.INPUT_COLUMNS order
+
+    Returns:
+        List of result dicts keyed by RESULT_COLUMNS
+    """
+    phase_voltage = voltage_v / math.sqrt(3)
+    results = []
+    for (calc_id, cable_type, length, number_of_cables, cores, section_l,
+         section_pe, _laying_type, fuse, _current) in rows:
+        parallel = max(number_of_cables, 1)
+        material, _insulation = parse_cable_type(cable_type)
+        rho = engine.RESISTIVITY[material]
+        r_l = rho * length / (section_l * parallel) if section_l else math.inf
+        r_pe = rho * length / (section_pe * parallel) if section_pe else math.inf
+        x = engine.REACTANCE_PER_M * length / parallel
+
+        z_phase = math.hypot(r_l * COLD_FACTORS[material], x)
+        if cores >= 3:
+            z_fault = source_impedance_ohm / 2 + z_phase
+        else:
+            z_fault = source_impedance_ohm + 2 * z_phase
+        ik_max = C_MAX * phase_voltage / z_fault if z_fault else math.inf
+        loop = source_impedance_ohm + math.hypot(r_l + r_pe, 2 * x)
+        ik_min = C_MIN * phase_voltage / loop if loop else math.inf
+
+        disconnect_time = DISCONNECT_FINAL_S if fuse <= FINAL_CIRCUIT_MAX_A else DISCONNECT_DISTRIBUTION_S
+        table = IA_04S if disconnect_time <= DISCONNECT_FINAL_S else IA_5S
+        ia = float(np.interp(fuse, FUSE_RATINGS, table))
+        k = K_FACTORS[parse_cable_type(cable_type)]
+        pe_min = ik_min * math.sqrt(disconnect_time) / k
+
+        disconnection_ok = ik_min >= ia
+        pe_adiabatic_ok = section_pe >= pe_min
+        pe_table_ok = section_pe >= _pe_table(section_l)
+        pe_ok = pe_adiabatic_ok or pe_table_ok
+
+        results.append({
+            "id": calc_id,
+            "ik_max_a": engine.finite_or_none(ik_max),
+            "ik_min_a": engine.finite_or_none(ik_min),
+            "disconnect_time_s": disconnect_time,
+            "ia_a": ia,
+            "disconnection_ok": disconnection_ok,
+            "pe_min_mm2": engine.finite_or_none(pe_min),
+            "pe_adiabatic_ok": pe_adiabatic_ok,
+            "pe_table_ok": pe_table_ok,
+            "pe_ok": pe_ok,
+            "ok": disconnection_ok and pe_ok,
+        })
+    return results
+
+
+def results_to_rows(results):
+    """Column dict of evaluate_columns -> list of row dicts."""
+    return [
+        dict(zip(RESULT_COLUMNS, values))
+        for values in zip(*(engine.to_list(np.asarray(results[name])) for name in RESULT_COLUMNS))
+    ]
+
+
+def summarize(results):
+    ik_min = results["ik_min_a"]
+    finite = ik_min[np.isfinite(ik_min)]
+    return {
+        "cable_count": len(results["id"]),
+        "min_ik_min_a": float(finite.min()) if len(finite) else None,
+        "disconnection_failed_count": int(np.count_nonzero(~results["disconnection_ok"])),
+        "pe_failed_count": int(np.count_nonzero(~results["pe_ok"])),
+        "failed_count": int(np.count_nonzero(~results["ok"])),
+    }
+
+
+def summarize_rows(results):
+    """Pure Python counterpart of summarize for evaluate_rows output."""
+    ik_min = [r["ik_min_a"] for r in results if r["ik_min_a"] is not None]
+    return {
+        "cable_count": len(results),
+        "min_ik_min_a": min(ik_min) if ik_min else None,
+        "disconnection_failed_count": sum(1 for r in results if not r["disconnection_ok"]),
+        "pe_failed_count": sum(1 for r in results if not r["pe_ok"]),
+        "failed_count": sum(1 for r in results if not r["ok"]),
+    }
@@ -0,0 +1,152 @@
+"""
+Eingefrorene (freigegebene) Versionen.
+
+Freezing a version serializes its cable list once, exactly as
+GET /cable_calculation/{version} returns it, and stores it gzip-compressed
+together with the sha256 of the JSON. From then on:
+
+- every write to the version is rejected with 409 (see
+  functions.track_version, which checks project_versions.frozen),
+- reads return the stored bytes as they are (Content-Encoding: gzip, or
+  decompressed for clients without gzip) with a strong ETag; a matching
+  If-None-Match gives 304 without loading the content.
+"""
+import gzip
+import hashlib
+from datetime import datetime
+from typing import List
+
+from fastapi import HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import ProjectVersion, VersionSnapshot
+from app.cable_calculation import storage
+from app.cable_calculation.functions import read_columns
+from app.schemas.cable_calculation import CableCalculationRead
+
+_rows_adapter = TypeAdapter(List[CableCalculationRead])
+
+# Clients müssen vor jeder Verwendung revalidieren (ETag)
+CACHE_CONTROL = "private, no-cache"
+
+
+def _snapshot_info(snapshot: VersionSnapshot):
+    return {
+        "project_id": snapshot.project_id,
+        "version": snapshot.version,
+        "etag": snapshot.etag,
+        "cable_count": snapshot.cable_count,
+        "size_bytes": snapshot.size_bytes,
+        "compressed_bytes": len(snapshot.content),
+        "frozen_at": snapshot.frozen_at,
+    }
+
+
+def freeze_version(db: Session, project_id: int, version: int):
+    """
+    Freeze a version: store its serialized snapshot and block writes.
+
+    Idempotent; freezing a frozen version returns the existing snapshot.
+    """
+    # Sperrt die Version gegen gleichzeitige Schreibzugriffe
+    tracked = db.execute(
+        select(ProjectVersion).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        ).with_for_update()
+    ).scalar_one_or_none()
+    if tracked is None or not tracked.cable_count:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Version not found")
+    if tracked.frozen:
+        snapshot = db.get(VersionSnapshot, (project_id, version))
+        db.rollback()
+        return _snapshot_info(snapshot)
+
+    calcs, in_version = storage.version_calcs(db, project_id, version)
+    rows = db.execute(
+        select(*read_columns(calcs)).where(
+            *in_version
+        ).order_by(calcs.created_at, storage.lineage_key(calcs))
+    ).all()
+    payload = _rows_adapter.dump_json([row._asdict() for row in rows])
+
+    snapshot = VersionSnapshot(
+        project_id=project_id,
+        version=version,
+        etag=hashlib.sha256(payload).hexdigest(),
+        # mtime=0: gleiche Daten -> gleiche Bytes
+        content=gzip.compress(payload, mtime=0),
+        size_bytes=len(payload),
+        cable_count=len(rows),
+        frozen_at=datetime.utcnow(),
+    )
+    db.add(snapshot)
+    tracked.frozen = True
+    db.commit()
+    return _snapshot_info(snapshot)
+
+
+def _matches(if_none_match: str | None, tag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """gzip (or *) listed in Accept-Encoding with a q-value above 0."""
+    qualities = {}
+    for item in (accept_encoding or "").lower().split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def snapshot_response(
+    db: Session,
+    project_id: int,
+    version: int,
+    if_none_match: str | None = None,
+    accept_encoding: str | None = None,
+) -> Response | None:
+    """
+    Response for a frozen version, or None if the version is not frozen.
+
+    The gzip and the identity representation carry different strong ETags
+    ("<sha256>-gzip" / "<sha256>").
+    """
+    in_version = (
+        VersionSnapshot.project_id == project_id,
+        VersionSnapshot.version == version
+    )
+    etag = db.execute(select(VersionSnapshot.etag).where(*in_version)).scalar()
+    if etag is None:
+        return None
+
+    use_gzip = _accepts_gzip(accept_encoding)
+    tag = f'"{etag}-gzip"' if use_gzip else f'"{etag}"'
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if _matches(if_none_match, tag):
+        return Response(status_code=304, headers=headers)
+
+    content = db.execute(select(VersionSnapshot.content).where(*in_version)).scalar()
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    else:
+        content = gzip.decompress(content)
+    return Response(content=content, media_type="application/json", headers=headers)
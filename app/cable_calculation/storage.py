@@ -0,0 +1,245 @@
+"""
+Delta-Speicherung von Versionen.
+
+A version cloned with delta=True stores no rows at first; it records its
+parent in project_versions.base_version and inherits the parent's cables.
+Only cables that are edited in the new version get a row of their own
+(copy-on-write, same lineage), deleted inherited cables get a tombstone
+row. The parent must be frozen, so what a delta inherits never changes.
+
+Cables are matched across versions by their lineage key
+coalesce(lineage_id, id). A delta version is read with one merge over its
+chain (the version, its parent, the parent's parent, ... down to a fully
+stored version): DISTINCT ON (lineage key) ORDER BY version DESC keeps the
+newest row per cable, tombstones are dropped. version_calcs returns that
+merge as an aliased CableCalculation, so readers query it exactly like the
+plain table; fully stored versions read the table directly. Readers order
+by created_at, lineage key; both that order and the chain merge are served
+by expression indexes on coalesce(lineage_id, id) (see models).
+
+compact() materializes delta versions whose chain got too deep or whose
+delta rows outweigh the saving; it runs with the periodic cleanup.
+Materializing copies the inherited cables into the version, so their ids
+change. Frozen versions are skipped, their ids are published in the
+snapshot. Since a delta's parent is always frozen, only leaf versions can
+be compacted; the depth of chains of frozen deltas is therefore capped
+when a delta is created (functions.clone_version stores a full copy once
+the source chain is MAX_DELTA_DEPTH deep).
+"""
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, delete, func, insert, literal, select
+from sqlalchemy.orm import Session, aliased
+
+from app.models import CableCalculation, ProjectVersion
+
+# Kompaktierung: maximale Kettenlänge, Anteil Delta-Zeilen, Mindestalter
+MAX_DELTA_DEPTH = 8
+COMPACT_RATIO = 0.5
+COMPACT_MIN_AGE = timedelta(hours=1)
+
+_table = CableCalculation.__table__
+# Beim Übernehmen in eine andere Version kopierte Spalten
+_COPY_COLUMNS = tuple(c.name for c in _table.c if c.name not in ("id", "version", "lineage_id"))
+
+
+def lineage_key(calcs=CableCalculation):
+    """Identity of a cable across versions; also the read order after created_at."""
+    return func.coalesce(calcs.lineage_id, calcs.id)
+
+
+def version_chain(db: Session, project_id: int, version: int) -> list[int]:
+    """Versions whose rows make up `version`, newest first; [version] if stored fully."""
+    base = db.execute(
+        select(ProjectVersion.base_version).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        )
+    ).scalar()
+    if base is None:
+        return [version]
+
+    bases = dict(db.execute(
+        select(ProjectVersion.version, ProjectVersion.base_version).where(
+            ProjectVersion.project_id == project_id
+        )
+    ).all())
+    chain = [version]
+    # Basisversionen sind immer älter, die Kette endet
+    while bases.get(chain[-1]) is not None:
+        chain.append(bases[chain[-1]])
+    return chain
+
+
+def merged_rows(project_id: int, version: int, chain: list[int]):
+    """
+    Subquery with the cables of a delta version, shaped like cable_calculations
+    (version = the delta version) plus stored_version.
+    """
+    key = lineage_key(_table.c)
+    latest = select(_table).where(
+        _table.c.project_id == project_id,
+        _table.c.version.in_(chain)
+    ).distinct(key).order_by(key, _table.c.version.desc()).subquery("latest")
+
+    columns = [
+        literal(version, Integer).label("version") if c.name == "version" else c
+        for c in latest.c
+    ]
+    return select(
+        *columns, latest.c.version.label("stored_version")
+    ).where(latest.c.tombstone.is_(False)).subquery("calcs")
+
+
+def version_calcs(db: Session, project_id: int, version: int):
+    """
+    Source of the cables of a version.
+
+    Returns:
+        (calcs, in_version): CableCalculation (or an alias over the delta
+        merge) and the WHERE clauses selecting the version from it
+    """
+    chain = version_chain(db, project_id, version)
+    if len(chain) == 1:
+        return CableCalculation, (
+            CableCalculation.project_id == project_id,
+            CableCalculation.version == version
+        )
+    merged = merged_rows(project_id, version, chain)
+    return aliased(CableCalculation, merged, adapt_on_names=True), ()
+
+
+def _lock_version(db: Session, project_id: int, version: int):
+    # Sperre gegen gleichzeitige Kompaktierung derselben Version
+    return db.execute(
+        select(ProjectVersion).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        ).with_for_update()
+    ).scalar_one_or_none()
+
+
+def inherit(db: Session, project_id: int, version: int, ids) -> dict:
+    """
+    Copy-on-write: give inherited cables a row of their own in `version`.
+
+    Args:
+        ids: Cable ids as read from the version
+
+    Returns:
+        Dict id -> row id in the version (unchanged for own rows); raises
+        404 for ids that are not part of the version (no commit)
+    """
+    ids = set(ids)
+    if not _lock_version(db, project_id, version):
+        raise HTTPException(status_code=404, detail="Version not found")
+    calcs, in_version = version_calcs(db, project_id, version)
+    visible = set(db.execute(select(calcs.id).where(*in_version, calcs.id.in_(ids))).scalars())
+    missing = ids - visible
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail={"msg": "Calculation not found in version", "ids": sorted(missing)}
+        )
+
+    stored = db.execute(
+        select(_table.c.id, _table.c.version, lineage_key(_table.c)).where(_table.c.id.in_(ids))
+    ).all()
+    inherited = {key: calc_id for calc_id, stored_version, key in stored if stored_version != version}
+    mapping = {calc_id: calc_id for calc_id, stored_version, _ in stored if stored_version == version}
+    if not inherited:
+        return mapping
+
+    source = select(
+        *(_table.c[name] for name in _COPY_COLUMNS),
+        literal(version, Integer),
+        lineage_key(_table.c),
+    ).where(_table.c.id.in_(inherited.values()))
+    copied = db.execute(
+        insert(_table).from_select([*_COPY_COLUMNS, "version", "lineage_id"], source)
+        .returning(_table.c.id, _table.c.lineage_id)
+    ).all()
+    for new_id, key in copied:
+        mapping[inherited[key]] = new_id
+    return mapping
+
+
+def is_delta(db: Session, project_id: int, version: int) -> bool:
+    return db.execute(
+        select(ProjectVersion.base_version.is_not(None)).where(
+            ProjectVersion.project_id == project_id,
+            ProjectVersion.version == version
+        )
+    ).scalar() or False
+
+
+def materialize(db: Session, project_id: int, version: int) -> int | None:
+    """
+    Store a delta version fully: copy the inherited cables, drop tombstones.
+
+    Returns:
+        Number of copied rows (commits); None if the version is not a
+        (non-frozen) delta version
+    """
+    tracked = _lock_version(db, project_id, version)
+    if tracked is None or tracked.base_version is None or tracked.frozen:
+        db.rollback()
+        return None
+
+    merged = merged_rows(project_id, version, version_chain(db, project_id, version))
+    source = select(
+        *(merged.c[name] for name in _COPY_COLUMNS),
+        literal(version, Integer),
+        lineage_key(merged.c),
+    ).where(merged.c.stored_version != version)
+    copied = db.execute(
+        insert(_table).from_select([*_COPY_COLUMNS, "version", "lineage_id"], source)
+    ).rowcount
+    db.execute(
+        delete(_table).where(
+            _table.c.project_id == project_id,
+            _table.c.version == version,
+            _table.c.tombstone.is_(True)
+        )
+    )
+    tracked.base_version = None
+    # Neue ids: abgeleitete Caches verwerfen
+    tracked.updated_at = datetime.utcnow()
+    db.commit()
+    return copied
+
+
+def compact(db: Session, now: datetime | None = None) -> int:
+    """
+    Materialize delta versions with a chain deeper than MAX_DELTA_DEPTH or
+    more delta rows than COMPACT_RATIO * cable_count. Versions written
+    within COMPACT_MIN_AGE and frozen versions are left alone.
+
+    Returns:
+        Number of materialized versions
+    """
+    now = now or datetime.utcnow()
+    candidates = db.execute(
+        select(ProjectVersion.project_id, ProjectVersion.version, ProjectVersion.cable_count).where(
+            ProjectVersion.base_version.is_not(None),
+            ProjectVersion.frozen.is_(False),
+            ProjectVersion.updated_at < now - COMPACT_MIN_AGE
+        )
+    ).all()
+
+    compacted = 0
+    for project_id, version, cable_count in candidates:
+        chain = version_chain(db, project_id, version)
+        delta_rows = db.execute(
+            select(func.count()).select_from(_table).where(
+                _table.c.project_id == project_id,
+                _table.c.version.in_(chain[:-1])
+            )
+        ).scalar()
+        if len(chain) - 1 > MAX_DELTA_DEPTH or delta_rows > COMPACT_RATIO * cable_count:
+            # Inzwischen eingefroren oder schon kompaktiert: nicht zählen
+            if materialize(db, project_id, version) is not None:
+                compacted += 1
+    db.commit()
+    return compacted
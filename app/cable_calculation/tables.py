@@ -0,0 +1,293 @@
+"""
+Strombelastbarkeit und Umrechnungsfaktoren (DIN VDE 0298-4 / IEC 60364-5-52).
+
+The tables are loaded once into a read-only AmpacityCatalog (see
+get_catalog). Laying types and cable types are resolved through dicts
+(the caches of user-supplied keys are bounded), cross-sections through
+bisection over the sorted standard sizes, and the ambient temperature and
+grouping factors are linearly interpolated.
+No lookup touches the database.
+"""
+import math
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+STANDARD_CROSS_SECTIONS = (
+    1.5, 2.5, 4.0, 6.0, 10.0, 16.0, 25.0, 35.0, 50.0,
+    70.0, 95.0, 120.0, 150.0, 185.0, 240.0, 300.0,
+)
+
+# Iz (A) für Kupfer/PVC, 30 °C Luft bzw. 20 °C Erdreich
+# Verlegeart -> (2 belastete Adern, 3 belastete Adern)
+AMPACITY_CU_PVC = {
+    "A1": (
+        (14.5, 19.5, 26, 34, 46, 61, 80, 99, 119, 151, 182, 210, 240, 273, 321, 367),
+        (13.5, 18, 24, 31, 42, 56, 73, 89, 108, 136, 164, 188, 216, 245, 286, 328),
+    ),
+    "A2": (
+        (14, 18.5, 25, 32, 43, 57, 75, 92, 110, 139, 167, 192, 219, 248, 291, 334),
+        (13, 17.5, 23, 29, 39, 52, 68, 83, 99, 125, 150, 172, 196, 223, 261, 298),
+    ),
+    "B1": (
+        (17.5, 24, 32, 41, 57, 76, 101, 125, 151, 192, 232, 269, 309, 353, 415, 477),
+        (15.5, 21, 28, 36, 50, 68, 89, 110, 134, 171, 207, 239, 275, 314, 370, 426),
+    ),
+    "B2": (
+        (16.5, 23, 30, 38, 52, 69, 90, 111, 133, 168, 201, 232, 265, 300, 351, 401),
+        (15, 20, 27, 34, 46, 62, 80, 99, 118, 149, 179, 206, 236, 268, 313, 358),
+    ),
+    "C": (
+        (19.5, 27, 36, 46, 63, 85, 112, 138, 168, 213, 258, 299, 344, 392, 461, 530),
+        (17.5, 24, 32, 41, 57, 76, 96, 119, 144, 184, 223, 259, 299, 341, 403, 464),
+    ),
+    "D": (
+        (22, 29, 37, 46, 60, 78, 99, 119, 140, 173, 204, 231, 261, 292, 336, 379),
+        (18, 24, 31, 39, 52, 67, 86, 103, 122, 151, 179, 203, 230, 258, 297, 336),
+    ),
+    "E": (
+        (22, 30, 40, 51, 70, 94, 119, 148, 180, 232, 282, 328, 379, 434, 514, 593),
+        (18.5, 25, 34, 43, 60, 80, 101, 126, 153, 196, 238, 276, 319, 364, 430, 497),
+    ),
+}
+
+# Alternative Schreibweisen der Verlegeart
+LAYING_TYPE_ALIASES = {"D1": "D", "D2": "D"}
+
+# Verlegearten im Erdreich (Bezugstemperatur 20 °C)
+GROUND_LAYING_TYPES = ("D",)
+
+# Faktoren relativ zu Kupfer/PVC: (Leiter, Isolierung)
+MATERIAL_FACTORS = {
+    ("CU", "PVC"): 1.0,
+    ("CU", "XLPE"): 1.25,
+    ("AL", "PVC"): 0.78,
+    ("AL", "XLPE"): 0.97,
+}
+
+# Umrechnungsfaktoren Umgebungstemperatur (°C -> Faktor)
+AMBIENT_AIR = {
+    "PVC": ((10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 70),
+            (1.22, 1.17, 1.12, 1.06, 1.0, 0.94, 0.87, 0.79, 0.71, 0.61, 0.50, 0.0)),
+    "XLPE": ((10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 90),
+             (1.15, 1.12, 1.08, 1.04, 1.0, 0.96, 0.91, 0.87, 0.82, 0.76, 0.71, 0.65, 0.58, 0.50, 0.41, 0.0)),
+}
+AMBIENT_GROUND = {
+    "PVC": ((10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 70),
+            (1.10, 1.05, 1.0, 0.95, 0.89, 0.84, 0.77, 0.71, 0.63, 0.55, 0.45, 0.0)),
+    "XLPE": ((10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 90),
+             (1.07, 1.04, 1.0, 0.96, 0.93, 0.89, 0.85, 0.80, 0.76, 0.71, 0.65, 0.60, 0.53, 0.46, 0.38, 0.0)),
+}
+
+# Häufungsfaktoren (Anzahl Stromkreise -> Faktor)
+GROUPING_AIR = ((1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 16, 20),
+                (1.0, 0.80, 0.70, 0.65, 0.60, 0.57, 0.54, 0.52, 0.50, 0.45, 0.41, 0.38))
+GROUPING_GROUND = ((1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 16, 20),
+                   (1.0, 0.75, 0.65, 0.60, 0.55, 0.50, 0.45, 0.43, 0.41, 0.36, 0.32, 0.29))
+
+
+# Obergrenze der Caches für Schlüssel aus Benutzereingaben (beliebige Strings)
+KEY_CACHE_SIZE = 1024
+
+
+def _remember(cache: dict, key, value):
+    # Volle Caches werden geleert statt unbegrenzt zu wachsen
+    if len(cache) >= KEY_CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
+def parse_cable_type(cable_type: str):
+    """
+    Conductor material and insulation from a cable designation.
+
+    NAYY -> (AL, PVC), N2XY -> (CU, XLPE), NYM-J -> (CU, PVC)
+    """
+    code = (cable_type or "").strip().upper()
+    material = "AL" if code.startswith("NA") else "CU"
+    insulation = "XLPE" if "2X" in code else "PVC"
+    return material, insulation
+
+
+class AmpacityCatalog:
+    """
+    Read-only, array-backed ampacity tables.
+
+    Layout: base[laying, cores, section] holds Iz for copper/PVC; material,
+    ambient and grouping factors are applied on top.
+    """
+
+    def __init__(self):
+        self.sections = np.asarray(STANDARD_CROSS_SECTIONS, dtype=np.float64)
+        self.laying_types = tuple(AMPACITY_CU_PVC)
+        self.base = np.asarray(
+            [AMPACITY_CU_PVC[laying] for laying in self.laying_types],
+            dtype=np.float64,
+        )
+        self.ground = np.asarray(
+            [laying in GROUND_LAYING_TYPES for laying in self.laying_types]
+        )
+
+        self.material_keys = tuple(MATERIAL_FACTORS)
+        self.material_factors = np.asarray([MATERIAL_FACTORS[k] for k in self.material_keys])
+
+        self._laying_index = {laying: i for i, laying in enumerate(self.laying_types)}
+        self._material_index = {key: i for i, key in enumerate(self.material_keys)}
+        self._laying_cache = {}
+        self._cable_type_cache = {}
+        self._ambient_cache = {}
+
+    # --- Schlüssel auflösen ---
+    def laying_code(self, laying_type: str) -> int:
+        """Index of a laying type, -1 if unknown."""
+        code = self._laying_cache.get(laying_type)
+        if code is None:
+            key = (laying_type or "").strip().upper()
+            key = LAYING_TYPE_ALIASES.get(key, key)
+            code = _remember(self._laying_cache, laying_type, self._laying_index.get(key, -1))
+        return code
+
+    def material_code(self, cable_type: str) -> int:
+        code = self._cable_type_cache.get(cable_type)
+        if code is None:
+            code = _remember(
+                self._cable_type_cache, cable_type, self._material_index[parse_cable_type(cable_type)]
+            )
+        return code
+
+    def codes(self, values, resolve):
+        """Resolve an array of keys; each distinct value is resolved only once."""
+        lookup = {value: resolve(value) for value in dict.fromkeys(values)}
+        return np.fromiter(map(lookup.__getitem__, values), np.int64, len(values))
+
+    def section_index(self, cross_section):
+        """Next smaller-or-equal standard cross-section (bisect), -1 below 1.5 mm²."""
+        return np.searchsorted(self.sections, cross_section, side="right") - 1
+
+    # --- Faktoren ---
+    def ambient_factor(self, insulation: str, ground: bool, ambient_c: float) -> float:
+        key = (insulation, ground, ambient_c)
+        factor = self._ambient_cache.get(key)
+        if factor is None:
+            temps, factors = (AMBIENT_GROUND if ground else AMBIENT_AIR)[insulation]
+            factor = _remember(self._ambient_cache, key, float(np.interp(ambient_c, temps, factors)))
+        return factor
+
+    def ambient_factors(self, ambient_c: float):
+        """Ambient factors as array[material, ground]."""
+        return np.asarray([
+            [self.ambient_factor(insulation, ground, ambient_c) for ground in (False, True)]
+            for _material, insulation in self.material_keys
+        ])
+
+    def grouping_factor(self, circuits, ground=False):
+        """Interpolated grouping factor for the number of circuits."""
+        counts, factors = GROUPING_GROUND if ground else GROUPING_AIR
+        return np.interp(circuits, counts, factors)
+
+    # --- Lookups ---
+    def row_factors(
+        self,
+        cable_type,
+        laying_type,
+        loaded_cores,
+        ambient_c: float | None = None,
+        circuits=None,
+    ):
+        """
+        Table row and derating factor per cable, independent of the size.
+
+        Iz for section index k is base[laying, cores, k] * factor, so callers
+        can bisect over the sizes without resolving the keys again.
+
+        Returns:
+            (laying, cores, factor) index/float arrays; factor is NaN for
+            unknown laying types
+        """
+        laying = self.codes(laying_type, self.laying_code)
+        material = self.codes(cable_type, self.material_code)
+        cores = (np.asarray(loaded_cores) >= 3).astype(np.int64)
+
+        known = laying >= 0
+        laying = np.where(known, laying, 0)
+        ground = self.ground[laying]
+
+        factor = self.material_factors[material]
+        if ambient_c is not None:
+            # Faktor je (Material, Luft/Erde): nur 8 Interpolationen pro Aufruf
+            factor = factor * self.ambient_factors(ambient_c)[material, ground.astype(np.int64)]
+
+        if circuits is not None:
+            circuits = np.asarray(circuits, dtype=np.float64)
+            factor = factor * np.where(
+                ground,
+                self.grouping_factor(circuits, ground=True),
+                self.grouping_factor(circuits, ground=False),
+            )
+
+        return laying, cores, np.where(known, factor, np.nan)
+
+    def iz(
+        self,
+        cable_type,
+        laying_type,
+        loaded_cores,
+        cross_section,
+        ambient_c: float | None = None,
+        circuits=None,
+    ):
+        """
+        Vectorized Iz (A) for a single conductor set.
+
+        Args:
+            cable_type, laying_type: Arrays of strings
+            loaded_cores, cross_section: Numeric arrays
+            ambient_c: Ambient temperature; None uses the reference temperature
+            circuits: Number of grouped circuits per row; None for no grouping
+
+        Returns:
+            Float array; NaN for unknown laying types, 0 below the smallest size
+        """
+        laying, cores, factor = self.row_factors(
+            cable_type, laying_type, loaded_cores, ambient_c, circuits
+        )
+        section = self.section_index(cross_section)
+        sized = section >= 0
+
+        iz = self.base[laying, cores, np.clip(section, 0, len(self.sections) - 1)] * factor
+        return np.where(sized | np.isnan(factor), iz, 0.0)
+
+    def iz_one(
+        self,
+        cable_type: str,
+        laying_type: str,
+        loaded_cores: int,
+        cross_section: float,
+        ambient_c: float | None = None,
+        circuits: float | None = None,
+    ) -> float:
+        """Scalar Iz lookup (dict + bisect), same semantics as iz."""
+        laying = self.laying_code(laying_type)
+        if laying < 0:
+            return math.nan
+        section = bisect_right(STANDARD_CROSS_SECTIONS, cross_section) - 1
+        if section < 0:
+            return 0.0
+        material = self.material_code(cable_type)
+        ground = bool(self.ground[laying])
+
+        iz = float(self.base[laying, 1 if loaded_cores >= 3 else 0, section])
+        iz *= float(self.material_factors[material])
+        if ambient_c is not None:
+            iz *= self.ambient_factor(self.material_keys[material][1], ground, ambient_c)
+        if circuits is not None:
+            iz *= float(self.grouping_factor(circuits, ground=ground))
+        return iz
+
+
+@lru_cache(maxsize=None)
+def get_catalog() -> AmpacityCatalog:
+    """The process-wide catalog, built on first use (warmed at startup)."""
+    return AmpacityCatalog()
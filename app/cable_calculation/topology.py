@@ -0,0 +1,149 @@
+"""
+Netztopologie einer Version (origin -> destination).
+
+Every cable is an edge from its origin to its destination node. The
+cumulative voltage drop of a node is the worst (largest) sum of per-cable
+drops on any feeding path from a root. It is computed in one pass of
+Kahn's algorithm: a node is settled once, after all its feeding cables,
+and its value is reused by everything downstream, so the cost is
+O(nodes + cables) independent of the number of paths or the tree depth.
+Node names are encoded to integers through a dict (in order of first
+appearance) and the traversal runs over plain lists. The outgoing cables
+of a node are a slice of one edge list sorted by origin (CSR offsets), so
+no list is allocated per node.
+
+Nodes that are never settled lie on or behind a cycle; the cycle members
+are found by peeling the unsettled subgraph from its ends. Settled nodes
+that are not fed from the supply root are reported as orphans.
+"""
+import math
+from collections import Counter, deque
+
+import numpy as np
+
+# Zulässiger Gesamtspannungsfall vom Einspeisepunkt bis zum Verbraucher (%)
+DEFAULT_MAX_TOTAL_DROP_PCT = 4.0
+
+
+def _rank(value: float) -> float:
+    # NaN (z. B. Querschnitt 0) gilt als schlechtester Wert
+    return math.inf if value != value else value
+
+
+def _adjacency(keys, node_count: int):
+    """Edges grouped by node: (edge order, start offset per node + end)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=node_count), out=starts[1:])
+    return np.argsort(keys, kind="stable").tolist(), starts.tolist()
+
+
+def _cycle_members(src, dst, settled):
+    """Unsettled nodes on a cycle (or between cycles): peel nodes without
+    outgoing unsettled edges until nothing changes."""
+    alive = [not s for s in settled]
+    out_degree = [0] * len(settled)
+    incoming = [[] for _ in settled]
+    for s, d in zip(src, dst):
+        if alive[s] and alive[d]:
+            out_degree[s] += 1
+            incoming[d].append(s)
+
+    queue = deque(n for n, a in enumerate(alive) if a and not out_degree[n])
+    while queue:
+        node = queue.popleft()
+        alive[node] = False
+        for parent in incoming[node]:
+            out_degree[parent] -= 1
+            if not out_degree[parent] and alive[parent]:
+                queue.append(parent)
+    return alive
+
+
+def analyze(origin, destination, calc_ids, drop_pct, root: str | None = None):
+    """
+    Cumulative voltage drop per node.
+
+    Args:
+        origin, destination: Node names, one entry per cable
+        calc_ids: Cable ids
+        drop_pct: Per-cable voltage drop (%)
+        root: Supply node; default: the root that feeds the most nodes
+
+    Returns:
+        Dict with the node names, per-node lists (cumulative_drop_pct,
+        feeder_id, depth, root, consumer, cycle, orphan), the root names
+        and the supply node (None if there is none)
+    """
+    index = {}
+    src = [index.setdefault(name, len(index)) for name in origin]
+    dst = [index.setdefault(name, len(index)) for name in destination]
+    names = list(index)
+    node_count = len(names)
+    drops = list(drop_pct)
+    calc_ids = list(calc_ids)
+
+    order, starts = _adjacency(src, node_count)
+    remaining = [0] * node_count
+    for target in dst:
+        remaining[target] += 1
+
+    cumulative = [None] * node_count
+    feeder = [None] * node_count
+    depth = [None] * node_count
+    node_root = [None] * node_count
+    settled = [False] * node_count
+
+    roots = [n for n in range(node_count) if not remaining[n]]
+    for n in roots:
+        cumulative[n], depth[n], node_root[n] = 0.0, 0, n
+
+    queue = deque(roots)
+    while queue:
+        node = queue.popleft()
+        settled[node] = True
+        base, level, top = cumulative[node], depth[node] + 1, node_root[node]
+        for position in range(starts[node], starts[node + 1]):
+            edge = order[position]
+            target = dst[edge]
+            value = base + drops[edge]
+            current = cumulative[target]
+            if current is None or _rank(value) > _rank(current):
+                cumulative[target] = value
+                feeder[target] = calc_ids[edge]
+                depth[target] = level
+                node_root[target] = top
+            remaining[target] -= 1
+            if not remaining[target]:
+                queue.append(target)
+
+    if all(settled):
+        cycle = [False] * node_count
+    else:
+        cycle = _cycle_members(src, dst, settled)
+        for n in range(node_count):
+            if not settled[n]:
+                cumulative[n] = feeder[n] = depth[n] = node_root[n] = None
+
+    if root is not None:
+        supply = index.get(root)
+    elif roots:
+        fed = Counter(node_root)
+        supply = max(roots, key=fed.__getitem__)
+    else:
+        supply = None
+
+    return {
+        "names": names,
+        "cumulative_drop_pct": [
+            c if c is not None and math.isfinite(c) else None for c in cumulative
+        ],
+        "feeder_id": feeder,
+        "depth": depth,
+        "root": [names[r] if r is not None else None for r in node_root],
+        "consumer": [start == end for start, end in zip(starts, starts[1:])],
+        "cycle": cycle,
+        "orphan": [s and r != supply for s, r in zip(settled, node_root)],
+        "roots": [names[r] for r in roots],
+        "supply": names[supply] if supply is not None else None,
+    }
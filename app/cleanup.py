@@ -4,6 +4,7 @@ from datetime import datetime
 
 from app.utils.db import SessionLocal
 from app.models import RefreshToken
+from app.cable_calculation import storage
 
 def cleanup_expired_tokens():
     db: Session = SessionLocal()
@@ -12,3 +13,11 @@ def cleanup_expired_tokens():
     db.commit()
     db.close()
     print(f"Cleanup: {deleted} expired refresh tokens removed")
+
+def compact_delta_versions():
+    db: Session = SessionLocal()
+    try:
+        compacted = storage.compact(db)
+    finally:
+        db.close()
+    print(f"Cleanup: {compacted} delta versions materialized")
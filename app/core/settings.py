@@ -5,6 +5,9 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    # Connections for up to 40 sync request threads (anyio default)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
     ENV: str = "development"
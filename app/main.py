@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import os
 
 from fastapi import FastAPI
@@ -14,9 +15,13 @@ from app.project.routes import router as project_router
 from app.cable_calculation.routes import router as cable_calc_router
 from app.prices.routes import router as prices_router
 
-from app.cleanup import cleanup_expired_tokens
+from app.cable_calculation.optimizer import shutdown_pool
+from app.cable_calculation.tables import get_catalog
+from app.cleanup import cleanup_expired_tokens, compact_delta_versions
 from app.audit.middleware import AuditMiddleware
 
+logger = logging.getLogger(__name__)
+
 # Check if we're running in test mode
 TESTING = os.getenv("TESTING", "false").lower() == "true"
 
@@ -33,11 +38,25 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 origins = os.getenv("CORS_ORIGINS", "").split(",")
 
+@app.on_event("startup")
+def load_cable_tables():
+    # Belastbarkeitstabellen einmalig in den Speicher laden
+    get_catalog()
+
+@app.on_event("shutdown")
+def stop_optimizer_pool():
+    shutdown_pool()
+
 @app.on_event("startup")
 async def start_cleanup_task():
     async def run_cleanup():
         while True:
-            cleanup_expired_tokens()
+            # Im Threadpool, damit die Event-Loop nicht blockiert; ein Fehler beendet die Schleife nicht
+            for job in (cleanup_expired_tokens, compact_delta_versions):
+                try:
+                    await asyncio.to_thread(job)
+                except Exception:
+                    logger.exception("Cleanup job %s failed", job.__name__)
             await asyncio.sleep(3600)  # alle 60 Minuten
     asyncio.create_task(run_cleanup())
 
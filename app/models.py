@@ -7,7 +7,11 @@ from sqlalchemy import (
     Date,
     DateTime, 
     ForeignKey, 
-    JSON
+    Index,
+    JSON,
+    LargeBinary,
+    false,
+    func
 )
 from sqlalchemy.orm import relationship
 
@@ -67,6 +71,8 @@ class Project(Base):
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Zähler für die Versionsvergabe (siehe cable_calculation.functions.resolve_version)
+    latest_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Beziehung zu CableCalculation
     cable_calculations = relationship(
@@ -134,10 +140,70 @@ class CableCalculation(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Delta-Versionen: Kabel-Identität über Versionen (NULL = eigene id) und Löschmarker
+    lineage_id = Column(Integer, nullable=True)
+    tombstone = Column(Boolean, nullable=False, default=False, server_default=false())
+
     # Optional: Beziehung zum Projekt
     project = relationship("Project", back_populates="cable_calculations")
     owner = relationship("User")
 
+    __table_args__ = (
+        # Abfragen je Version: WHERE project_id, version ORDER BY created_at, coalesce(lineage_id, id)
+        # (ohne Lineage gleich ORDER BY created_at, id)
+        Index(
+            "ix_cable_calculations_project_version",
+            project_id, version, created_at, func.coalesce(lineage_id, id)
+        ),
+        # Delta-Ketten: DISTINCT ON (coalesce(lineage_id, id)) ORDER BY version DESC
+        Index("ix_cable_calculations_lineage", project_id, func.coalesce(lineage_id, id), version.desc()),
+    )
+
+class ProjectVersion(Base):
+    """
+    Eine Zeile je (Projekt, Version), bei jedem Schreibzugriff gepflegt.
+    """
+    __tablename__ = "project_versions"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    cable_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    frozen = Column(Boolean, nullable=False, default=False, server_default=false())  # Freigegeben, schreibgeschützt
+    base_version = Column(Integer, nullable=True)  # Delta-Version: Basisversion, NULL = vollständig gespeichert
+
+class VersionSnapshot(Base):
+    """
+    Serialisierte Kabelliste einer eingefrorenen Version (gzip-JSON).
+    """
+    __tablename__ = "version_snapshots"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    etag = Column(String(64), nullable=False)           # sha256 des unkomprimierten JSON
+    content = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)        # unkomprimiert
+    cable_count = Column(Integer, nullable=False)
+    frozen_at = Column(DateTime, default=datetime.utcnow)
+
+class EnergySummary(Base):
+    """
+    Verlustenergie je Projekt (neueste Version), vom Portfolio-Lauf gepflegt.
+    """
+    __tablename__ = "energy_summaries"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False)
+    input_hash = Column(String(32), nullable=False)     # md5 über Versionsstand und Parameter
+    cable_count = Column(Integer, nullable=False)
+    loss_kw = Column(Float, nullable=False)
+    annual_loss_kwh = Column(Float, nullable=False)
+    annual_loss_cost = Column(Float, nullable=False)
+    lifetime_loss_cost = Column(Float, nullable=False)  # Barwert über die Nutzungsdauer
+    upsize_count = Column(Integer, nullable=False)      # Kabel mit größerem wirtschaftlichem Querschnitt
+    lifetime_savings = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -154,6 +220,8 @@ class Article(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # Artikelname
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    article_number = Column(String, nullable=True)  # Lieferanten-Artikelnummer (DATANORM)
+    price_unit = Column(Integer, nullable=True)     # DATANORM-Preiseinheit: Preis gilt für 1/10/100/1000 Einheiten
 
     # Beziehung zu Kategorie
     category = relationship("Category", back_populates="articles")
@@ -161,6 +229,16 @@ class Article(Base):
     # Beziehung zu Preisen
     prices = relationship("Price", back_populates="article", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Artikelnummer je Kategorie eindeutig (Abgleich beim DATANORM-Import)
+        Index("ix_articles_category_number", "category_id", "article_number", unique=True),
+        # Stücklisten-Abgleich über den normierten Namen (cable_calculation.bom._match_key)
+        Index(
+            "ix_articles_match_key",
+            func.replace(func.replace(func.lower(name), " ", ""), ",", "."),
+        ),
+    )
+
 
 class Price(Base):
     __tablename__ = "prices"
@@ -173,3 +251,8 @@ class Price(Base):
     # Beziehung zu Artikel
     article = relationship("Article", back_populates="prices")
 
+    __table_args__ = (
+        # Neuester Preis je Artikel: DISTINCT ON (article_id) ORDER BY date DESC, id DESC
+        Index("ix_prices_article_date", article_id, date.desc(), id.desc()),
+    )
+
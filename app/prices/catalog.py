@@ -0,0 +1,118 @@
+"""
+Preiskatalog im Speicher für Stichtagsabfragen.
+
+The price history of every article is held as parallel arrays sorted by
+(date, id): dates as day ordinals, prices and price ids. The price of an
+article on day D is the last entry dated on or before D (bisect right on
+the dates; on equal dates the newest entry wins). Batch lookups answer
+many articles at one date, or one article at many dates (searchsorted
+over all dates at once).
+
+Histories are loaded on first use, all missing articles of a lookup in one
+query, and evicted least-recently-used beyond MAX_CACHED_ARTICLES.
+create_price/delete_price and article changes invalidate only the
+affected articles (functions._prices_changed); a history loaded while an
+invalidation ran is not kept.
+"""
+import itertools
+import threading
+from collections import OrderedDict
+from datetime import date
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Price
+
+# Anzahl gecachter Preisverläufe (LRU)
+MAX_CACHED_ARTICLES = 50_000
+
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64))
+
+
+def _as_of(article_id: int, day: date, history, index: int):
+    dates, prices, ids = history
+    if index < 0:
+        return {"article_id": article_id, "as_of": day, "price": None, "price_date": None, "price_id": None}
+    return {
+        "article_id": article_id,
+        "as_of": day,
+        "price": float(prices[index]),
+        "price_date": date.fromordinal(int(dates[index])),
+        "price_id": int(ids[index]),
+    }
+
+
+class PriceCatalog:
+    """Per-article price histories as sorted arrays."""
+
+    def __init__(self, max_articles: int = MAX_CACHED_ARTICLES):
+        self._histories = OrderedDict()  # article_id -> (dates, prices, ids)
+        self._max_articles = max_articles
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, article_ids=None):
+        """Drop the given articles, or all with None."""
+        with self._lock:
+            self._generation += 1
+            if article_ids is None:
+                self._histories.clear()
+            else:
+                for article_id in article_ids:
+                    self._histories.pop(article_id, None)
+
+    def histories(self, db: Session, article_ids) -> dict:
+        """Histories of the given articles, loading the missing ones in one query."""
+        with self._lock:
+            found = {a: self._histories[a] for a in article_ids if a in self._histories}
+            for article_id in found:
+                self._histories.move_to_end(article_id)
+            generation = self._generation
+        missing = [a for a in dict.fromkeys(article_ids) if a not in found]
+        if not missing:
+            return found
+
+        loaded = dict.fromkeys(missing, _EMPTY)
+        rows = db.execute(
+            select(Price.article_id, Price.date, Price.price, Price.id)
+            .where(Price.article_id.in_(missing))
+            .order_by(Price.article_id, Price.date, Price.id)
+        ).all()
+        for article_id, group in itertools.groupby(rows, key=itemgetter(0)):
+            _ids, dates, prices, ids = zip(*group)
+            loaded[article_id] = (
+                np.fromiter((d.toordinal() for d in dates), np.int64, len(dates)),
+                np.asarray(prices, dtype=np.float64),
+                np.asarray(ids, dtype=np.int64),
+            )
+        with self._lock:
+            # Während des Ladens invalidiert: Ergebnis nicht übernehmen
+            if self._generation == generation:
+                self._histories.update(loaded)
+                while len(self._histories) > self._max_articles:
+                    self._histories.popitem(last=False)
+        found.update(loaded)
+        return found
+
+    def prices_at(self, db: Session, article_ids, day: date):
+        """Price of each article on one day (price None if none before it)."""
+        histories = self.histories(db, article_ids)
+        ordinal = day.toordinal()
+        return [
+            _as_of(article_id, day, histories[article_id],
+                   int(np.searchsorted(histories[article_id][0], ordinal, side="right")) - 1)
+            for article_id in article_ids
+        ]
+
+    def price_history_at(self, db: Session, article_id: int, days):
+        """Price of one article on each of the given days."""
+        history = self.histories(db, [article_id])[article_id]
+        ordinals = np.fromiter((d.toordinal() for d in days), np.int64, len(days))
+        indexes = np.searchsorted(history[0], ordinals, side="right") - 1
+        return [_as_of(article_id, day, history, int(i)) for day, i in zip(days, indexes)]
+
+
+price_catalog = PriceCatalog()
@@ -0,0 +1,239 @@
+"""
+DATANORM-4-Import (Artikel- und Preisdateien).
+
+The file (cp850, `;`-separated records) is read line by line; only one
+batch of BATCH_SIZE articles is held in memory. Supported records:
+
+- V (Vorlaufsatz): price list date (TTMMJJ), used as date of the prices,
+- A (Artikelsatz): processing flag (N new, A changed, L discontinued),
+  article number, short texts 1 and 2 (-> Article.name), price unit
+  (0/1/2/3 -> per 1/10/100/1000 units) and price (two implied decimals),
+- P (Preisänderungssatz): up to three blocks of article number, price
+  flag and price (blocks of 7 fields).
+
+Other records (B, T, W, ...) are skipped. Articles are matched by
+(category_id, article_number); all articles of a file go into one category
+(e.g. a DIN 276 cost group). Prices are stored per single unit.
+
+The import is incremental: new articles are inserted, changed names
+updated, and a price row is only written when the price differs from the
+article's current price. Each batch is written with executemany, the
+whole file in one transaction.
+"""
+import io
+import time
+from datetime import date, datetime
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Article, Category, Price
+from app.prices.functions import _prices_changed
+
+BATCH_SIZE = 5000
+ENCODING = "cp850"
+# Fehlerbericht begrenzen, weitere Fehler werden nur gezählt
+MAX_REPORTED_ERRORS = 1000
+
+# Preiseinheit -> Anzahl Mengeneinheiten, für die der Preis gilt
+PRICE_UNITS = {"": 1, "0": 1, "1": 10, "2": 100, "3": 1000}
+P_BLOCK_FIELDS = 7
+
+
+def _price(text: str) -> float | None:
+    """Price with two implied decimals; None for an empty field."""
+    text = text.strip()
+    if not text:
+        return None
+    if not text.isdigit():
+        raise ValueError(f"Invalid price: {text!r}")
+    return int(text) / 100
+
+
+def iter_records(stream: BinaryIO) -> Iterator[tuple[int, tuple | None, str | None]]:
+    """
+    Yield (line, record, error) from a DATANORM 4 stream.
+
+    Records: ("date", date), ("article", number, flag, name, price_unit, price)
+    and ("price", number, price).
+    """
+    text = io.TextIOWrapper(stream, encoding=ENCODING, newline="")
+    for line_num, line in enumerate(text, start=1):
+        fields = line.rstrip("\r\n").split(";")
+        kind = fields[0].strip().upper()
+        try:
+            if kind == "V":
+                stamp = fields[1].strip() if len(fields) > 1 else ""
+                if len(stamp) == 6 and stamp.isdigit():
+                    yield line_num, ("date", datetime.strptime(stamp, "%d%m%y").date()), None
+            elif kind == "A":
+                if len(fields) < 10 or not fields[2].strip():
+                    yield line_num, None, "Incomplete A record"
+                    continue
+                unit = fields[7].strip()
+                if unit not in PRICE_UNITS:
+                    yield line_num, None, f"Invalid price unit: {unit!r}"
+                    continue
+                name = " ".join(part.strip() for part in fields[4:6] if part.strip())
+                yield line_num, (
+                    "article", fields[2].strip(), fields[1].strip().upper(),
+                    name, PRICE_UNITS[unit], _price(fields[9])
+                ), None
+            elif kind == "P":
+                for start in range(2, len(fields), P_BLOCK_FIELDS):
+                    block = fields[start:start + P_BLOCK_FIELDS]
+                    if len(block) >= 3 and block[0].strip():
+                        yield line_num, ("price", block[0].strip(), _price(block[2])), None
+        except ValueError as exc:
+            yield line_num, None, str(exc)
+
+
+def _flush(db: Session, category_id: int, price_date: date, batch: dict, stats: dict, changed: set):
+    """
+    Write one batch: article number -> {"name", "price_unit", "price"}.
+
+    Counts go into stats, ids of articles with a new price into changed.
+    """
+    existing = {
+        number: (article_id, name, unit)
+        for number, article_id, name, unit in db.execute(
+            select(Article.article_number, Article.id, Article.name, Article.price_unit).where(
+                Article.category_id == category_id,
+                Article.article_number.in_(batch)
+            )
+        )
+    }
+
+    new = [
+        {"name": entry["name"] or number, "category_id": category_id,
+         "article_number": number, "price_unit": entry["price_unit"]}
+        for number, entry in batch.items()
+        if number not in existing and entry["name"] is not None
+    ]
+    if new:
+        for number, article_id in db.execute(
+            insert(Article).returning(Article.article_number, Article.id), new
+        ):
+            existing[number] = (article_id, None, None)
+        stats["created_count"] += len(new)
+
+    renamed = [
+        {"id": existing[number][0], "name": entry["name"], "price_unit": entry["price_unit"]}
+        for number, entry in batch.items()
+        if number in existing and existing[number][1] is not None and entry["name"] is not None
+        and (entry["name"], entry["price_unit"]) != existing[number][1:]
+    ]
+    if renamed:
+        db.execute(update(Article), renamed)
+        stats["updated_count"] += len(renamed)
+
+    unknown = [number for number in batch if number not in existing]
+    stats["unmatched_count"] += len(unknown)
+
+    # Aktueller Preis je Artikel (neuestes Datum)
+    ids = [existing[number][0] for number in batch if number in existing]
+    current = dict(db.execute(
+        select(Price.article_id, Price.price).where(
+            Price.article_id.in_(ids)
+        ).distinct(Price.article_id).order_by(Price.article_id, Price.date.desc(), Price.id.desc())
+    ).all())
+
+    prices = []
+    for number, entry in batch.items():
+        if number not in existing or entry["price"] is None:
+            continue
+        article_id, _name, stored_unit = existing[number]
+        unit = entry["price_unit"] or stored_unit or 1
+        price = entry["price"] / unit
+        if article_id in current and abs(current[article_id] - price) < 1e-9:
+            stats["price_unchanged_count"] += 1
+            continue
+        prices.append({"article_id": article_id, "date": price_date, "price": price})
+    if prices:
+        db.execute(insert(Price), prices)
+        stats["price_changed_count"] += len(prices)
+        changed.update(p["article_id"] for p in prices)
+
+
+def import_datanorm(
+    db: Session,
+    stream: BinaryIO,
+    category_id: int,
+    price_date: date | None = None,
+    batch_size: int = BATCH_SIZE,
+):
+    """
+    Import a DATANORM 4 file into a category in one transaction.
+
+    Args:
+        price_date: Date of the prices, default: from the V record, else today
+
+    Returns:
+        Dict with record and write counts, rejected lines and the duration
+    """
+    if db.get(Category, category_id) is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    started = time.perf_counter()
+    stats = {
+        "records_read": 0,
+        "article_records": 0,
+        "price_records": 0,
+        "created_count": 0,
+        "updated_count": 0,
+        "price_changed_count": 0,
+        "price_unchanged_count": 0,
+        "unmatched_count": 0,
+        "discontinued_count": 0,
+        "error_count": 0,
+    }
+    errors = []
+    changed = set()
+    batch = {}
+    for line_num, record, error in iter_records(stream):
+        stats["records_read"] += 1
+        if error:
+            stats["error_count"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_num, "error": error})
+            continue
+        if record is None:
+            continue
+        if record[0] == "date":
+            price_date = price_date or record[1]
+            continue
+
+        if record[0] == "article":
+            _kind, number, flag, name, unit, price = record
+            stats["article_records"] += 1
+            if flag == "L":
+                # Auslaufartikel: bleiben mit ihrer Preishistorie erhalten
+                stats["discontinued_count"] += 1
+                continue
+            entry = batch.setdefault(number, {"name": None, "price_unit": None, "price": None})
+            entry.update(name=name, price_unit=unit)
+            if price is not None:
+                entry["price"] = price
+        else:
+            _kind, number, price = record
+            stats["price_records"] += 1
+            entry = batch.setdefault(number, {"name": None, "price_unit": None, "price": None})
+            entry["price"] = price
+
+        if len(batch) >= batch_size:
+            _flush(db, category_id, price_date or date.today(), batch, stats, changed)
+            batch = {}
+    if batch:
+        _flush(db, category_id, price_date or date.today(), batch, stats, changed)
+    db.commit()
+    if stats["created_count"] or stats["updated_count"] or changed:
+        _prices_changed(changed)
+
+    return {
+        **stats,
+        "price_date": price_date or date.today(),
+        "errors": errors,
+        "duration_s": time.perf_counter() - started,
+    }
@@ -1,6 +1,22 @@
+import itertools
+from datetime import date
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models import Category, Article, Price
 from app.schemas.prices import CategoryCreate, ArticleCreate, PriceCreate
+from app.prices.catalog import price_catalog
+
+# Änderungszähler für Artikel/Preise, damit abgeleitete Caches (z. B. die
+# Stückliste einer Kabelberechnung) veraltete Einträge erkennen
+_revisions = itertools.count(1)
+price_revision = 0
+
+def _prices_changed(article_ids=None):
+    """Bump price_revision and drop the articles (None: all) from the price catalog."""
+    global price_revision
+    price_revision = next(_revisions)
+    price_catalog.invalidate(article_ids)
 
 # --- Category ---
 def create_category(db: Session, category: CategoryCreate):
@@ -28,6 +44,7 @@ def delete_category(db: Session, cat_id: int):
         return None
     db.delete(db_cat)
     db.commit()
+    _prices_changed()
     return True
 
 
@@ -36,6 +53,7 @@ def create_article(db: Session, article: ArticleCreate):
     db_article = Article(**article.dict())
     db.add(db_article)
     db.commit()
+    _prices_changed([db_article.id])
     db.refresh(db_article)
     return db_article
 
@@ -49,6 +67,7 @@ def update_article(db: Session, article_id: int, article: ArticleCreate):
     db_article.name = article.name
     db_article.category_id = article.category_id
     db.commit()
+    _prices_changed([article_id])
     db.refresh(db_article)
     return db_article
 
@@ -58,6 +77,7 @@ def delete_article(db: Session, article_id: int):
         return None
     db.delete(db_article)
     db.commit()
+    _prices_changed([article_id])
     return True
 
 
@@ -66,16 +86,64 @@ def create_price(db: Session, price: PriceCreate):
     db_price = Price(**price.dict())
     db.add(db_price)
     db.commit()
+    _prices_changed([price.article_id])
     db.refresh(db_price)
     return db_price
 
 def get_prices_by_article(db: Session, article_id: int):
     return db.query(Price).filter_by(article_id=article_id).all()
 
+def get_current_prices(db: Session, category_id: int | None = None):
+    """
+    Latest price of every article (of one category or all), in one query.
+
+    DISTINCT ON (article_id) over ix_prices_article_date; articles without
+    prices are left out.
+    """
+    stmt = select(
+        Price.article_id,
+        Article.name.label("article_name"),
+        Article.category_id,
+        Price.id.label("price_id"),
+        Price.price,
+        Price.date,
+    ).join(
+        Article, Article.id == Price.article_id
+    ).distinct(
+        Price.article_id
+    ).order_by(
+        Price.article_id, Price.date.desc(), Price.id.desc()
+    )
+    if category_id is not None:
+        stmt = stmt.where(Article.category_id == category_id)
+    return [row._asdict() for row in db.execute(stmt)]
+
+def get_prices_as_of(
+    db: Session,
+    day: date,
+    article_ids: list[int] | None = None,
+    category_id: int | None = None
+):
+    """Price of many articles on one day (given ids, a category, or all articles)."""
+    if article_ids is None:
+        stmt = select(Article.id).order_by(Article.id)
+        if category_id is not None:
+            stmt = stmt.where(Article.category_id == category_id)
+        article_ids = list(db.execute(stmt).scalars())
+    return price_catalog.prices_at(db, article_ids, day)
+
+def get_article_prices_as_of(db: Session, article_id: int, days: list[date]):
+    """Price of one article on many days; None if the article does not exist."""
+    if db.get(Article, article_id) is None:
+        return None
+    return price_catalog.price_history_at(db, article_id, days)
+
 def delete_price(db: Session, price_id: int):
     db_price = db.query(Price).filter_by(id=price_id).first()
     if not db_price:
         return None
+    article_id = db_price.article_id
     db.delete(db_price)
     db.commit()
+    _prices_changed([article_id])
     return True
@@ -0,0 +1,227 @@
+"""
+Massenimport von Lieferanten-Preislisten (CSV).
+
+The upload is streamed with PostgreSQL COPY into a temporary staging table
+(all columns text, dropped on commit); nothing is parsed in Python. The
+header row names the columns: article (or article_name / name), date and
+price, in any order; other columns are ignored. The delimiter (`,` `;` or
+tab) is sniffed from the header.
+
+In SQL, dates (ISO or DD.MM.YYYY) and prices (decimal point or decimal
+comma) are checked with pg_input_is_valid, article names are resolved to
+Article ids with one join (a name matching several articles is
+ambiguous), and the new prices are written with a single INSERT ... SELECT
+that skips exact duplicates of (article_id, date, price), both within the
+file and against existing prices. Everything runs in one transaction.
+"""
+import csv
+import time
+from typing import BinaryIO
+
+import psycopg2
+from fastapi import HTTPException
+from sqlalchemy import (
+    BigInteger, Column, Date, Float, Identity, MetaData, Table, Text,
+    and_, case, cast, exists, func, insert, select,
+)
+from sqlalchemy.orm import Session
+
+from app.models import Article, Price
+from app.prices.functions import _prices_changed
+
+# Fehlerbericht begrenzen, weitere Fehler werden nur gezählt
+MAX_REPORTED_ERRORS = 1000
+
+# Kopfzeile -> Staging-Spalte
+HEADER_ALIASES = {
+    "article": "article",
+    "article_name": "article",
+    "name": "article",
+    "date": "date",
+    "price": "price",
+}
+REQUIRED_COLUMNS = ("article", "date", "price")
+
+# Python- -> PostgreSQL-Kodierung für COPY
+ENCODINGS = {"utf-8": "UTF8", "cp1252": "WIN1252", "latin-1": "LATIN1"}
+
+
+def _staging_table(columns):
+    return Table(
+        "price_staging", MetaData(),
+        Column("line", BigInteger, Identity()),
+        *(Column(name, Text) for name in columns),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+
+def _read_header(stream: BinaryIO, encoding: str):
+    """Staging column per CSV column and the delimiter, from the header line."""
+    try:
+        header = stream.readline().decode(encoding).lstrip("\ufeff")
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Header line is not valid {encoding}: {exc.reason}, choose the file encoding"
+        )
+    try:
+        delimiter = csv.Sniffer().sniff(header, delimiters=",;\t").delimiter
+    except csv.Error:
+        delimiter = ","
+    names = next(csv.reader([header], delimiter=delimiter), [])
+    columns = [
+        HEADER_ALIASES.get(name.strip().lower(), f"ignored_{i}")
+        for i, name in enumerate(names)
+    ]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing or len(set(columns)) != len(columns):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Header needs the columns article, date and price once each, got: {header.strip()!r}"
+        )
+    return columns, delimiter
+
+
+def _parsed(staging: Table, category_id: int | None):
+    """Staging rows with resolved article and parsed date/price (NULL where invalid)."""
+    date_text = func.regexp_replace(
+        func.trim(staging.c.date), r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$", r"\3-\2-\1"
+    )
+    price_text = func.trim(staging.c.price)
+    # Dezimalkomma: Tausenderpunkte entfernen
+    price_text = case(
+        (func.strpos(price_text, ",") > 0, func.replace(func.replace(price_text, ".", ""), ",", ".")),
+        else_=price_text,
+    )
+    valid = func.coalesce(and_(
+        func.trim(staging.c.article) != "",
+        func.pg_input_is_valid(date_text, "date"),
+        func.pg_input_is_valid(price_text, "double precision"),
+    ), False)
+
+    names = select(
+        Article.name,
+        func.min(Article.id).label("article_id"),
+        func.count().label("matches"),
+    ).group_by(Article.name)
+    if category_id is not None:
+        names = names.where(Article.category_id == category_id)
+    names = names.subquery("names")
+
+    return select(
+        staging.c.line,
+        func.trim(staging.c.article).label("article_name"),
+        valid.label("valid"),
+        names.c.article_id,
+        names.c.matches,
+        # CASE: nur gültige Werte umwandeln
+        case((valid, cast(date_text, Date))).label("date"),
+        case((valid, cast(price_text, Float))).label("price"),
+    ).select_from(
+        staging.outerjoin(names, names.c.name == func.trim(staging.c.article))
+    ).subquery("parsed")
+
+
+def import_prices(
+    db: Session,
+    stream: BinaryIO,
+    category_id: int | None = None,
+    encoding: str = "utf-8",
+):
+    """
+    Import a supplier price list (CSV) in one transaction.
+
+    Args:
+        category_id: Resolve article names within this category only
+        encoding: File encoding, a key of ENCODINGS
+
+    Returns:
+        Dict with counts, the first MAX_REPORTED_ERRORS rejected lines and
+        the timings of the phases (s)
+    """
+    started = time.perf_counter()
+    columns, delimiter = _read_header(stream, encoding)
+    staging = _staging_table(columns)
+    connection = db.connection()
+    staging.create(connection)
+
+    delimiter_sql = r"E'\t'" if delimiter == "\t" else f"'{delimiter}'"
+    copy_sql = (
+        f"COPY price_staging ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, DELIMITER {delimiter_sql}, ENCODING '{ENCODINGS[encoding]}')"
+    )
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(copy_sql, stream)
+    except psycopg2.Error as exc:
+        db.rollback()
+        context = f" ({exc.diag.context.strip()})" if exc.diag.context else ""
+        # COPY zählt Zeilen ohne Kopfzeile
+        raise HTTPException(
+            status_code=400,
+            detail=f"COPY failed: {exc.diag.message_primary}{context}, line numbers exclude the header"
+        )
+    rows_read = cursor.rowcount
+    copied = time.perf_counter()
+
+    parsed = _parsed(staging, category_id)
+    counts = db.execute(select(
+        func.count().filter(~parsed.c.valid),
+        func.count().filter(parsed.c.valid, parsed.c.article_id.is_(None)),
+        func.count().filter(parsed.c.valid, parsed.c.matches > 1),
+        func.count().filter(parsed.c.valid, parsed.c.matches == 1),
+    )).one()
+    invalid_count, unmatched_count, ambiguous_count, matched_count = counts
+
+    reason = case(
+        (~parsed.c.valid, "invalid"),
+        (parsed.c.article_id.is_(None), "unknown article"),
+        else_="ambiguous article",
+    )
+    errors = [
+        {"line": line + 1, "article_name": name, "reason": why}
+        for line, name, why in db.execute(
+            select(parsed.c.line, parsed.c.article_name, reason)
+            .where(~parsed.c.valid | parsed.c.article_id.is_(None) | (parsed.c.matches > 1))
+            .order_by(parsed.c.line)
+            .limit(MAX_REPORTED_ERRORS)
+        )
+    ]
+    resolved = time.perf_counter()
+
+    candidates = select(
+        parsed.c.article_id, parsed.c.date, parsed.c.price
+    ).where(
+        parsed.c.valid,
+        parsed.c.matches == 1,
+        ~exists().where(
+            Price.article_id == parsed.c.article_id,
+            Price.date == parsed.c.date,
+            Price.price == parsed.c.price,
+        )
+    ).distinct()
+    inserted = db.execute(
+        insert(Price).from_select(["article_id", "date", "price"], candidates)
+        .returning(Price.article_id)
+    ).scalars().all()
+    db.commit()
+    if inserted:
+        _prices_changed(set(inserted))
+    finished = time.perf_counter()
+
+    return {
+        "rows_read": rows_read,
+        "inserted_count": len(inserted),
+        "duplicate_count": matched_count - len(inserted),
+        "invalid_count": invalid_count,
+        "unmatched_count": unmatched_count,
+        "ambiguous_count": ambiguous_count,
+        "errors": errors,
+        "timings": {
+            "copy_s": copied - started,
+            "resolve_s": resolved - copied,
+            "insert_s": finished - resolved,
+            "total_s": finished - started,
+        },
+    }
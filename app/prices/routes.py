@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from datetime import date
+from typing import Literal
 from sqlalchemy.orm import Session
 
 from app.models import User
 from app.utils.db import get_db
 from app.utils.auth import get_current_user
 
-from app.schemas.prices import CategoryCreate, CategoryRead, ArticleCreate, ArticleRead, PriceCreate, PriceRead
+from app.schemas.prices import (
+    CategoryCreate, CategoryRead, ArticleCreate, ArticleRead, PriceCreate, PriceRead,
+    CurrentPriceRead, PriceAsOfRead, PriceSeries, PriceImportResult, DatanormImportResult,
+)
 
+from app.prices import datanorm, importer, series
 from app.prices.functions import (
     create_category, get_categories, update_category, delete_category,
     create_article, get_articles_by_category, update_article, delete_article,
-    create_price, get_prices_by_article, delete_price
+    create_price, get_prices_by_article, get_current_prices, get_prices_as_of,
+    get_article_prices_as_of, delete_price
 )
 
 router = APIRouter()
@@ -68,10 +75,102 @@ def remove_article(article_id: int, db: Session = Depends(get_db), current_user:
 def add_price(price: PriceCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return create_price(db, price)
 
+@router.post("/prices/import", response_model=PriceImportResult)
+def import_price_list(
+    category_id: int | None = Query(None, description="Match article names within this category only"),
+    encoding: Literal[tuple(importer.ENCODINGS)] = Query("utf-8", description="File encoding"),
+    file: UploadFile = File(..., description="CSV with the columns article, date, price (header row)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a supplier price list in one transaction.
+
+    Rows are loaded with COPY into a staging table; prices already stored
+    with the same article, date and price are skipped. Invalid rows and
+    unknown or ambiguous article names are reported by line.
+    """
+    return importer.import_prices(db, file.file, category_id, encoding)
+
+@router.post("/datanorm", response_model=DatanormImportResult)
+def import_datanorm_file(
+    category_id: int = Query(..., description="Category receiving the articles (e.g. a DIN 276 cost group)"),
+    price_date: date | None = Query(None, description="Date of the prices, default: from the V record, else today"),
+    batch_size: int = Query(datanorm.BATCH_SIZE, ge=1, le=50000, description="Articles per write batch"),
+    file: UploadFile = File(..., description="DATANORM 4 article / price file (cp850)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a DATANORM 4 file line by line in one transaction.
+
+    Articles are matched by article number within the category; only
+    new articles, changed names and changed prices are written.
+    """
+    return datanorm.import_datanorm(db, file.file, category_id, price_date, batch_size)
+
 @router.get("/articles/{article_id}/prices", response_model=list[PriceRead])
 def list_prices(article_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return get_prices_by_article(db, article_id)
 
+@router.get("/prices/current", response_model=list[CurrentPriceRead])
+def list_current_prices(
+    category_id: int | None = Query(None, description="Only articles of this category, default: all"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Latest price (by date) of every article that has a price."""
+    return get_current_prices(db, category_id)
+
+@router.get("/prices/as_of", response_model=list[PriceAsOfRead])
+def list_prices_as_of(
+    day: date = Query(..., alias="date", description="Reference date"),
+    article_id: list[int] | None = Query(None, description="Articles, default: all of the category"),
+    category_id: int | None = Query(None, description="Category if no article_id is given, default: all"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Price of every requested article valid on the given date (latest price dated on or before it)."""
+    return get_prices_as_of(db, day, article_id, category_id)
+
+@router.get("/articles/{article_id}/prices/as_of", response_model=list[PriceAsOfRead])
+def list_article_prices_as_of(
+    article_id: int,
+    days: list[date] = Query(..., alias="date", description="Reference dates (repeatable)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Price of one article valid on each of the given dates."""
+    prices = get_article_prices_as_of(db, article_id, days)
+    if prices is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return prices
+
+@router.get("/articles/{article_id}/series", response_model=PriceSeries)
+def read_article_series(
+    article_id: int,
+    bucket: Literal[series.SERIES_BUCKETS] = Query("month", description="Interval per point"),
+    max_points: int | None = Query(None, ge=1, description="Merge consecutive buckets down to this many points"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Min, max, mean, last price and count per interval."""
+    result = series.article_series(db, article_id, bucket, max_points)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return result
+
+@router.get("/categories/{category_id}/series", response_model=list[PriceSeries])
+def read_category_series(
+    category_id: int,
+    bucket: Literal[series.SERIES_BUCKETS] = Query("month", description="Interval per point"),
+    max_points: int | None = Query(None, ge=1, description="Merge consecutive buckets down to this many points (per article)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Price series of every article of the category that has prices."""
+    return series.category_series(db, category_id, bucket, max_points)
+
 @router.delete("/prices/{price_id}")
 def remove_price(price_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     deleted = delete_price(db, price_id)
@@ -0,0 +1,106 @@
+"""
+Preisverlauf als Zeitreihe.
+
+Prices are aggregated per article and bucket (date_trunc day, week, month,
+quarter or year) in one SQL GROUP BY: min, max, sum, count and the last
+price of the bucket (newest by date, then id). The mean is sum / count.
+
+Long series are downsampled to at most max_points: consecutive buckets are
+merged in equal steps with NumPy reduceat (min of the minima, max of the
+maxima, count-weighted mean, last of the last bucket). A merged point
+carries the start date of its first bucket.
+"""
+import itertools
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.orm import Session
+
+from app.models import Article, Price
+
+SERIES_BUCKETS = ("day", "week", "month", "quarter", "year")
+
+
+def _series_statement(bucket: str):
+    start = cast(func.date_trunc(bucket, Price.date), Date)
+    return select(
+        Price.article_id,
+        start.label("bucket"),
+        func.min(Price.price),
+        func.max(Price.price),
+        func.sum(Price.price),
+        func.count(),
+        array_agg(aggregate_order_by(Price.price, Price.date.desc(), Price.id.desc()))[1],
+    ).group_by(
+        Price.article_id, start
+    ).order_by(
+        Price.article_id, start
+    )
+
+
+def downsample(rows, max_points: int | None = None):
+    """
+    Merge consecutive buckets so that at most max_points remain.
+
+    Args:
+        rows: Tuples (bucket, min, max, sum, count, last), ordered by bucket
+
+    Returns:
+        (list of point dicts, number of buckets merged per point)
+    """
+    if not rows:
+        return [], 1
+    starts, mins, maxs, sums, counts, lasts = zip(*rows)
+    n = len(starts)
+    step = -(-n // max_points) if max_points and n > max_points else 1
+    first = np.arange(0, n, step)
+    last = np.append(first[1:], n) - 1
+
+    counts = np.add.reduceat(np.asarray(counts, dtype=np.int64), first)
+    sums = np.add.reduceat(np.asarray(sums, dtype=np.float64), first)
+    points = zip(
+        (starts[i] for i in first),
+        np.minimum.reduceat(np.asarray(mins, dtype=np.float64), first).tolist(),
+        np.maximum.reduceat(np.asarray(maxs, dtype=np.float64), first).tolist(),
+        (sums / counts).tolist(),
+        np.asarray(lasts, dtype=np.float64)[last].tolist(),
+        counts.tolist(),
+    )
+    keys = ("bucket", "min", "max", "mean", "last", "count")
+    return [dict(zip(keys, point)) for point in points], step
+
+
+def _series(article_id: int, name: str, bucket: str, rows, max_points: int | None):
+    points, step = downsample([row[1:] for row in rows], max_points)
+    return {
+        "article_id": article_id,
+        "article_name": name,
+        "bucket": bucket,
+        "buckets_per_point": step,
+        "points": points,
+    }
+
+
+def article_series(db: Session, article_id: int, bucket: str = "month", max_points: int | None = None):
+    """Price series of one article; None if the article does not exist."""
+    article = db.get(Article, article_id)
+    if article is None:
+        return None
+    rows = db.execute(_series_statement(bucket).where(Price.article_id == article_id)).all()
+    return _series(article.id, article.name, bucket, rows, max_points)
+
+
+def category_series(db: Session, category_id: int, bucket: str = "month", max_points: int | None = None):
+    """Price series of every article of a category with prices (one query), by article id."""
+    names = dict(db.execute(
+        select(Article.id, Article.name).where(Article.category_id == category_id)
+    ).all())
+    rows = db.execute(
+        _series_statement(bucket).where(Price.article_id.in_(names))
+    ).all() if names else []
+    return [
+        _series(article_id, names[article_id], bucket, list(group), max_points)
+        for article_id, group in itertools.groupby(rows, key=itemgetter(0))
+    ]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal
 
 class CableCalculationBase(BaseModel):
     origin: str
@@ -29,4 +30,315 @@ class CableCalculationRead(CableCalculationBase):
     class Config:
         from_attributes = True  # For Pydantic v2, use orm_mode = True for v1
 
-    
+
+class CableCalculationOverrides(BaseModel):
+    origin: str | None = None
+    destination: str | None = None
+    cable_type: str | None = None
+    cable_length_m: float | None = None
+    number_of_cables: int | None = None
+    total_cores: int | None = None
+    loaded_cores: int | None = None
+    cross_section_l: float | None = None
+    cross_section_pe: float | None = None
+    laying_type: str | None = None
+    fuse_rating_a: float | None = None
+    nominal_current_a: float | None = None
+
+
+class CableCalculationClone(BaseModel):
+    source_version: int | None = None  # Default: latest version
+    overrides: CableCalculationOverrides | None = None
+    delta: bool = False  # Nur Änderungen gegenüber der (eingefrorenen) Quelle speichern
+
+
+class CableCalculationCloneResult(BaseModel):
+    project_id: int
+    source_version: int
+    version: int
+    cable_count: int
+    stored_count: int  # Physisch geschriebene Zeilen
+
+
+class CableCalculationFieldChange(BaseModel):
+    old: Any
+    new: Any
+    delta: float | None = None  # Nur für numerische Felder
+
+
+class CableCalculationChange(BaseModel):
+    origin: str
+    destination: str
+    cable_type: str
+    from_id: int
+    to_id: int
+    changes: Dict[str, CableCalculationFieldChange]
+
+
+class CableCalculationDiff(BaseModel):
+    project_id: int
+    from_version: int
+    to_version: int
+    added: List[CableCalculationRead]
+    removed: List[CableCalculationRead]
+    changed: List[CableCalculationChange]
+    unchanged_count: int
+
+
+class CableCalculationRowError(BaseModel):
+    index: int
+    line: int | None = None  # Zeile in der Importdatei
+    errors: List[Dict[str, Any]]
+
+
+class CableCalculationBulkResult(BaseModel):
+    version: int | None = None
+    created: List[CableCalculationRead]
+    errors: List[CableCalculationRowError]
+
+
+class CableCalculationImportChunk(BaseModel):
+    chunk: int
+    rows: int
+    inserted: int
+    errors: int
+
+
+class CableCalculationImportResult(BaseModel):
+    version: int | None = None
+    rows_read: int
+    inserted: int
+    error_count: int
+    chunks: List[CableCalculationImportChunk]
+    errors: List[CableCalculationRowError]
+
+
+class CableCalculationResult(BaseModel):
+    id: int
+    voltage_drop_v: float | None
+    voltage_drop_pct: float | None
+    loop_impedance_ohm: float | None
+    iz_a: float | None
+    ib_le_in: bool
+    in_le_iz: bool
+    voltage_drop_ok: bool
+    ok: bool
+
+
+class CableCalculationSummary(BaseModel):
+    cable_count: int
+    total_length_m: float
+    max_voltage_drop_pct: float | None = None
+    failed_count: int
+
+
+class CableCalculationResults(BaseModel):
+    project_id: int
+    version: int
+    summary: CableCalculationSummary
+    results: List[CableCalculationResult]
+
+
+class CableCalculationShortCircuitResult(BaseModel):
+    id: int
+    ik_max_a: float | None
+    ik_min_a: float | None
+    disconnect_time_s: float
+    ia_a: float
+    disconnection_ok: bool
+    pe_min_mm2: float | None  # adiabatischer Mindestquerschnitt
+    pe_adiabatic_ok: bool
+    pe_table_ok: bool
+    pe_ok: bool
+    ok: bool
+
+
+class CableCalculationShortCircuitSummary(BaseModel):
+    cable_count: int
+    min_ik_min_a: float | None = None
+    disconnection_failed_count: int
+    pe_failed_count: int
+    failed_count: int
+
+
+class CableCalculationShortCircuit(BaseModel):
+    project_id: int
+    version: int
+    summary: CableCalculationShortCircuitSummary
+    results: List[CableCalculationShortCircuitResult]
+
+
+class CableCalculationScenarioEdit(BaseModel):
+    field: str
+    op: Literal["set", "scale", "add"] = "set"
+    value: float | str
+    where: Dict[str, float | str] | None = None  # Gleichheitsfilter je Spalte
+    ids: List[int] | None = None
+
+
+class CableCalculationScenarioInfo(BaseModel):
+    scenario_id: str
+    project_id: int
+    version: int
+    cable_count: int
+
+
+class CableCalculationScenario(BaseModel):
+    scenario_id: str
+    project_id: int
+    version: int
+    edit_count: int
+    changed_count: int
+    matched: List[int] | None = None  # Treffer je Änderung (nur nach POST .../edits)
+    summary: CableCalculationSummary
+    results: List[CableCalculationResult]
+
+
+class CableCalculationSnapshot(BaseModel):
+    project_id: int
+    version: int
+    etag: str
+    cable_count: int
+    size_bytes: int
+    compressed_bytes: int
+    frozen_at: datetime
+
+
+class CableCalculationPatch(CableCalculationOverrides):
+    id: int
+
+
+class CableCalculationBulkUpdateResult(BaseModel):
+    updated: int
+
+
+class CableCalculationSuggestion(BaseModel):
+    id: int | None = None
+    cross_section_l: float
+    cross_section_pe: float
+    suggested_cross_section_l: float | None  # None: kein Standardquerschnitt passt
+    suggested_cross_section_pe: float | None
+    voltage_drop_pct: float | None
+    iz_a: float | None
+    changed: bool
+    reason: str | None = None
+
+
+class CableCalculationOptimization(BaseModel):
+    project_id: int
+    version: int
+    changed_count: int
+    infeasible_count: int
+    suggestions: List[CableCalculationSuggestion]
+    edits: List[CableCalculationPatch]  # Für PATCH /cable_calculation/bulk
+
+
+class CableCalculationBomItem(BaseModel):
+    cable_type: str
+    total_cores: int
+    cross_section: float
+    cable_count: int
+    length_m: float
+    article_id: int | None = None  # None: kein passender Artikel / Preis
+    article_name: str | None = None
+    unit_price: float | None = None  # Preis je Meter
+    price_date: date | None = None
+    cost: float | None = None
+
+
+class CableCalculationBom(BaseModel):
+    project_id: int
+    version: int
+    items: List[CableCalculationBomItem]
+    total_cost: float
+    unpriced_count: int
+
+
+class CableCalculationNode(BaseModel):
+    name: str
+    cumulative_drop_pct: float | None  # None: Zyklus / nicht erreichbar
+    feeder_id: int | None  # Kabel auf dem ungünstigsten Pfad
+    depth: int | None
+    root: str | None
+    consumer: bool
+    cycle: bool
+    orphan: bool
+    ok: bool | None
+
+
+class CableCalculationTopology(BaseModel):
+    project_id: int
+    version: int
+    supply: str | None
+    node_count: int
+    cable_count: int
+    max_cumulative_drop_pct: float | None
+    failed_count: int
+    roots: List[str]
+    cycles: List[str]
+    orphans: List[str]
+    nodes: List[CableCalculationNode]
+
+
+class CableCalculationBoardLoad(BaseModel):
+    name: str
+    circuit_count: int
+    connected_load_a: float | None  # None: Zyklus unterhalb
+    diversity_factor: float
+    demand_a: float | None
+    feeder_current_a: float | None  # None: Einspeisung (Wurzel)
+    feeder_fuse_a: float | None
+    ok: bool | None
+    root: bool
+
+
+class CableCalculationLoads(BaseModel):
+    project_id: int
+    version: int
+    board_count: int
+    total_demand_a: float | None
+    failed_count: int
+    boards: List[CableCalculationBoardLoad]
+
+
+class CableCalculationEnergyResult(BaseModel):
+    id: int
+    loss_w: float | None  # I²R-Verluste bei Ib
+    annual_loss_kwh: float | None
+    annual_loss_cost: float | None
+    lifetime_loss_cost: float | None  # Barwert über die Nutzungsdauer
+    economic_section_mm2: float
+    lifetime_savings: float | None  # Barwert abzüglich Mehrkosten Leiter
+    upsize: bool
+
+
+class CableCalculationEnergySummary(BaseModel):
+    cable_count: int
+    loss_kw: float
+    annual_loss_kwh: float
+    annual_loss_cost: float
+    lifetime_loss_cost: float
+    upsize_count: int
+    lifetime_savings: float
+
+
+class CableCalculationEnergy(BaseModel):
+    project_id: int
+    version: int
+    summary: CableCalculationEnergySummary
+    results: List[CableCalculationEnergyResult]
+
+
+class CableCalculationEnergyPortfolioItem(CableCalculationEnergySummary):
+    project_id: int
+    project_name: str
+    version: int
+    refreshed_at: datetime
+
+
+class CableCalculationEnergyRefresh(BaseModel):
+    project_count: int
+    refreshed_count: int
+    skipped_count: int  # Eingabe-Hash unverändert
+    cable_count: int
+    duration_s: float
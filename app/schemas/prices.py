@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
+from typing import Dict
 
 # --- Category ---
 class CategoryBase(BaseModel):
@@ -24,6 +25,7 @@ class ArticleCreate(ArticleBase):
 class ArticleRead(ArticleBase):
     id: int
     category_id: int
+    article_number: str | None = None  # aus DATANORM-Import
     class Config:
         orm_mode = True
 
@@ -41,3 +43,65 @@ class PriceRead(PriceBase):
     article_id: int
     class Config:
         orm_mode = True
+
+class PriceAsOfRead(BaseModel):
+    article_id: int
+    as_of: date
+    price: float | None  # None: kein Preis bis zum Stichtag
+    price_date: date | None
+    price_id: int | None
+
+class PriceSeriesPoint(BaseModel):
+    bucket: date  # Beginn des (ersten) Intervalls
+    min: float
+    max: float
+    mean: float
+    last: float
+    count: int
+
+class PriceSeries(BaseModel):
+    article_id: int
+    article_name: str
+    bucket: str
+    buckets_per_point: int  # > 1: ausgedünnt (max_points)
+    points: list[PriceSeriesPoint]
+
+class PriceImportError(BaseModel):
+    line: int  # Zeile in der Importdatei
+    article_name: str | None
+    reason: str  # "invalid", "unknown article", "ambiguous article"
+
+class PriceImportResult(BaseModel):
+    rows_read: int
+    inserted_count: int
+    duplicate_count: int  # (article_id, date, price) schon vorhanden oder doppelt in der Datei
+    invalid_count: int
+    unmatched_count: int
+    ambiguous_count: int
+    errors: list[PriceImportError]
+    timings: Dict[str, float]  # Sekunden je Phase
+
+class DatanormImportError(BaseModel):
+    line: int
+    error: str
+
+class DatanormImportResult(BaseModel):
+    records_read: int
+    article_records: int
+    price_records: int
+    created_count: int
+    updated_count: int  # Bezeichnung oder Preiseinheit geändert
+    price_changed_count: int
+    price_unchanged_count: int
+    unmatched_count: int  # Preissätze ohne bekannten Artikel
+    discontinued_count: int  # Verarbeitungsmerker L, nicht gelöscht
+    error_count: int
+    price_date: date
+    errors: list[DatanormImportError]
+    duration_s: float
+
+class CurrentPriceRead(PriceBase):
+    article_id: int
+    article_name: str
+    category_id: int
+    price_id: int
@@ -20,7 +20,15 @@ def get_db():
 
 # Only enable echo in development mode for debugging
 echo_sql = env_mode == "development"
-engine = create_engine(DATABASE_URL, echo=echo_sql, future=True)
+# Pool must cover the threadpool, otherwise threads waiting for a connection
+# block the threads that would release one
+engine = create_engine(
+    DATABASE_URL,
+    echo=echo_sql,
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
@@ -0,0 +1,65 @@
+# scripts/bench_ampacity.py
+"""
+Microbenchmark: Iz lookups against the in-memory ampacity catalog.
+
+    python -m scripts.bench_ampacity
+"""
+import time
+
+import numpy as np
+
+from app.cable_calculation.tables import (
+    AMPACITY_CU_PVC,
+    STANDARD_CROSS_SECTIONS,
+    get_catalog,
+)
+
+N = 200_000
+CABLE_TYPES = ("NYM-J", "NYY-J", "NAYY", "N2XY", "NYCWY")
+
+
+def main():
+    rng = np.random.default_rng(7)
+    cable_type = rng.choice(CABLE_TYPES, N).astype(object)
+    laying_type = rng.choice(tuple(AMPACITY_CU_PVC), N).astype(object)
+    loaded_cores = rng.choice([2, 3], N)
+    cross_section = rng.choice(STANDARD_CROSS_SECTIONS, N)
+    circuits = rng.integers(1, 12, N, endpoint=True)
+
+    start = time.perf_counter()
+    catalog = get_catalog()
+    print(f"{'catalog load':<32} {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+    cases = {
+        "vectorized": lambda: catalog.iz(cable_type, laying_type, loaded_cores, cross_section),
+        "vectorized + ambient/grouping": lambda: catalog.iz(
+            cable_type, laying_type, loaded_cores, cross_section,
+            ambient_c=35.0, circuits=circuits,
+        ),
+    }
+    for label, func in cases.items():
+        best = min(_timed(func) for _ in range(5))
+        print(f"{label:<32} {best * 1000:9.2f} ms  {N / best:14,.0f} lookups/s")
+
+    scalar_n = N // 10
+    rows = list(zip(
+        cable_type[:scalar_n], laying_type[:scalar_n],
+        loaded_cores[:scalar_n].tolist(), cross_section[:scalar_n].tolist(),
+    ))
+
+    def scalar():
+        for ct, lt, cores, section in rows:
+            catalog.iz_one(ct, lt, cores, section, ambient_c=35.0)
+
+    best = min(_timed(scalar) for _ in range(3))
+    print(f"{'scalar iz_one':<32} {best * 1000:9.2f} ms  {scalar_n / best:14,.0f} lookups/s")
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
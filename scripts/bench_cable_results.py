@@ -0,0 +1,67 @@
+# scripts/bench_cable_results.py
+"""
+Benchmark: vectorized engine vs. row-by-row fallback.
+
+    python -m scripts.bench_cable_results
+"""
+import time
+
+import numpy as np
+
+from app.cable_calculation import engine
+from app.cable_calculation.tables import STANDARD_CROSS_SECTIONS
+
+SIZES = (10_000, 100_000)
+
+
+def generate_rows(n: int, seed: int = 42):
+    """Synthetic cable list in engine.INPUT_COLUMNS order."""
+    rng = np.random.default_rng(seed)
+    sections = rng.choice(STANDARD_CROSS_SECTIONS, n)
+    return list(zip(
+        range(1, n + 1),
+        ["NYY-J"] * n,
+        rng.uniform(5, 250, n).tolist(),
+        rng.integers(1, 3, n, endpoint=True).tolist(),
+        rng.choice([2, 3], n).tolist(),
+        sections.tolist(),
+        sections.tolist(),
+        ["C"] * n,
+        rng.choice([16.0, 25.0, 35.0, 63.0, 125.0], n).tolist(),
+        rng.uniform(1, 120, n).tolist(),
+    ))
+
+
+def bench(label, func, n, repeat=3):
+    best = min(_timed(func) for _ in range(repeat))
+    print(f"{label:<28} {n:>8} rows  {best * 1000:9.1f} ms  {n / best:14,.0f} rows/s")
+    return best
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    for n in SIZES:
+        rows = generate_rows(n)
+        columns = engine.to_columns(rows)
+
+        bench("numpy (evaluate_columns)", lambda: engine.evaluate_columns(columns), n)
+        bench("numpy incl. to_columns", lambda: engine.evaluate_columns(engine.to_columns(rows)), n)
+        bench("python (evaluate_rows)", lambda: engine.evaluate_rows(rows), n)
+
+        # Beide Pfade müssen dieselben Ergebnisse liefern
+        vectorized = engine.results_to_rows(engine.evaluate_columns(columns))
+        fallback = engine.evaluate_rows(rows)
+        assert [r["ok"] for r in vectorized] == [r["ok"] for r in fallback]
+        assert np.allclose(
+            [r["voltage_drop_pct"] for r in vectorized],
+            [r["voltage_drop_pct"] for r in fallback],
+        )
+
+
+if __name__ == "__main__":
+    main()
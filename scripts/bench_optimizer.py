@@ -0,0 +1,31 @@
+# scripts/bench_optimizer.py
+"""
+Benchmark: cross-section optimizer, single process vs. process pool.
+
+    python -m scripts.bench_optimizer
+"""
+import numpy as np
+
+from app.cable_calculation import engine, optimizer
+from scripts.bench_cable_results import bench, generate_rows
+
+SIZES = (10_000, 400_000)
+
+
+def main():
+    for n in SIZES:
+        columns = engine.to_columns(generate_rows(n))
+        bench("optimize_columns", lambda: optimizer.optimize_columns(columns), n)
+        if n >= optimizer.PARALLEL_MIN_ROWS:
+            serial = optimizer.optimize_columns(columns)
+            # Erster Aufruf startet die Worker
+            pooled = optimizer.optimize(columns)
+            bench("optimize (process pool)", lambda: optimizer.optimize(columns), n)
+            assert np.array_equal(
+                serial["cross_section_l"], pooled["cross_section_l"], equal_nan=True
+            )
+    optimizer.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
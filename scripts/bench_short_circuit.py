@@ -0,0 +1,33 @@
+# scripts/bench_short_circuit.py
+"""
+Benchmark: vectorized short-circuit / PE check vs. row-by-row loop.
+
+    python -m scripts.bench_short_circuit
+"""
+import numpy as np
+
+from app.cable_calculation import engine, short_circuit
+from scripts.bench_cable_results import SIZES, bench, generate_rows
+
+
+def main():
+    for n in SIZES:
+        rows = generate_rows(n)
+        columns = engine.to_columns(rows)
+
+        bench("numpy (evaluate_columns)", lambda: short_circuit.evaluate_columns(columns, source_impedance_ohm=0.2), n)
+        bench("python (evaluate_rows)", lambda: short_circuit.evaluate_rows(rows, source_impedance_ohm=0.2), n)
+
+        # Beide Pfade müssen dieselben Ergebnisse liefern
+        vectorized = short_circuit.results_to_rows(
+            short_circuit.evaluate_columns(columns, source_impedance_ohm=0.2)
+        )
+        fallback = short_circuit.evaluate_rows(rows, source_impedance_ohm=0.2)
+        for name in ("disconnection_ok", "pe_ok", "ok"):
+            assert [r[name] for r in vectorized] == [r[name] for r in fallback], name
+        for name in ("ik_max_a", "ik_min_a", "pe_min_mm2"):
+            assert np.allclose([r[name] for r in vectorized], [r[name] for r in fallback]), name
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# scripts/refresh_energy.py
+"""
+Portfolio-Lauf: Verlustenergie aller Projekte neu berechnen (nur geänderte).
+
+    python -m scripts.refresh_energy [--force]
+"""
+import sys
+
+from app.utils.db import SessionLocal
+from app.cable_calculation import energy
+
+
+def main():
+    db = SessionLocal()
+    try:
+        stats = energy.refresh_portfolio(db, force="--force" in sys.argv[1:])
+    finally:
+        db.close()
+    print(
+        f"Energy: {stats['refreshed_count']} of {stats['project_count']} projects refreshed, "
+        f"{stats['cable_count']} cables in {stats['duration_s']:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
+import json
 import requests
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import datetime
 from tests.conftest import BASE_URL
@@ -177,3 +179,1331 @@ def test_cable_calculation_ownership(admin_headers, project_id, db_session):
         headers=admin_headers
     )
     assert delete_resp.status_code == 200
+
+
+def test_results_by_version(admin_headers, project_id):
+    """Vectorized engine and row-by-row fallback return the same results."""
+    base = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYM-J",
+        "cable_length_m": 30.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 16.0,
+        "nominal_current_a": 12.0
+    }
+    overloaded = {**base, "destination": "Subpanel B", "fuse_rating_a": 32.0}
+    for payload in (base, overloaded):
+        resp = requests.post(
+            f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+            json=payload,
+            headers=admin_headers
+        )
+        assert resp.status_code == 200, resp.text
+    version = resp.json()["version"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/{version}/results?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["summary"]["cable_count"] == 2
+    assert data["summary"]["failed_count"] == 1
+    first, second = data["results"]
+    assert first["ok"] is True
+    assert 0 < first["voltage_drop_pct"] < 3
+    assert second["in_le_iz"] is False
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/{version}/results?project_id={project_id}&mode=python",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    fallback = resp.json()
+    assert fallback["summary"] == data["summary"]
+    for a, b in zip(fallback["results"], data["results"]):
+        assert a["ok"] == b["ok"]
+        assert abs(a["voltage_drop_pct"] - b["voltage_drop_pct"]) < 1e-9
+
+
+def test_results_use_ampacity_catalog(admin_headers, project_id):
+    """Iz depends on laying type and ambient temperature; unknown laying types fail the check."""
+    payload = {
+        "origin": "Main Distribution",
+        "destination": "Pump",
+        "cable_type": "NYY-J",
+        "cable_length_m": 20.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    for laying_type in ("C", "unknown"):
+        resp = requests.post(
+            f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+            json={**payload, "laying_type": laying_type},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200, resp.text
+    version = resp.json()["version"]
+
+    url = f"{BASE_URL}/cable_calculation/{version}/results?project_id={project_id}"
+    resp = requests.get(url, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    known, unknown = resp.json()["results"]
+    assert known["iz_a"] == 76.0
+    assert unknown["iz_a"] is None
+    assert unknown["in_le_iz"] is False
+
+    resp = requests.get(url + "&ambient_c=40", headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["results"][0]["iz_a"] < 76.0
+
+
+def test_results_aluminium_resistivity(admin_headers, project_id):
+    """Aluminium cables (NAYY) use the aluminium resistivity, in both engine modes."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Pump",
+        "cable_type": "NYY-J",
+        "cable_length_m": 80.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 35.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 100.0,
+        "nominal_current_a": 80.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "cable_type": "NAYY-J"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    # cos phi = 1: rein ohmscher Spannungsfall, Verhältnis = rho_Al / rho_Cu bei 70 °C
+    ratio = 0.028264 * (1 + 0.00403 * 50) / (0.017241 * (1 + 0.00393 * 50))
+    for mode in ("numpy", "python"):
+        resp = requests.get(
+            f"{BASE_URL}/cable_calculation/1/results",
+            params={"project_id": project_id, "cos_phi": 1, "mode": mode},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200, resp.text
+        copper, aluminium = resp.json()["results"]
+        assert aluminium["voltage_drop_pct"] == pytest.approx(copper["voltage_drop_pct"] * ratio)
+        assert aluminium["loop_impedance_ohm"] > 1.6 * copper["loop_impedance_ohm"]
+
+
+def test_bulk_create(admin_headers, project_id):
+    """Bulk create reports invalid rows by index; atomic=true rejects the whole batch."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYM-J",
+        "cable_length_m": 25.0,
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "B1",
+        "fuse_rating_a": 16.0,
+        "nominal_current_a": 10.0
+    }
+    invalid = {**row, "cable_length_m": "long"}
+    batch = [row, invalid, {**row, "destination": "Subpanel B"}]
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&atomic=true",
+        json=batch,
+        headers=admin_headers
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["index"] == 1
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=batch,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["version"] == 1
+    assert [c["destination"] for c in data["created"]] == ["Subpanel A", "Subpanel B"]
+    assert [e["index"] for e in data["errors"]] == [1]
+    assert data["errors"][0]["errors"][0]["loc"] == ["cable_length_m"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/{data['version']}?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()] == [c["id"] for c in data["created"]]
+
+
+def test_clone_version(admin_headers, project_id):
+    """Cloning copies all cables into a new version and applies overrides."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYM-J",
+        "cable_length_m": 25.0,
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 16.0,
+        "nominal_current_a": 10.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Subpanel B"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/versions/clone?project_id={project_id}",
+        json={"overrides": {"laying_type": "E"}},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    clone = resp.json()
+    assert clone["source_version"] == 1
+    assert clone["version"] == 2
+    assert clone["cable_count"] == 2
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/2?project_id={project_id}",
+        headers=admin_headers
+    )
+    cables = resp.json()
+    assert [c["destination"] for c in cables] == ["Subpanel A", "Subpanel B"]
+    assert all(c["laying_type"] == "E" for c in cables)
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert all(c["laying_type"] == "C" for c in resp.json())
+
+    # Clone without body copies the latest version
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/versions/clone?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["source_version"] == 2
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/versions/clone?project_id={project_id}",
+        json={"source_version": 99},
+        headers=admin_headers
+    )
+    assert resp.status_code == 404
+
+
+def test_diff_versions(admin_headers, project_id):
+    """Diff reports added, removed and changed cables with per-field deltas."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYM-J",
+        "cable_length_m": 25.0,
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 16.0,
+        "nominal_current_a": 10.0
+    }
+    url = f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true"
+    v1 = [row, {**row, "destination": "Subpanel B"}, {**row, "destination": "Subpanel C"}]
+    v2 = [
+        row,
+        {**row, "destination": "Subpanel B", "cable_length_m": 40.0, "laying_type": "E"},
+        {**row, "destination": "Subpanel D"},
+    ]
+    for batch in (v1, v2):
+        resp = requests.post(url, json=batch, headers=admin_headers)
+        assert resp.status_code == 200, resp.text
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/diff",
+        params={"project_id": project_id, "from": 1, "to": 2},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    diff = resp.json()
+    assert [c["destination"] for c in diff["added"]] == ["Subpanel D"]
+    assert [c["destination"] for c in diff["removed"]] == ["Subpanel C"]
+    assert diff["unchanged_count"] == 1
+
+    (change,) = diff["changed"]
+    assert change["destination"] == "Subpanel B"
+    assert change["changes"]["cable_length_m"] == {"old": 25.0, "new": 40.0, "delta": 15.0}
+    assert change["changes"]["laying_type"] == {"old": "C", "new": "E", "delta": None}
+
+
+def test_import_csv_and_ndjson(admin_headers, project_id):
+    """Streaming import validates every row and reports progress per chunk."""
+    csv_data = (
+        "origin;destination;cable_type;cable_length_m;number_of_cables;total_cores;"
+        "loaded_cores;cross_section_l;cross_section_pe;laying_type;fuse_rating_a;nominal_current_a\n"
+        "UV1;Licht 1;NYM-J;12,5;1;3;2;1,5;1,5;C;10;6\n"
+        "UV1;Licht 2;NYM-J;abc;1;3;2;1,5;1,5;C;10;6\n"
+        "UV1;Steckdosen;NYM-J;20;1;3;2;2,5;2,5;C;16;10\n"
+    )
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}&new_version=true&batch_size=2",
+        files={"file": ("kabel.csv", csv_data, "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    report = resp.json()
+    assert report["version"] == 1
+    assert report["rows_read"] == 3
+    assert report["inserted"] == 2
+    assert [c["rows"] for c in report["chunks"]] == [2, 1]
+    (error,) = report["errors"]
+    assert error["line"] == 3
+    assert error["errors"][0]["loc"] == ["cable_length_m"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1?project_id={project_id}",
+        headers=admin_headers
+    )
+    cables = resp.json()
+    assert [c["cable_length_m"] for c in cables] == [12.5, 20.0]
+
+    row = {
+        "origin": "UV2", "destination": "Motor", "cable_type": "NYY-J",
+        "cable_length_m": 30, "number_of_cables": 1, "total_cores": 5,
+        "loaded_cores": 3, "cross_section_l": 4, "cross_section_pe": 4,
+        "laying_type": "C", "fuse_rating_a": 20, "nominal_current_a": 14
+    }
+    ndjson_data = json.dumps(row) + "\n{not json\n"
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}&atomic=true",
+        files={"file": ("kabel.ndjson", ndjson_data, "application/x-ndjson")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["errors"][0]["line"] == 2
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}",
+        files={"file": ("kabel.ndjson", ndjson_data, "application/x-ndjson")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["inserted"] == 1
+    assert resp.json()["version"] == 1
+
+    # Excel-CSV (cp1252): Dekodierfehler erst nach den ersten Batches
+    header, first_row = csv_data.splitlines()[:2]
+    cp1252_data = "\n".join(
+        [header] + [first_row] * 300 + ["UV1;Küche;NYM-J;8;1;3;2;1,5;1,5;C;10;6"]
+    ).encode("cp1252")
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}&batch_size=10",
+        files={"file": ("kabel.csv", cp1252_data, "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 400
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert len(resp.json()) == 3
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}&encoding=cp1252",
+        files={"file": ("kabel.csv", cp1252_data, "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["inserted"] == 301
+
+
+def test_export_roundtrip(admin_headers, project_id):
+    """CSV export can be imported again; NDJSON export has one object per line."""
+    row = {
+        "origin": "UV1",
+        "destination": "Licht",
+        "cable_type": "NYM-J",
+        "cable_length_m": 12.5,
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "cross_section_l": 1.5,
+        "cross_section_pe": 1.5,
+        "laying_type": "C",
+        "fuse_rating_a": 10.0,
+        "nominal_current_a": 6.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Steckdosen"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/export?project_id={project_id}&format=ndjson",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [l["destination"] for l in lines] == ["Licht", "Steckdosen"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/export?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    assert resp.text.splitlines()[0].startswith("origin,destination,cable_type")
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/import?project_id={project_id}&new_version=true",
+        files={"file": ("export.csv", resp.content, "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["version"] == 2
+    assert resp.json()["inserted"] == 2
+
+
+def test_results_follow_updates_and_deletes(admin_headers, project_id):
+    """Cached results are recomputed for edited rows and dropped for deleted rows."""
+    row = {
+        "origin": "UV1",
+        "destination": "Motor 1",
+        "cable_type": "NYY-J",
+        "cable_length_m": 40.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 25.0,
+        "nominal_current_a": 18.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Motor 2"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    first_id, second_id = [c["id"] for c in resp.json()["created"]]
+    url = f"{BASE_URL}/cable_calculation/1/results?project_id={project_id}"
+
+    before = requests.get(url, headers=admin_headers).json()
+    assert before["summary"]["failed_count"] == 2
+    assert before["summary"]["total_length_m"] == 80.0
+
+    resp = requests.put(
+        f"{BASE_URL}/cable_calculation/{first_id}?project_id={project_id}",
+        json={**row, "cross_section_l": 6.0, "cable_length_m": 50.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    after = requests.get(url, headers=admin_headers).json()
+    assert after["results"][0]["ok"] is True
+    assert after["results"][1] == before["results"][1]
+    assert after["summary"]["failed_count"] == 1
+    assert after["summary"]["total_length_m"] == 90.0
+    assert after["summary"]["max_voltage_drop_pct"] == before["results"][1]["voltage_drop_pct"]
+
+    resp = requests.delete(
+        f"{BASE_URL}/cable_calculation/{second_id}?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+
+    after_delete = requests.get(url, headers=admin_headers).json()
+    assert after_delete["summary"]["cable_count"] == 1
+    assert after_delete["summary"]["failed_count"] == 0
+    assert after_delete["summary"]["max_voltage_drop_pct"] == after["results"][0]["voltage_drop_pct"]
+
+
+def test_versions_list_tracks_writes(admin_headers, project_id):
+    """The version list follows creates, clones and deletes."""
+    row = {
+        "origin": "HV",
+        "destination": "UV1",
+        "cable_type": "NYY-J",
+        "cable_length_m": 20.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    url = f"{BASE_URL}/cable_calculation/versions/list?project_id={project_id}"
+    assert requests.get(url, headers=admin_headers).json() == []
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "UV2"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/versions/clone?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    clone_ids = [
+        c["id"] for c in requests.get(
+            f"{BASE_URL}/cable_calculation/2?project_id={project_id}",
+            headers=admin_headers
+        ).json()
+    ]
+    assert requests.get(url, headers=admin_headers).json() == [2, 1]
+
+    for calc_id in clone_ids:
+        resp = requests.delete(
+            f"{BASE_URL}/cable_calculation/{calc_id}?project_id={project_id}",
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+    assert requests.get(url, headers=admin_headers).json() == [1]
+
+
+def test_concurrent_new_versions_are_unique(admin_headers, project_id):
+    """Simultaneous new_version=True creates never share a version number."""
+    row = {
+        "origin": "HV",
+        "destination": "UV1",
+        "cable_type": "NYY-J",
+        "cable_length_m": 20.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    count = 200
+
+    def create(new_version):
+        return requests.post(
+            f"{BASE_URL}/cable_calculation/?project_id={project_id}&new_version={new_version}",
+            json=row,
+            headers=admin_headers
+        )
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        responses = list(pool.map(create, ["true"] * count))
+    assert all(r.status_code == 200 for r in responses)
+    versions = sorted(r.json()["version"] for r in responses)
+    assert versions == list(range(1, count + 1))
+
+    resp = create("false")
+    assert resp.status_code == 200
+    assert resp.json()["version"] == count
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id=999999&new_version=true",
+        json=row,
+        headers=admin_headers
+    )
+    assert resp.status_code == 404
+
+
+def test_optimize_and_apply_bulk_edits(admin_headers, project_id):
+    """Optimizer suggestions pass the results check once applied via PATCH /bulk."""
+    row = {
+        "origin": "UV1",
+        "destination": "Motor 1",
+        "cable_type": "NYY-J",
+        "cable_length_m": 40.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 25.0,
+        "nominal_current_a": 18.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/optimize",
+        json=row,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    single = resp.json()
+    assert single["suggested_cross_section_l"] == 4.0
+    assert single["suggested_cross_section_pe"] == 4.0
+    assert single["changed"] is True and single["reason"] is None
+
+    # Langer Endstromkreis: 4 mm² reicht für Spannungsfall und Iz, aber
+    # Ik_min erreicht Ia (0,4 s) nicht -> Abschaltbedingung bestimmt den Querschnitt
+    long_run = {**row, "cable_length_m": 100.0, "fuse_rating_a": 32.0, "nominal_current_a": 10.0}
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/optimize",
+        json={**long_run, "cross_section_l": 4.0, "cross_section_pe": 4.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    single = resp.json()
+    assert single["suggested_cross_section_l"] == 6.0
+    assert single["suggested_cross_section_pe"] == 6.0
+
+    oversized = {**row, "destination": "Licht", "cross_section_l": 95.0,
+                 "cross_section_pe": 50.0, "fuse_rating_a": 10.0, "nominal_current_a": 6.0}
+    unknown = {**row, "destination": "Pumpe", "laying_type": "X9"}
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, oversized, unknown],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/optimize?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    optimization = resp.json()
+    assert optimization["changed_count"] == 2
+    assert optimization["infeasible_count"] == 1
+    assert optimization["suggestions"][1]["suggested_cross_section_l"] == 1.5
+    assert optimization["suggestions"][2]["reason"] == "unknown_laying_type"
+
+    resp = requests.patch(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}",
+        json=optimization["edits"],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["updated"] == 2
+
+    results = requests.get(
+        f"{BASE_URL}/cable_calculation/1/results?project_id={project_id}",
+        headers=admin_headers
+    ).json()["results"]
+    assert [r["ok"] for r in results] == [True, True, False]
+
+    resp = requests.patch(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}",
+        json=[{"id": 999999, "cross_section_l": 4.0}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 404
+
+
+def test_bom_with_latest_prices(admin_headers, project_id):
+    """The BOM groups cables per article and follows cable and price changes."""
+    row = {
+        "origin": "HV",
+        "destination": "UV1",
+        "cable_type": "NYY-J",
+        "cable_length_m": 10.0,
+        "number_of_cables": 2,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    small = {**row, "destination": "Licht", "cable_length_m": 30.0, "number_of_cables": 1,
+             "cross_section_l": 2.5, "cross_section_pe": 2.5}
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "UV2"}, small],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    small_id = resp.json()["created"][2]["id"]
+
+    prices_url = f"{BASE_URL}/prices"
+    cat_id = requests.post(
+        f"{prices_url}/categories", json={"name": "Kabel BOM"}, headers=admin_headers
+    ).json()["id"]
+    article_ids = [
+        requests.post(
+            f"{prices_url}/articles", json={"name": name, "category_id": cat_id},
+            headers=admin_headers
+        ).json()["id"]
+        for name in ("NYY-J 5x16", "nyy-j 5x2,5")
+    ]
+    for price, day in ((9.0, "2025-01-01"), (10.0, "2025-06-01")):
+        resp = requests.post(
+            f"{prices_url}/prices",
+            json={"price": price, "date": day, "article_id": article_ids[0]},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+
+    url = f"{BASE_URL}/cable_calculation/1/bom?project_id={project_id}"
+    bom = requests.get(url, headers=admin_headers).json()
+    items = {item["cross_section"]: item for item in bom["items"]}
+    assert items[16.0]["length_m"] == 40.0
+    assert items[16.0]["cable_count"] == 2
+    assert items[16.0]["unit_price"] == 10.0
+    assert items[16.0]["cost"] == 400.0
+    assert items[2.5]["cost"] is None
+    assert bom["unpriced_count"] == 1
+    assert bom["total_cost"] == 400.0
+
+    resp = requests.post(
+        f"{prices_url}/prices",
+        json={"price": 1.5, "date": "2025-06-01", "article_id": article_ids[1]},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    bom = requests.get(url, headers=admin_headers).json()
+    assert bom["unpriced_count"] == 0
+    assert bom["total_cost"] == 445.0
+
+    resp = requests.put(
+        f"{BASE_URL}/cable_calculation/{small_id}?project_id={project_id}",
+        json={**small, "cable_length_m": 50.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    bom = requests.get(url, headers=admin_headers).json()
+    assert bom["total_cost"] == 475.0
+
+
+def test_topology_cumulative_drop(admin_headers, project_id):
+    """Cumulative drop adds up along the tree; cycles and orphans are reported."""
+    row = {
+        "cable_type": "NYY-J",
+        "cable_length_m": 50.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    edges = [("Trafo", "HV"), ("HV", "UV1"), ("UV1", "Motor"), ("HV", "UV2"),
+             ("Alt", "Pumpe"), ("X", "Y"), ("Y", "X")]
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[{**row, "origin": o, "destination": d} for o, d in edges],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    ids = [c["id"] for c in resp.json()["created"]]
+
+    results = requests.get(
+        f"{BASE_URL}/cable_calculation/1/results?project_id={project_id}",
+        headers=admin_headers
+    ).json()["results"]
+    drop = results[0]["voltage_drop_pct"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/topology?project_id={project_id}",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    topo = resp.json()
+    nodes = {n["name"]: n for n in topo["nodes"]}
+    assert topo["supply"] == "Trafo"
+    assert topo["node_count"] == 9
+    assert nodes["Motor"]["cumulative_drop_pct"] == pytest.approx(3 * drop)
+    assert nodes["Motor"]["depth"] == 3
+    assert nodes["Motor"]["feeder_id"] == ids[2]
+    assert nodes["Motor"]["consumer"] is True
+    assert nodes["Motor"]["ok"] is (3 * drop <= 4.0)
+    assert sorted(topo["cycles"]) == ["X", "Y"]
+    assert nodes["X"]["cumulative_drop_pct"] is None
+    assert sorted(topo["orphans"]) == ["Alt", "Pumpe"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/topology?project_id={project_id}&problems_only=true",
+        headers=admin_headers
+    )
+    problems = resp.json()
+    assert problems["node_count"] == 9
+    assert {n["name"] for n in problems["nodes"]} == {
+        name for name, n in nodes.items() if n["ok"] is False or n["cycle"] or n["orphan"]
+    }
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/topology?project_id={project_id}&root=Alt",
+        headers=admin_headers
+    )
+    assert "Trafo" in resp.json()["orphans"]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/topology?project_id={project_id}&root=Nope",
+        headers=admin_headers
+    )
+    assert resp.status_code == 404
+
+
+def test_short_circuit_checks(admin_headers, project_id):
+    """Fault currents, disconnection and PE checks; numpy and python agree."""
+    row = {
+        "cable_type": "NYY-J",
+        "origin": "HV",
+        "destination": "UV",
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "laying_type": "C",
+        "nominal_current_a": 10.0
+    }
+    calcs = [
+        # i. O.
+        {**row, "cable_length_m": 30.0, "cross_section_l": 2.5, "cross_section_pe": 2.5, "fuse_rating_a": 16.0},
+        # zu lang: Ik_min erreicht Ia (0,4 s) nicht
+        {**row, "cable_length_m": 300.0, "cross_section_l": 1.5, "cross_section_pe": 1.5, "fuse_rating_a": 16.0},
+        # PE zu klein: weder Tabelle (50 mm²) noch adiabatisch
+        {**row, "cable_length_m": 20.0, "total_cores": 5, "loaded_cores": 3,
+         "cross_section_l": 95.0, "cross_section_pe": 16.0, "fuse_rating_a": 125.0},
+        # 70 m: Kupfer schaltet noch ab, Aluminium (höherer Widerstand) nicht mehr
+        {**row, "cable_length_m": 70.0, "cross_section_l": 2.5, "cross_section_pe": 2.5, "fuse_rating_a": 16.0},
+        {**row, "cable_type": "NAYY-J", "cable_length_m": 70.0, "cross_section_l": 2.5,
+         "cross_section_pe": 2.5, "fuse_rating_a": 16.0},
+    ]
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=calcs,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    url = f"{BASE_URL}/cable_calculation/1/short_circuit?project_id={project_id}&source_impedance_ohm=0.2"
+    resp = requests.get(url, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    ok, far, thin_pe, copper, aluminium = data["results"]
+
+    assert ok["ok"] is True
+    assert ok["disconnect_time_s"] == 0.4
+    assert ok["ik_max_a"] > ok["ik_min_a"] > ok["ia_a"]
+
+    assert far["disconnection_ok"] is False
+    assert far["ok"] is False
+
+    assert thin_pe["disconnect_time_s"] == 5.0
+    assert thin_pe["disconnection_ok"] is True
+    assert thin_pe["pe_table_ok"] is False
+    assert thin_pe["pe_min_mm2"] > 16.0
+    assert thin_pe["pe_ok"] is False
+
+    assert copper["disconnection_ok"] is True
+    assert aluminium["disconnection_ok"] is False
+    assert aluminium["ik_min_a"] < copper["ik_min_a"] / 1.4
+
+    assert data["summary"]["failed_count"] == 3
+    assert data["summary"]["pe_failed_count"] == 1
+
+    python = requests.get(url + "&mode=python", headers=admin_headers).json()
+    assert python["summary"] == data["summary"]
+    for a, b in zip(python["results"], data["results"]):
+        assert a["ok"] == b["ok"]
+        assert a["ik_min_a"] == pytest.approx(b["ik_min_a"])
+
+
+def test_load_rollup_per_board(admin_headers, project_id):
+    """Consumer currents are summed per board and propagated upstream with diversity."""
+    row = {
+        "cable_type": "NYY-J",
+        "cable_length_m": 20.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+    }
+    circuits = [("Trafo", "HV", 100.0), ("HV", "UV1", 40.0), ("UV1", "M1", 10.0),
+                ("UV1", "M2", 20.0), ("HV", "Licht", 5.0)]
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[{**row, "origin": o, "destination": d, "nominal_current_a": i} for o, d, i in circuits],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    url = f"{BASE_URL}/cable_calculation/1/loads?project_id={project_id}"
+    resp = requests.get(url, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    boards = {b["name"]: b for b in data["boards"]}
+    assert [b["name"] for b in data["boards"]] == ["Trafo", "HV", "UV1"]
+    # UV1: 2 Stromkreise -> 0,9
+    assert boards["UV1"]["connected_load_a"] == pytest.approx(30.0)
+    assert boards["UV1"]["demand_a"] == pytest.approx(27.0)
+    assert boards["UV1"]["feeder_current_a"] == pytest.approx(40.0)
+    assert boards["UV1"]["ok"] is True
+    assert boards["HV"]["demand_a"] == pytest.approx(0.9 * (27.0 + 5.0))
+    assert boards["Trafo"]["root"] is True
+    assert data["total_demand_a"] == pytest.approx(0.9 * 32.0)
+
+    resp = requests.get(url + "&default_factor=1&factor=UV1=0.5", headers=admin_headers)
+    boards = {b["name"]: b for b in resp.json()["boards"]}
+    assert boards["UV1"]["demand_a"] == pytest.approx(15.0)
+    assert boards["HV"]["demand_a"] == pytest.approx(20.0)
+
+    # Änderungen invalidieren den Cache
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+        json={**row, "origin": "UV1", "destination": "M3", "nominal_current_a": 10.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    resp = requests.get(url + "&default_factor=1", headers=admin_headers)
+    boards = {b["name"]: b for b in resp.json()["boards"]}
+    assert boards["UV1"]["demand_a"] == pytest.approx(40.0)
+
+    resp = requests.get(url + "&factor=UV1=2", headers=admin_headers)
+    assert resp.status_code == 422
+
+
+def test_results_with_route_grouping(admin_headers, project_id):
+    """Cables sharing origin and laying type are derated together."""
+    row = {
+        "cable_type": "NYY-J",
+        "destination": "M",
+        "cable_length_m": 20.0,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 40.0
+    }
+    calcs = [
+        {**row, "origin": "UV1", "number_of_cables": 2},
+        {**row, "origin": "UV1", "number_of_cables": 1},
+        {**row, "origin": "UV2", "number_of_cables": 1},
+    ]
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=calcs,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    url = f"{BASE_URL}/cable_calculation/1/results?project_id={project_id}"
+    plain = requests.get(url, headers=admin_headers).json()["results"]
+    grouped = requests.get(url + "&grouping=true", headers=admin_headers).json()["results"]
+    # UV1: 3 Stromkreise auf einer Trasse, UV2 allein
+    factor = grouped[1]["iz_a"] / plain[1]["iz_a"]
+    assert factor < 1
+    assert grouped[0]["iz_a"] == pytest.approx(plain[0]["iz_a"] * factor)
+    assert grouped[2]["iz_a"] == pytest.approx(plain[2]["iz_a"])
+
+    python = requests.get(url + "&grouping=true&mode=python", headers=admin_headers).json()["results"]
+    assert [r["iz_a"] for r in python] == pytest.approx([r["iz_a"] for r in grouped])
+
+    # Neues Kabel auf der Trasse UV2 ändert auch das bestehende
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+        json={**row, "origin": "UV2", "number_of_cables": 1},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    regrouped = requests.get(url + "&grouping=true", headers=admin_headers).json()["results"]
+    assert regrouped[2]["iz_a"] < grouped[2]["iz_a"]
+
+
+def test_what_if_scenario(admin_headers, project_id):
+    """Scenario edits stay in memory until committed as one bulk write."""
+    row = {
+        "cable_type": "NYY-J",
+        "origin": "HV",
+        "destination": "UV",
+        "cable_length_m": 40.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    calcs = [{**row, "laying_type": "C"}, {**row, "laying_type": "C"}, {**row, "laying_type": "E"}]
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=calcs,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    base = requests.get(
+        f"{BASE_URL}/cable_calculation/1/results?project_id={project_id}",
+        headers=admin_headers
+    ).json()["results"]
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios?project_id={project_id}&version=1",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    scenario_id = resp.json()["scenario_id"]
+    assert resp.json()["cable_count"] == 3
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}/edits",
+        json=[
+            {"field": "nominal_current_a", "op": "scale", "value": 1.2},
+            {"field": "laying_type", "value": "E", "where": {"laying_type": "C"}},
+        ],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["matched"] == [3, 2]
+    assert data["changed_count"] == 3
+    assert data["results"][0]["voltage_drop_pct"] == pytest.approx(1.2 * base[0]["voltage_drop_pct"])
+    assert data["results"][0]["iz_a"] == pytest.approx(base[2]["iz_a"])
+
+    # Ungültige Änderung: nichts wird übernommen
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}/edits",
+        json=[{"field": "nominal_current_a", "op": "add", "value": 5},
+              {"field": "laying_type", "op": "scale", "value": 2}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 422
+    assert requests.get(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}", headers=admin_headers
+    ).json()["edit_count"] == 2
+
+    # Noch nichts gespeichert
+    stored = requests.get(
+        f"{BASE_URL}/cable_calculation/1?project_id={project_id}", headers=admin_headers
+    ).json()
+    assert [c["nominal_current_a"] for c in stored] == [50.0, 50.0, 50.0]
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}/commit", headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["updated"] == 3
+    stored = requests.get(
+        f"{BASE_URL}/cable_calculation/1?project_id={project_id}", headers=admin_headers
+    ).json()
+    assert [c["nominal_current_a"] for c in stored] == pytest.approx([60.0, 60.0, 60.0])
+    assert {c["laying_type"] for c in stored} == {"E"}
+    assert requests.get(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}", headers=admin_headers
+    ).status_code == 404
+
+    # Version zwischenzeitlich geändert -> 409
+    scenario_id = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios?project_id={project_id}&version=1",
+        headers=admin_headers
+    ).json()["scenario_id"]
+    requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+        json={**row, "laying_type": "C"},
+        headers=admin_headers
+    )
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/scenarios/{scenario_id}/commit", headers=admin_headers
+    )
+    assert resp.status_code == 409
+
+
+def test_frozen_version_snapshot(admin_headers, project_id):
+    """A frozen version is served from its snapshot with an ETag and rejects writes."""
+    row = {
+        "cable_type": "NYY-J",
+        "origin": "HV",
+        "destination": "UV",
+        "cable_length_m": 40.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row] * 3,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    calc_id = resp.json()["created"][0]["id"]
+
+    url = f"{BASE_URL}/cable_calculation/1?project_id={project_id}"
+    before = requests.get(url, headers=admin_headers).json()
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/1/freeze?project_id={project_id}", headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    snapshot = resp.json()
+    assert snapshot["cable_count"] == 3
+    assert snapshot["compressed_bytes"] < snapshot["size_bytes"]
+
+    resp = requests.get(url, headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.json() == before
+    assert resp.headers["Content-Encoding"] == "gzip"
+    etag = resp.headers["ETag"]
+    assert snapshot["etag"] in etag
+
+    resp = requests.get(url, headers={**admin_headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    resp = requests.get(url, headers={**admin_headers, "If-None-Match": f'"other", W/{etag}'})
+    assert resp.status_code == 304
+
+    # gzip;q=0 lehnt gzip ausdrücklich ab
+    resp = requests.get(url, headers={**admin_headers, "Accept-Encoding": "gzip;q=0, identity"})
+    assert resp.status_code == 200
+    assert "Content-Encoding" not in resp.headers
+    assert resp.json() == before
+
+    # Schreibzugriffe auf die Version werden abgelehnt
+    resp = requests.put(
+        f"{BASE_URL}/cable_calculation/{calc_id}?project_id={project_id}",
+        json={**row, "nominal_current_a": 60.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 409
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}",
+        json=row,
+        headers=admin_headers
+    )
+    assert resp.status_code == 409
+    resp = requests.delete(
+        f"{BASE_URL}/cable_calculation/{calc_id}?project_id={project_id}", headers=admin_headers
+    )
+    assert resp.status_code == 409
+    assert requests.get(url, headers=admin_headers).json() == before
+
+    # Neue Versionen bleiben möglich
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}&new_version=true",
+        json=row,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+
+def test_delta_clone_of_frozen_version(admin_headers, project_id):
+    """Delta clones inherit the cables of a frozen version and copy them on write."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYM-J",
+        "cable_length_m": 25.0,
+        "number_of_cables": 1,
+        "total_cores": 3,
+        "loaded_cores": 2,
+        "cross_section_l": 2.5,
+        "cross_section_pe": 2.5,
+        "laying_type": "C",
+        "fuse_rating_a": 16.0,
+        "nominal_current_a": 10.0
+    }
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Subpanel B"}, {**row, "destination": "Subpanel C"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    clone_url = f"{BASE_URL}/cable_calculation/versions/clone?project_id={project_id}"
+
+    # Delta nur von eingefrorenen Versionen
+    resp = requests.post(clone_url, json={"delta": True}, headers=admin_headers)
+    assert resp.status_code == 409
+
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/1/freeze?project_id={project_id}", headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    resp = requests.post(clone_url, json={"delta": True}, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    clone = resp.json()
+    assert clone["version"] == 2
+    assert clone["cable_count"] == 3
+    assert clone["stored_count"] == 0
+
+    v1_url = f"{BASE_URL}/cable_calculation/1?project_id={project_id}"
+    v2_url = f"{BASE_URL}/cable_calculation/2?project_id={project_id}"
+    v1 = requests.get(v1_url, headers=admin_headers).json()
+    v2 = requests.get(v2_url, headers=admin_headers).json()
+    assert [{**c, "version": 1} for c in v2] == v1
+
+    # Geerbtes Kabel ändern: nur Version 2 ändert sich
+    inherited = v2[1]["id"]
+    resp = requests.put(
+        f"{BASE_URL}/cable_calculation/{inherited}?project_id={project_id}&version=2",
+        json={**row, "destination": "Subpanel B", "cable_length_m": 40.0},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["version"] == 2
+    assert resp.json()["id"] != inherited
+
+    resp = requests.delete(
+        f"{BASE_URL}/cable_calculation/{v2[2]['id']}?project_id={project_id}&version=2",
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    assert requests.get(v1_url, headers=admin_headers).json() == v1
+    v2 = requests.get(v2_url, headers=admin_headers).json()
+    assert [(c["destination"], c["cable_length_m"]) for c in v2] == [
+        ("Subpanel A", 25.0), ("Subpanel B", 40.0)
+    ]
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/2/results?project_id={project_id}", headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert len(resp.json()["results"]) == 2
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/diff",
+        params={"project_id": project_id, "from": 1, "to": 2},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    diff = resp.json()
+    assert [c["destination"] for c in diff["removed"]] == ["Subpanel C"]
+    assert [c["destination"] for c in diff["changed"]] == ["Subpanel B"]
+    assert diff["unchanged_count"] == 1
+
+    # Ketten eingefrorener Deltas: ab Tiefe 8 (MAX_DELTA_DEPTH) wird voll kopiert
+    for version in range(2, 10):
+        resp = requests.post(
+            f"{BASE_URL}/cable_calculation/{version}/freeze?project_id={project_id}",
+            headers=admin_headers
+        )
+        assert resp.status_code == 200, resp.text
+        resp = requests.post(clone_url, json={"delta": True}, headers=admin_headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["stored_count"] == (2 if version == 9 else 0)
+    resp = requests.get(f"{BASE_URL}/cable_calculation/10?project_id={project_id}", headers=admin_headers)
+    assert [c["destination"] for c in resp.json()] == ["Subpanel A", "Subpanel B"]
+
+
+def test_energy_losses_and_portfolio(admin_headers, project_id):
+    """Energy losses per cable and the incremental portfolio summary."""
+    row = {
+        "origin": "Main Distribution",
+        "destination": "Subpanel A",
+        "cable_type": "NYY-J",
+        "cable_length_m": 50.0,
+        "number_of_cables": 1,
+        "total_cores": 5,
+        "loaded_cores": 3,
+        "cross_section_l": 16.0,
+        "cross_section_pe": 16.0,
+        "laying_type": "C",
+        "fuse_rating_a": 63.0,
+        "nominal_current_a": 50.0
+    }
+    # Zweites Kabel kaum belastet: kein größerer Querschnitt
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Subpanel B", "nominal_current_a": 1.0}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/1/energy",
+        params={"project_id": project_id, "operating_hours": 4000, "energy_price": 0.3},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    energy = resp.json()
+    loaded, idle = energy["results"]
+    resistance = 0.017241 * (1 + 0.00393 * 50) * 50.0 / 16.0
+    assert loaded["loss_w"] == pytest.approx(3 * 50.0 ** 2 * resistance)
+    assert loaded["annual_loss_kwh"] == pytest.approx(loaded["loss_w"] * 4)
+    assert loaded["annual_loss_cost"] == pytest.approx(loaded["annual_loss_kwh"] * 0.3)
+    assert loaded["upsize"] and loaded["economic_section_mm2"] > 16.0
+    assert loaded["lifetime_savings"] > 0
+    assert not idle["upsize"] and idle["economic_section_mm2"] == 16.0
+    assert energy["summary"]["upsize_count"] == 1
+
+    refresh_url = f"{BASE_URL}/cable_calculation/energy/refresh"
+    resp = requests.post(refresh_url, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["refreshed_count"] == 1
+
+    # Unverändert: nichts neu zu berechnen
+    resp = requests.post(refresh_url, headers=admin_headers)
+    assert resp.json()["refreshed_count"] == 0
+    assert resp.json()["skipped_count"] == 1
+
+    resp = requests.get(f"{BASE_URL}/cable_calculation/energy/portfolio", headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    (summary,) = resp.json()
+    assert summary["project_id"] == project_id
+    assert summary["cable_count"] == 2
+    assert summary["upsize_count"] == 1
+
+    # Neue Version -> Projekt wird neu berechnet
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/?project_id={project_id}&new_version=true",
+        json=row,
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    resp = requests.post(refresh_url, headers=admin_headers)
+    assert resp.json()["refreshed_count"] == 1
+    (summary,) = requests.get(
+        f"{BASE_URL}/cable_calculation/energy/portfolio", headers=admin_headers
+    ).json()
+    assert summary["version"] == 2
+    assert summary["cable_count"] == 1
+
+    # Aluminium: Verluste und wirtschaftlicher Querschnitt mit rho_AL
+    resp = requests.post(
+        f"{BASE_URL}/cable_calculation/bulk?project_id={project_id}&new_version=true",
+        json=[row, {**row, "destination": "Subpanel C", "cable_type": "NAYY-J"}],
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    resp = requests.get(
+        f"{BASE_URL}/cable_calculation/3/energy",
+        params={"project_id": project_id, "operating_hours": 4000, "energy_price": 0.3},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    copper, aluminium = resp.json()["results"]
+    ratio = 0.028264 * (1 + 0.00403 * 50) / (0.017241 * (1 + 0.00393 * 50))
+    assert aluminium["loss_w"] == pytest.approx(copper["loss_w"] * ratio)
+    assert aluminium["economic_section_mm2"] >= copper["economic_section_mm2"]
@@ -71,3 +71,321 @@ def test_category_article_price_flow(admin_headers):
     resp = requests.delete(f"{BASE_URL}/categories/{cat_id}", headers=admin_headers)
     assert resp.status_code == 200
     assert resp.json()["detail"] == "Category deleted"
+
+
+def test_current_prices(admin_headers):
+    """Latest price per article, per category or across all categories."""
+    cat_ids = []
+    for name in ("Kabel", "Leuchten"):
+        resp = requests.post(f"{BASE_URL}/categories", json={"name": name}, headers=admin_headers)
+        assert resp.status_code == 200
+        cat_ids.append(resp.json()["id"])
+
+    articles = {}
+    for name, cat_id, prices in (
+        ("NYM-J 3x1.5", cat_ids[0], [("2024-01-10", 0.40), ("2025-06-01", 0.52), ("2025-01-15", 0.48)]),
+        ("NYM-J 5x2.5", cat_ids[0], [("2025-03-01", 1.10)]),
+        ("LED Panel", cat_ids[1], [("2023-05-05", 49.0), ("2024-05-05", 45.0)]),
+        ("Ohne Preis", cat_ids[1], []),
+    ):
+        resp = requests.post(
+            f"{BASE_URL}/articles", json={"name": name, "category_id": cat_id}, headers=admin_headers
+        )
+        assert resp.status_code == 200
+        articles[name] = resp.json()["id"]
+        for day, value in prices:
+            resp = requests.post(
+                f"{BASE_URL}/prices",
+                json={"price": value, "date": day, "article_id": articles[name]},
+                headers=admin_headers
+            )
+            assert resp.status_code == 200
+
+    resp = requests.get(
+        f"{BASE_URL}/prices/current", params={"category_id": cat_ids[0]}, headers=admin_headers
+    )
+    assert resp.status_code == 200
+    current = {p["article_name"]: (p["date"], p["price"]) for p in resp.json()}
+    assert current == {"NYM-J 3x1.5": ("2025-06-01", 0.52), "NYM-J 5x2.5": ("2025-03-01", 1.10)}
+
+    resp = requests.get(f"{BASE_URL}/prices/current", headers=admin_headers)
+    assert resp.status_code == 200
+    current = {p["article_id"]: p for p in resp.json()}
+    assert set(current) == {articles["NYM-J 3x1.5"], articles["NYM-J 5x2.5"], articles["LED Panel"]}
+    led = current[articles["LED Panel"]]
+    assert (led["price"], led["category_id"]) == (45.0, cat_ids[1])
+
+    # Neuester Preis gelöscht: der vorherige gilt wieder
+    resp = requests.delete(f"{BASE_URL}/prices/{led['price_id']}", headers=admin_headers)
+    assert resp.status_code == 200
+    resp = requests.get(
+        f"{BASE_URL}/prices/current", params={"category_id": cat_ids[1]}, headers=admin_headers
+    )
+    assert [(p["date"], p["price"]) for p in resp.json()] == [("2023-05-05", 49.0)]
+
+
+def test_prices_as_of(admin_headers):
+    """As-of lookups for many articles at one date and one article at many dates."""
+    resp = requests.post(f"{BASE_URL}/categories", json={"name": "Stichtag"}, headers=admin_headers)
+    cat_id = resp.json()["id"]
+    art_ids = []
+    for name in ("NYY-J 3x2.5", "NYY-J 5x6"):
+        resp = requests.post(
+            f"{BASE_URL}/articles", json={"name": name, "category_id": cat_id}, headers=admin_headers
+        )
+        art_ids.append(resp.json()["id"])
+    for art_id, day, value in (
+        (art_ids[0], "2024-01-01", 1.0),
+        (art_ids[0], "2024-07-01", 1.2),
+        (art_ids[0], "2025-01-01", 1.5),
+        (art_ids[1], "2024-09-01", 3.0),
+    ):
+        resp = requests.post(
+            f"{BASE_URL}/prices", json={"price": value, "date": day, "article_id": art_id},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+
+    history_url = f"{BASE_URL}/articles/{art_ids[0]}/prices/as_of"
+    resp = requests.get(
+        history_url,
+        params={"date": ["2023-12-31", "2024-01-01", "2024-08-15", "2026-01-01"]},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    assert [p["price"] for p in resp.json()] == [None, 1.0, 1.2, 1.5]
+    assert resp.json()[2]["price_date"] == "2024-07-01"
+
+    resp = requests.get(
+        f"{BASE_URL}/prices/as_of", params={"date": "2024-08-15", "category_id": cat_id},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200
+    assert [(p["article_id"], p["price"]) for p in resp.json()] == [(art_ids[0], 1.2), (art_ids[1], None)]
+
+    # Neuer und gelöschter Preis wirken sofort
+    resp = requests.post(
+        f"{BASE_URL}/prices", json={"price": 1.3, "date": "2024-08-01", "article_id": art_ids[0]},
+        headers=admin_headers
+    )
+    new_id = resp.json()["id"]
+    resp = requests.get(history_url, params={"date": "2024-08-15"}, headers=admin_headers)
+    assert resp.json()[0]["price"] == 1.3
+    requests.delete(f"{BASE_URL}/prices/{new_id}", headers=admin_headers)
+    resp = requests.get(history_url, params={"date": "2024-08-15"}, headers=admin_headers)
+    assert resp.json()[0]["price"] == 1.2
+
+    resp = requests.get(
+        f"{BASE_URL}/articles/999999/prices/as_of", params={"date": "2024-08-15"}, headers=admin_headers
+    )
+    assert resp.status_code == 404
+
+
+def test_price_series(admin_headers):
+    """Monthly aggregates per article and downsampling to max_points."""
+    resp = requests.post(f"{BASE_URL}/categories", json={"name": "Verlauf"}, headers=admin_headers)
+    cat_id = resp.json()["id"]
+    art_ids = []
+    for name in ("NYM-J 3x1.5", "NYM-J 3x2.5"):
+        resp = requests.post(
+            f"{BASE_URL}/articles", json={"name": name, "category_id": cat_id}, headers=admin_headers
+        )
+        art_ids.append(resp.json()["id"])
+    quotes = [
+        ("2024-01-05", 1.0), ("2024-01-20", 3.0), ("2024-01-10", 2.0),
+        ("2024-02-01", 4.0),
+        ("2024-03-15", 5.0), ("2024-03-02", 6.0),
+        ("2024-04-30", 7.0),
+    ]
+    for day, value in quotes:
+        resp = requests.post(
+            f"{BASE_URL}/prices", json={"price": value, "date": day, "article_id": art_ids[0]},
+            headers=admin_headers
+        )
+        assert resp.status_code == 200
+    requests.post(
+        f"{BASE_URL}/prices", json={"price": 9.0, "date": "2024-02-10", "article_id": art_ids[1]},
+        headers=admin_headers
+    )
+
+    resp = requests.get(f"{BASE_URL}/articles/{art_ids[0]}/series", headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    series = resp.json()
+    assert series["buckets_per_point"] == 1
+    january, february, march, april = series["points"]
+    assert january == {"bucket": "2024-01-01", "min": 1.0, "max": 3.0, "mean": 2.0, "last": 3.0, "count": 3}
+    assert march["last"] == 5.0
+    assert april["count"] == 1
+
+    resp = requests.get(
+        f"{BASE_URL}/articles/{art_ids[0]}/series", params={"max_points": 2}, headers=admin_headers
+    )
+    series = resp.json()
+    assert series["buckets_per_point"] == 2
+    first, second = series["points"]
+    assert first == {"bucket": "2024-01-01", "min": 1.0, "max": 4.0, "mean": 2.5, "last": 4.0, "count": 4}
+    assert second == {"bucket": "2024-03-01", "min": 5.0, "max": 7.0, "mean": 6.0, "last": 7.0, "count": 3}
+
+    resp = requests.get(
+        f"{BASE_URL}/articles/{art_ids[0]}/series", params={"bucket": "year"}, headers=admin_headers
+    )
+    (year,) = resp.json()["points"]
+    assert (year["bucket"], year["count"], year["last"]) == ("2024-01-01", 7, 7.0)
+
+    resp = requests.get(f"{BASE_URL}/categories/{cat_id}/series", headers=admin_headers)
+    assert resp.status_code == 200
+    assert [(s["article_id"], len(s["points"])) for s in resp.json()] == [(art_ids[0], 4), (art_ids[1], 1)]
+
+    resp = requests.get(
+        f"{BASE_URL}/articles/{art_ids[0]}/series", params={"bucket": "hour"}, headers=admin_headers
+    )
+    assert resp.status_code == 422
+
+
+def test_bulk_price_import(admin_headers):
+    """CSV price lists are staged with COPY; duplicates and bad rows are counted."""
+    cat_ids = []
+    for name in ("Import A", "Import B"):
+        resp = requests.post(f"{BASE_URL}/categories", json={"name": name}, headers=admin_headers)
+        cat_ids.append(resp.json()["id"])
+    art_ids = {}
+    for name, cat_id in (("NYM-J 3x1.5", cat_ids[0]), ("NYM-J 5x2.5", cat_ids[0]),
+                         ("Doppelt", cat_ids[0]), ("Doppelt", cat_ids[1])):
+        resp = requests.post(
+            f"{BASE_URL}/articles", json={"name": name, "category_id": cat_id}, headers=admin_headers
+        )
+        art_ids[(name, cat_id)] = resp.json()["id"]
+    first = art_ids[("NYM-J 3x1.5", cat_ids[0])]
+    requests.post(
+        f"{BASE_URL}/prices", json={"price": 0.45, "date": "2025-01-01", "article_id": first},
+        headers=admin_headers
+    )
+
+    csv_data = (
+        "Lieferant;Article;Date;Price\n"
+        "X;NYM-J 3x1.5;2025-01-01;0,45\n"      # schon vorhanden
+        "X;NYM-J 3x1.5;01.02.2025;0,50\n"
+        "X;NYM-J 3x1.5;01.02.2025;0,50\n"      # doppelt in der Datei
+        "X;NYM-J 5x2.5;2025-02-01;1.234,5\n"
+        "X;NYM-J 5x2.5;kein Datum;1,00\n"
+        "X;Unbekannt;2025-02-01;2,00\n"
+        "X;Doppelt;2025-02-01;3,00\n"
+    )
+    import_url = f"{BASE_URL}/prices/import"
+    resp = requests.post(
+        import_url, files={"file": ("preise.csv", csv_data, "text/csv")}, headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert result["rows_read"] == 7
+    assert result["inserted_count"] == 2
+    assert result["duplicate_count"] == 2
+    assert (result["invalid_count"], result["unmatched_count"], result["ambiguous_count"]) == (1, 1, 1)
+    assert [(e["line"], e["reason"]) for e in result["errors"]] == [
+        (6, "invalid"), (7, "unknown article"), (8, "ambiguous article")
+    ]
+    assert set(result["timings"]) == {"copy_s", "resolve_s", "insert_s", "total_s"}
+
+    resp = requests.get(f"{BASE_URL}/articles/{first}/prices", headers=admin_headers)
+    assert sorted((p["date"], p["price"]) for p in resp.json()) == [
+        ("2025-01-01", 0.45), ("2025-02-01", 0.5)
+    ]
+    resp = requests.get(
+        f"{BASE_URL}/articles/{art_ids[('NYM-J 5x2.5', cat_ids[0])]}/prices", headers=admin_headers
+    )
+    assert [p["price"] for p in resp.json()] == [1234.5]
+
+    # Mit Kategorie eindeutig; erneuter Import fügt nichts doppelt ein
+    resp = requests.post(
+        f"{import_url}?category_id={cat_ids[1]}",
+        files={"file": ("preise.csv", "article,date,price\nDoppelt,2025-02-01,3.00\n", "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.json()["inserted_count"] == 1
+    resp = requests.post(import_url, files={"file": ("preise.csv", csv_data, "text/csv")}, headers=admin_headers)
+    assert resp.json()["inserted_count"] == 0
+    assert resp.json()["duplicate_count"] == 4
+
+    resp = requests.post(
+        import_url, files={"file": ("preise.csv", "foo,bar\n1,2\n", "text/csv")}, headers=admin_headers
+    )
+    assert resp.status_code == 400
+
+    # Windows-Kodierung ohne encoding-Parameter: 400 statt Serverfehler
+    resp = requests.post(
+        import_url,
+        files={"file": ("preise.csv", "Article;Date;Price;Währung\n".encode("cp1252"), "text/csv")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 400
+    assert "not valid utf-8" in resp.json()["detail"]
+
+
+def test_datanorm_import(admin_headers):
+    """DATANORM 4 articles and price changes; re-imports only write changes."""
+    resp = requests.post(
+        f"{BASE_URL}/categories", json={"name": "KG 445 Beleuchtungsanlagen"}, headers=admin_headers
+    )
+    cat_id = resp.json()["id"]
+    datanorm_url = f"{BASE_URL}/datanorm?category_id={cat_id}"
+
+    first = "\r\n".join([
+        "V;011024;Elektro Großhandel;Preisliste;;EUR;04",
+        "A;N;1001;00;NYM-J 3x1,5;Mantelleitung;1;2;m;4500;;;",
+        "A;N;1002;00;Abzweigdose;grün;1;0;Stk;250;;;",
+        "A;L;1003;00;Altartikel;;1;0;Stk;100;;;",
+        "A;N;1004;00;Defekt;;1;9;Stk;100;;;",
+        "P;A;1002;1;260;;;;;1001;1;4800;;;;;9999;1;100;;;;",
+    ]).encode("cp850")
+    resp = requests.post(
+        f"{datanorm_url}&batch_size=1",
+        files={"file": ("ELEKTRO.001", first, "application/octet-stream")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert result["price_date"] == "2024-10-01"
+    assert (result["article_records"], result["price_records"]) == (3, 3)
+    assert result["created_count"] == 2
+    assert result["discontinued_count"] == 1
+    assert result["unmatched_count"] == 1
+    assert result["errors"] == [{"line": 5, "error": "Invalid price unit: '9'"}]
+
+    resp = requests.get(f"{BASE_URL}/categories/{cat_id}/articles", headers=admin_headers)
+    articles = {a["article_number"]: a for a in resp.json()}
+    assert articles["1002"]["name"] == "Abzweigdose grün"
+    resp = requests.get(
+        f"{BASE_URL}/prices/current", params={"category_id": cat_id}, headers=admin_headers
+    )
+    current = {p["article_id"]: p["price"] for p in resp.json()}
+    # Preiseinheit 2: Preis je 100 m
+    assert current == {articles["1001"]["id"]: 0.48, articles["1002"]["id"]: 2.60}
+
+    updated = "\r\n".join([
+        "V;010125;Elektro Großhandel;Preisliste;;EUR;04",
+        "A;A;1001;00;NYM-J 3x1,5;Mantelleitung;1;2;m;4800;;;",
+        "A;A;1002;00;Abzweigdose;grün AP;1;0;Stk;275;;;",
+    ]).encode("cp850")
+    resp = requests.post(
+        datanorm_url, files={"file": ("ELEKTRO.001", updated, "application/octet-stream")},
+        headers=admin_headers
+    )
+    result = resp.json()
+    assert result["created_count"] == 0
+    assert result["updated_count"] == 1
+    assert (result["price_changed_count"], result["price_unchanged_count"]) == (1, 1)
+
+    resp = requests.get(f"{BASE_URL}/articles/{articles['1001']['id']}/prices", headers=admin_headers)
+    assert len(resp.json()) == 2
+    resp = requests.get(
+        f"{BASE_URL}/prices/current", params={"category_id": cat_id}, headers=admin_headers
+    )
+    current = {p["article_id"]: (p["article_name"], p["date"], p["price"]) for p in resp.json()}
+    assert current[articles["1002"]["id"]] == ("Abzweigdose grün AP", "2025-01-01", 2.75)
+
+    resp = requests.post(
+        f"{BASE_URL}/datanorm?category_id=999999",
+        files={"file": ("ELEKTRO.001", updated, "application/octet-stream")},
+        headers=admin_headers
+    )
+    assert resp.status_code == 404